@@ -0,0 +1,120 @@
+"""Benchmarks page decoding before parsing against bs4 encoding detection.
+
+Usage:
+    python -m benchmarks.decode [--pages 200] [--repeat 5]
+"""
+
+import argparse
+import json
+import time
+
+from types import SimpleNamespace
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+from oc_web_scraper.decode import Decoder
+
+from benchmarks.synthetic_site import SyntheticSite
+
+
+def synthetic_responses(number_of_pages: int, content_type: str, meta: bool = True):
+    """Renders synthetic book pages as response-like objects.
+
+    Args:
+        number_of_pages (int): Number of book pages.
+        content_type (str): Content-Type header value.
+        meta (bool): Keep <meta charset> declaration of pages.
+
+    Returns:
+        list: Objects with url, headers and content attributes.
+    """
+
+    site = SyntheticSite(number_of_books=number_of_pages, number_of_categories=1)
+
+    return [
+        SimpleNamespace(
+            url="http://127.0.0.1:8000/" + site.book_url(book),
+            headers={"Content-Type": content_type},
+            content=(
+                site.book_page(book)
+                if meta
+                else site.book_page(book).replace('<meta charset="utf-8">', "")
+            ).encode("utf-8"),
+        )
+        for book in range(number_of_pages)
+    ]
+
+
+def per_page(function, responses: list, repeat: int):
+    """Times a function over every response and keeps the best run.
+
+    Returns:
+        float: Best seconds per page.
+    """
+
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for response in responses:
+            function(response)
+        best = min(best, time.perf_counter() - start)
+
+    return best / len(responses)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.decode")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+
+    results = {"pages": arguments.pages}
+
+    cases = {
+        "header_charset": ("text/html; charset=utf-8", True),
+        "meta_charset_only": ("text/html", True),
+        "undeclared": ("text/html", False),
+    }
+
+    for case, (content_type, meta) in cases.items():
+        responses = synthetic_responses(arguments.pages, content_type, meta=meta)
+        decoder = Decoder()
+
+        detection = per_page(
+            lambda response: UnicodeDammit(response.content, is_html=True).unicode_markup,
+            responses,
+            arguments.repeat,
+        )
+        decoding = per_page(
+            lambda response: decoder.decode(response, kind="book"),
+            responses,
+            arguments.repeat,
+        )
+        parse_bytes = per_page(
+            lambda response: BeautifulSoup(response.content, "html.parser"),
+            responses,
+            arguments.repeat,
+        )
+        parse_text = per_page(
+            lambda response: BeautifulSoup(
+                decoder.decode(response, kind="book"), "html.parser"
+            ),
+            responses,
+            arguments.repeat,
+        )
+
+        results[case] = {
+            "unicode_dammit": detection,
+            "decoder": decoding,
+            "soup_from_bytes": parse_bytes,
+            "soup_from_decoded_text": parse_text,
+            "saving_per_page": parse_bytes - parse_text,
+            "decoder_sources": decoder.sources,
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
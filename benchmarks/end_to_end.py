@@ -0,0 +1,78 @@
+"""Runs the full Handler pipeline once and prints its measures as JSON.
+
+Meant to be spawned by benchmarks.run, so that peak RSS only accounts
+for the scraper itself.
+
+Usage:
+    python -m benchmarks.end_to_end WEBSITE_URL SAVE_PATH
+"""
+
+import json
+import resource
+import sys
+import time
+
+from oc_web_scraper.handler import Handler
+from oc_web_scraper.saver import Saver
+
+
+def timed(function, timings: dict, name: str):
+    """Wraps a function so that its cumulative duration is recorded.
+
+    Args:
+        function (callable): Wrapped function.
+        timings (dict): Receives durations.
+        name (str): Key of the duration in timings.
+
+    Returns:
+        callable: Wrapper.
+    """
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            timings[name] = timings.get(name, 0) + time.perf_counter() - start
+
+    return wrapper
+
+
+def main():
+    website_url, save_path = sys.argv[1:3]
+
+    config = {
+        "save_path": save_path,
+        "enable_logging": False,
+        "log_to_file": False,
+        "log_path": save_path,
+        "log_level": "info",
+    }
+
+    timings = {}
+    Saver.save_library = timed(Saver.save_library, timings=timings, name="save_time")
+
+    start = time.perf_counter()
+    handler = Handler(website_url, config=config)
+    wall_time = time.perf_counter() - start
+
+    books = sum(
+        len(category.books) for category in handler.library.categories.values()
+    )
+
+    # ru_maxrss is expressed in KiB on Linux.
+    print(
+        json.dumps(
+            {
+                "wall_time": wall_time,
+                "save_time": timings.get("save_time", 0),
+                "books": books,
+                "categories": len(handler.library.categories),
+                "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmarks packed image store against one file per image.
+
+Usage:
+    python -m benchmarks.image_pack [--images 20000] [--size 4096]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from pathlib import Path
+
+from oc_web_scraper.image_pack import PackReader, PackWriter
+
+
+def image_url(number: int):
+    return "http://127.0.0.1:8000/media/cache/{num:02x}/{num}.jpg".format(num=number)
+
+
+def write_files(directory: Path, images: list):
+    """Writes images the way Saver does in "files" mode: a temporary
+    file per image, then renamed."""
+
+    for number, content in enumerate(images):
+        path = directory.joinpath("{num}.jpg".format(num=number))
+        temporary_path = path.with_name(path.name + ".tmp")
+        with open(temporary_path, "wb") as out_file:
+            out_file.write(content)
+        os.replace(temporary_path, path)
+
+
+def write_pack(directory: Path, images: list):
+    pack = PackWriter(path=directory)
+    for number, content in enumerate(images):
+        pack.add_image(image_url=image_url(number), content=content)
+        pack.add_book(
+            upc="{num:016x}".format(num=number),
+            url="http://127.0.0.1:8000/catalogue/book_{num}/index.html".format(
+                num=number
+            ),
+            image_url=image_url(number),
+            path="category/images/{num}.jpg".format(num=number),
+        )
+    pack.close()
+
+
+def read_files(directory: Path, number_of_images: int):
+    size = 0
+    for number in range(number_of_images):
+        with open(directory.joinpath("{num}.jpg".format(num=number)), "rb") as in_file:
+            size += len(in_file.read())
+
+    return size
+
+
+def read_pack(directory: Path, number_of_images: int):
+    size = 0
+    with PackReader(path=directory) as pack:
+        for number in range(number_of_images):
+            image = pack.get(upc="{num:016x}".format(num=number))
+            size += len(image)
+            image.release()
+
+    return size
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.image_pack")
+    parser.add_argument("--images", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=4096, help="Bytes per image.")
+    arguments = parser.parse_args()
+
+    images = [os.urandom(arguments.size) for _ in range(arguments.images)]
+    results = {"images": arguments.images, "size": arguments.size}
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        files_dir = Path(temporary_dir).joinpath("files")
+        pack_dir = Path(temporary_dir).joinpath("pack")
+        files_dir.mkdir()
+        pack_dir.mkdir()
+
+        results["write_files"] = timed(write_files, files_dir, images)
+        results["write_pack"] = timed(write_pack, pack_dir, images)
+
+        results["read_files"] = timed(read_files, files_dir, arguments.images)
+        results["read_pack"] = timed(read_pack, pack_dir, arguments.images)
+
+        results["files_disk_kib"] = sum(
+            os.stat(path).st_blocks * 512 for path in files_dir.iterdir()
+        ) // 1024
+        results["pack_disk_kib"] = sum(
+            os.stat(path).st_blocks * 512 for path in pack_dir.iterdir()
+        ) // 1024
+
+        unpack_dir = Path(temporary_dir).joinpath("unpacked")
+        with PackReader(path=pack_dir) as pack:
+            results["unpack"] = timed(pack.unpack, unpack_dir)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Benchmarks LibraryIndex against full scans on synthetic books.
+
+Usage:
+    python -m benchmarks.index_queries [--books 1000000]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from types import SimpleNamespace
+
+from oc_web_scraper.index import LibraryIndex, parse_price
+
+
+def synthetic_books(number_of_books: int, seed: int = 0):
+    """Builds lightweight book-like objects, without any scraping.
+
+    Args:
+        number_of_books (int): Number of books.
+        seed (int): Random seed.
+
+    Returns:
+        list: Objects with Book attributes used by the index.
+    """
+
+    generator = random.Random(seed)
+
+    return [
+        SimpleNamespace(
+            upc="{num:016x}".format(num=num),
+            url="https://books.toscrape.com/catalogue/book_{num}/index.html".format(
+                num=num
+            ),
+            title="Book {num}".format(num=num),
+            category="Category {cat}".format(cat=num % 50),
+            price_including_tax="£{price:.2f}".format(price=generator.uniform(10, 60)),
+            number_available=generator.randrange(0, 23),
+            review_rating=generator.randrange(0, 6),
+        )
+        for num in range(number_of_books)
+    ]
+
+
+def timed(function, repeat: int = 5):
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.index_queries")
+    parser.add_argument("--books", type=int, default=1000000)
+    arguments = parser.parse_args()
+
+    books = synthetic_books(arguments.books)
+    index = LibraryIndex()
+
+    start = time.perf_counter()
+    for book in books:
+        index.add_book(book)
+    build_time = time.perf_counter() - start
+
+    middle = books[len(books) // 2]
+
+    queries = {
+        "get_by_upc": (
+            lambda: index.get(upc=middle.upc),
+            lambda: next(book for book in books if book.upc == middle.upc),
+        ),
+        "price_range_narrow": (
+            lambda: index.query(min_price=2000, max_price=2005),
+            lambda: [
+                book
+                for book in books
+                if 2000 <= parse_price(book.price_including_tax) <= 2005
+            ],
+        ),
+        "rating_5_in_category": (
+            lambda: index.query(category="Category 7", rating=5),
+            lambda: [
+                book
+                for book in books
+                if book.category == "Category 7" and book.review_rating == 5
+            ],
+        ),
+        "top_10_cheapest": (
+            lambda: index.query(order_by="price", limit=10),
+            lambda: sorted(books, key=lambda book: parse_price(book.price_including_tax))[
+                :10
+            ],
+        ),
+        "top_10_in_stock_rating_5": (
+            lambda: index.query(
+                rating=5, in_stock=True, order_by="available", descending=True, limit=10
+            ),
+            lambda: sorted(
+                (book for book in books if book.review_rating == 5 and book.number_available),
+                key=lambda book: -book.number_available,
+            )[:10],
+        ),
+    }
+
+    # First query pays for the lazy sort of range indexes.
+    index.query(min_price=0, max_price=0)
+
+    results = {"books": arguments.books, "build_time": build_time, "queries": {}}
+
+    for name, (indexed, scan) in queries.items():
+        indexed_time, indexed_result = timed(indexed)
+        scan_time, scan_result = timed(scan, repeat=1)
+
+        results["queries"][name] = {
+            "indexed": indexed_time,
+            "scan": scan_time,
+            "speedup": scan_time / indexed_time if indexed_time else None,
+            "matches": len(indexed_result) if isinstance(indexed_result, list) else 1,
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measures Logger.write cost per call on the per-book info line.
+
+Usage:
+    python -m benchmarks.logging_overhead [--calls 100000] [--threads 8]
+"""
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+
+from oc_web_scraper.logger import Logger
+
+
+def time_calls(logger: Logger, calls: int, threads: int):
+    """Calls the per-book log line from several threads.
+
+    Args:
+        logger (Logger): Logger under test.
+        calls (int): Calls per thread.
+        threads (int): Number of calling threads.
+
+    Returns:
+        float: Wall seconds per call, over all threads.
+    """
+
+    def log_books():
+        for number in range(calls):
+            logger.write(
+                log_level="info",
+                message="Created book titled {title}.",
+                title="A Light in the Attic",
+                url="https://books.toscrape.com/catalogue/book_{num}/index.html",
+                stage="book",
+                duration=0.0123,
+            )
+
+    workers = [threading.Thread(target=log_books) for _ in range(threads)]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return (time.perf_counter() - start) / (calls * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.logging_overhead")
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--threads", type=int, default=8)
+    arguments = parser.parse_args()
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as log_path:
+        cases = {
+            "disabled": dict(enable_logging=False, log_level="info"),
+            "filtered_out": dict(enable_logging=True, log_level="warning"),
+            "text_file": dict(enable_logging=True, log_level="info"),
+            "json_file": dict(enable_logging=True, log_level="info", log_format="json"),
+        }
+
+        for name, options in cases.items():
+            logger = Logger(log_to_file=True, log_path=log_path, **options)
+
+            for threads in (1, arguments.threads):
+                per_call = time_calls(
+                    logger=logger, calls=arguments.calls // threads, threads=threads
+                )
+                key = "{name}.{threads}_threads".format(name=name, threads=threads)
+                results[key] = {"value": per_call * 1e9, "unit": "ns/call"}
+
+            logger.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Checks peak RSS of large synthetic crawls, with and without memory
+budget, each in its own child process so that peak RSS only accounts
+for the scraper. Exits with status 1 if the budgeted crawl exceeds the
+RSS ceiling.
+
+Usage:
+    python -m benchmarks.memory [--books 3000] [--categories 20]
+                                [--memory-budget 33554432] [--ceiling 120]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+from benchmarks.synthetic_site import FaultInjector, SyntheticServer, SyntheticSite
+
+BENCHMARKS_DIR = Path(__file__).parent
+
+
+def cases(arguments: argparse.Namespace):
+    """Returns config overrides of each measured crawl.
+
+    Returns:
+        dict: Format is "case name": config overrides.
+    """
+
+    return {
+        "nested": {},
+        "pipeline": {"pipeline": True},
+        "pipeline_budget": {"pipeline": True, "memory_budget": arguments.memory_budget},
+    }
+
+
+def child(website_url: str, save_path: str, overrides: dict):
+    """Crawls once and prints measures as JSON, in a child process."""
+
+    from oc_web_scraper.config import load_config
+    from oc_web_scraper.handler import Handler
+
+    config = load_config()
+    config.update(
+        save_path=save_path,
+        enable_logging=False,
+        log_to_file=False,
+        parse_memo=False,
+        history=False,
+        trace=False,
+        **overrides,
+    )
+
+    start = time.perf_counter()
+    handler = Handler(website_url, config=config)
+
+    # ru_maxrss is expressed in KiB on Linux.
+    print(
+        json.dumps(
+            {
+                "wall_time": time.perf_counter() - start,
+                "books": len(handler.library.index),
+                "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                / 1024,
+                "memory": handler.fetcher.memory.stats(),
+            }
+        )
+    )
+
+
+def run_case(server: SyntheticServer, overrides: dict):
+    with tempfile.TemporaryDirectory() as save_path:
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.memory",
+                "--child",
+                server.base_url,
+                save_path,
+                json.dumps(overrides),
+            ],
+            capture_output=True,
+            text=True,
+            cwd=str(BENCHMARKS_DIR.parent),
+        )
+
+    if process.returncode != 0:
+        sys.exit("Crawl failed:\n{err}".format(err=process.stderr))
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3], json.loads(sys.argv[4]))
+        return
+
+    parser = argparse.ArgumentParser(prog="benchmarks.memory")
+    parser.add_argument("--books", type=int, default=3000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument(
+        "--latency", type=float, default=0.005, help="Seconds added to each response."
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=32 * 2**20,
+        help="Tracked memory budget in bytes, for the budgeted crawl.",
+    )
+    parser.add_argument(
+        "--ceiling",
+        type=float,
+        default=120,
+        help="Peak RSS in MiB the budgeted crawl must stay under.",
+    )
+    arguments = parser.parse_args()
+
+    server = SyntheticServer(
+        site=SyntheticSite(
+            number_of_books=arguments.books, number_of_categories=arguments.categories
+        ),
+        faults=FaultInjector(latency=arguments.latency),
+    )
+    server.start()
+
+    results = {"books": arguments.books, "ceiling_mib": arguments.ceiling}
+
+    try:
+        for case, overrides in cases(arguments).items():
+            results[case] = run_case(server, overrides=overrides)
+    finally:
+        server.stop()
+
+    print(json.dumps(results, indent=2))
+
+    if results["pipeline_budget"]["peak_rss_mib"] > arguments.ceiling:
+        sys.exit(
+            "Peak RSS {rss:.0f} MiB exceeds {ceiling:.0f} MiB ceiling.".format(
+                rss=results["pipeline_budget"]["peak_rss_mib"],
+                ceiling=arguments.ceiling,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import tempfile
+import timeit
+
+from pathlib import Path
+
+import requests
+
+from bs4 import BeautifulSoup
+
+from oc_web_scraper.book import Book
+from oc_web_scraper.columns import BookColumns
+from oc_web_scraper.category import Category
+from oc_web_scraper.fetcher import Fetcher
+from oc_web_scraper.logger import Logger
+from oc_web_scraper.memo import ParseMemo
+from oc_web_scraper.saver import Saver
+from oc_web_scraper.seen import SeenUrls
+
+
+def silent_logger():
+    """Returns a disabled Logger, so that logging does not weigh on timings.
+
+    Returns:
+        Logger: Disabled logger.
+    """
+
+    return Logger(enable_logging=False, log_to_file=False, log_path="", log_level="")
+
+
+def best_time(statement, repeat: int, number: int):
+    """Times a callable and keeps the best run.
+
+    Args:
+        statement (callable): Timed callable.
+        repeat (int): Number of timing runs.
+        number (int): Calls per timing run.
+
+    Returns:
+        float: Best seconds per call.
+    """
+
+    return min(timeit.repeat(statement, repeat=repeat, number=number)) / number
+
+
+def bench_scrap_book(book_url: str, repeat: int):
+    """Times Book.scrap_book on a replica book page.
+
+    Args:
+        book_url (str): Book page URL on replica server.
+        repeat (int): Number of timing runs.
+
+    Returns:
+        float: Best seconds per call.
+    """
+
+    soup = BeautifulSoup(requests.get(book_url).content, "html.parser")
+    title = soup.find("h1").get_text().strip()
+
+    logger = silent_logger()
+    book = Book(
+        title=title,
+        url=book_url,
+        category="Benchmark",
+        logger=logger,
+        fetcher=Fetcher(logger=logger),
+    )
+
+    return best_time(book.scrap_book, repeat=repeat, number=20)
+
+
+def bench_scrap_book_memo(book_url: str, repeat: int):
+    """Times Book.scrap_book on a replica book page already in parse
+    memo, served from its memory tier.
+
+    Args:
+        book_url (str): Book page URL on replica server.
+        repeat (int): Number of timing runs.
+
+    Returns:
+        float: Best seconds per call.
+    """
+
+    soup = BeautifulSoup(requests.get(book_url).content, "html.parser")
+    title = soup.find("h1").get_text().strip()
+
+    logger = silent_logger()
+    fetcher = Fetcher(logger=logger)
+
+    with tempfile.TemporaryDirectory() as memo_path:
+        fetcher.memo = ParseMemo(path=memo_path)
+        book = Book(
+            title=title,
+            url=book_url,
+            category="Benchmark",
+            logger=logger,
+            fetcher=fetcher,
+        )
+
+        result = best_time(book.scrap_book, repeat=repeat, number=20)
+        fetcher.memo.close()
+
+    return result
+
+
+def bench_scrap_category_page(category_url: str, repeat: int):
+    """Times Category.scrap_category_page on a replica category page,
+    including scraping of listed books.
+
+    Args:
+        category_url (str): Category page URL on replica server.
+        repeat (int): Number of timing runs.
+
+    Returns:
+        float: Best seconds per call.
+    """
+
+    logger = silent_logger()
+    category = Category(
+        name="Benchmark",
+        url=category_url,
+        logger=logger,
+        fetcher=Fetcher(logger=logger),
+        lazy=True,
+    )
+
+    def scrap_page():
+        # Fresh seen set, otherwise books are skipped as duplicates after
+        # the first run.
+        category.seen = SeenUrls()
+        category.scrap_category_page(category_url)
+
+    return best_time(scrap_page, repeat=repeat, number=1)
+
+
+def bench_slugify(repeat: int):
+    """Times Saver.slugify on book-title-like strings.
+
+    Args:
+        repeat (int): Number of timing runs.
+
+    Returns:
+        float: Best seconds per call.
+    """
+
+    titles = [
+        "The Requiem Red {num}: A Novel (Collector's Edition)".format(num=num)
+        for num in range(1000)
+    ]
+
+    with tempfile.TemporaryDirectory() as save_path:
+        logger = silent_logger()
+        saver = Saver(save_path=save_path, logger=logger, fetcher=Fetcher(logger=logger))
+
+        def slugify_all():
+            for title in titles:
+                saver.slugify(title)
+
+        return best_time(slugify_all, repeat=repeat, number=10) / len(titles)
+
+
+def bench_save_csv(repeat: int):
+    """Times Saver.save_csv with a 1,000 rows category.
+
+    Args:
+        repeat (int): Number of timing runs.
+
+    Returns:
+        float: Best seconds per call.
+    """
+
+    rows = [
+        {
+            "URL": "http://127.0.0.1/catalogue/book_{num}/index.html".format(num=num),
+            "UPC": "{num:016x}".format(num=num),
+            "Title": "Book {num}".format(num=num),
+            "Price Including Tax": "£51.77",
+            "Price Excluding Tax": "£51.77",
+            "Number Available": 22,
+            "Product Description": "Lorem ipsum dolor sit amet. " * 30,
+            "Category": "Benchmark",
+            "Review Rating": 3,
+            "Image URL": "http://127.0.0.1/media/{num}.jpg".format(num=num),
+        }
+        for num in range(1000)
+    ]
+
+    with tempfile.TemporaryDirectory() as save_path:
+        logger = silent_logger()
+        saver = Saver(save_path=save_path, logger=logger, fetcher=Fetcher(logger=logger))
+        csv_file = Path(save_path).joinpath("benchmark.csv")
+
+        return best_time(
+            lambda: saver.save_csv(csv_rows=rows, csv_file=csv_file),
+            repeat=repeat,
+            number=5,
+        )
+
+
+def bench_columns_report(repeat: int):
+    """Times BookColumns.report over 100,000 books in 50 categories.
+
+    Args:
+        repeat (int): Number of timing runs.
+
+    Returns:
+        float: Best seconds per call.
+    """
+
+    columns = BookColumns()
+
+    for num in range(100000):
+        columns.append(
+            category="Category {cat}".format(cat=num // 2000),
+            price_including_tax=1000 + num % 5000,
+            price_excluding_tax=1000 + num % 5000,
+            number_available=num % 23,
+            review_rating=num % 6,
+        )
+
+    return best_time(columns.report, repeat=repeat, number=5)
@@ -0,0 +1,126 @@
+"""Benchmarks spreading a crawl across mirrors of a synthetic website,
+served in-process with different latencies, one of them failing.
+
+Usage:
+    python -m benchmarks.mirrors [--books 1000] [--categories 10]
+                                 [--latencies 0.02,0.01,0.005]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from oc_web_scraper.config import load_config
+from oc_web_scraper.handler import Handler
+
+from benchmarks.synthetic_site import FaultInjector, SyntheticServer, SyntheticSite
+
+
+def scrape(servers: list, mirrors: list, workers: int):
+    """Scrapes first server, spreading requests across mirrors.
+
+    Args:
+        servers (list): SyntheticServer objects, counters are reset.
+        mirrors (list): Mirror root URLs.
+        workers (int): Scrape workers.
+
+    Returns:
+        dict: Wall time, scraped books, requests per server and mirror stats.
+    """
+
+    with tempfile.TemporaryDirectory() as save_path:
+        config = load_config()
+        config.update(
+            save_path=save_path,
+            enable_logging=False,
+            log_to_file=False,
+            parse_memo=False,
+            history=False,
+            trace=False,
+            scrape_workers=workers,
+            mirrors=mirrors,
+            mirror_cooldown=1,
+        )
+
+        for server in servers:
+            server.reset_counters()
+        start = time.perf_counter()
+        handler = Handler(servers[0].base_url, config=config)
+
+        return {
+            "wall_time": time.perf_counter() - start,
+            "books": len(handler.library.index),
+            "requests": {
+                server.base_url: server.counters["pages"] + server.counters["images"]
+                for server in servers
+            },
+            "mirrors": (
+                handler.fetcher.mirrors.stats()
+                if handler.fetcher.mirrors is not None
+                else None
+            ),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.mirrors")
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument(
+        "--latencies",
+        default="0.02,0.01,0.005",
+        help="Seconds added to each response, per server, first one being "
+        "the website.",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    arguments = parser.parse_args()
+
+    servers = []
+    for latency in arguments.latencies.split(","):
+        servers.append(
+            SyntheticServer(
+                site=SyntheticSite(
+                    number_of_books=arguments.books,
+                    number_of_categories=arguments.categories,
+                ),
+                faults=FaultInjector(latency=float(latency)),
+            )
+        )
+    # Answers 503 to half of requests.
+    failing = SyntheticServer(
+        site=SyntheticSite(
+            number_of_books=arguments.books, number_of_categories=arguments.categories
+        ),
+        faults=FaultInjector(latency=0.001, error_rate=0.5),
+    )
+
+    for server in servers + [failing]:
+        server.start()
+
+    # Stopped right away: connections are refused.
+    down = SyntheticServer(site=servers[0].site)
+    down.start()
+    down_url = down.base_url
+    down.stop()
+
+    mirrors = [server.base_url for server in servers[1:]]
+    results = {"books": arguments.books, "latencies": arguments.latencies}
+
+    try:
+        results["website_only"] = scrape(servers, mirrors=None, workers=arguments.workers)
+        results["mirrors"] = scrape(servers, mirrors=mirrors, workers=arguments.workers)
+        results["mirrors_failing"] = scrape(
+            servers + [failing],
+            mirrors=mirrors + [failing.base_url, down_url],
+            workers=arguments.workers,
+        )
+    finally:
+        for server in servers + [failing]:
+            server.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
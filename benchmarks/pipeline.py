@@ -0,0 +1,88 @@
+"""Benchmarks the staged crawl pipeline against nested scraping, on a
+synthetic website served in-process.
+
+Usage:
+    python -m benchmarks.pipeline [--books 2000] [--categories 20]
+                                  [--latency 0.01] [--fetch-workers 8]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from oc_web_scraper.config import load_config
+from oc_web_scraper.handler import Handler
+
+from benchmarks.synthetic_site import FaultInjector, SyntheticServer, SyntheticSite
+
+
+def scrape(server: SyntheticServer, arguments: argparse.Namespace, pipeline: bool):
+    """Scrapes and saves the synthetic website once.
+
+    Returns:
+        dict: Wall time, scraped books, and stage stats for the pipeline.
+    """
+
+    with tempfile.TemporaryDirectory() as save_path:
+        config = load_config()
+        config.update(
+            save_path=save_path,
+            enable_logging=False,
+            log_to_file=False,
+            parse_memo=False,
+            history=False,
+            trace=False,
+            scrape_workers=arguments.workers,
+            pipeline=pipeline,
+            pipeline_fetch_workers=arguments.fetch_workers,
+        )
+
+        start = time.perf_counter()
+        handler = Handler(server.base_url, config=config)
+
+        result = {
+            "wall_time": time.perf_counter() - start,
+            "books": len(handler.library.index),
+        }
+        if handler.pipeline is not None:
+            result["stages"] = handler.pipeline.stats()
+            result["bottleneck"] = handler.pipeline.bottleneck()
+
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.pipeline")
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument(
+        "--latency", type=float, default=0.01, help="Seconds added to each response."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Scrape workers of nested scraping."
+    )
+    parser.add_argument("--fetch-workers", type=int, default=8)
+    arguments = parser.parse_args()
+
+    server = SyntheticServer(
+        site=SyntheticSite(
+            number_of_books=arguments.books, number_of_categories=arguments.categories
+        ),
+        faults=FaultInjector(latency=arguments.latency),
+    )
+    server.start()
+
+    results = {"books": arguments.books, "latency": arguments.latency}
+
+    try:
+        results["nested"] = scrape(server, arguments, pipeline=False)
+        results["pipeline"] = scrape(server, arguments, pipeline=True)
+    finally:
+        server.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
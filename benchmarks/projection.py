@@ -0,0 +1,82 @@
+"""Benchmarks field and category selection against a full scrape of a
+synthetic website.
+
+Usage:
+    python -m benchmarks.projection [--books 2000] [--categories 20]
+                                    [--latency 0.005]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from oc_web_scraper.config import load_config
+from oc_web_scraper.handler import Handler
+
+from benchmarks.synthetic_site import FaultInjector, SyntheticServer, SyntheticSite
+
+CASES = {
+    "full": {},
+    "listing_fields": {"fields": ["price_including_tax", "review_rating"]},
+    "page_fields": {"fields": ["price_including_tax", "number_available"]},
+    "three_categories": {"categories": ["category 0", "category 1", "category 2"]},
+    "three_categories_listing_fields": {
+        "categories": ["category 0", "category 1", "category 2"],
+        "fields": ["price_including_tax", "review_rating"],
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.projection")
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument(
+        "--latency", type=float, default=0.005, help="Seconds added to each response."
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    arguments = parser.parse_args()
+
+    server = SyntheticServer(
+        site=SyntheticSite(
+            number_of_books=arguments.books, number_of_categories=arguments.categories
+        ),
+        faults=FaultInjector(latency=arguments.latency),
+    )
+    server.start()
+
+    results = {"books": arguments.books, "categories": arguments.categories}
+
+    try:
+        for case, selection in CASES.items():
+            with tempfile.TemporaryDirectory() as save_path:
+                config = load_config()
+                config.update(
+                    save_path=save_path,
+                    enable_logging=False,
+                    log_to_file=False,
+                    parse_memo=False,
+                    history=False,
+                    trace=False,
+                    scrape_workers=arguments.workers,
+                    **selection,
+                )
+
+                server.reset_counters()
+                start = time.perf_counter()
+                handler = Handler(server.base_url, config=config)
+
+                results[case] = {
+                    "wall_time": time.perf_counter() - start,
+                    "books": len(handler.library.index),
+                    "requests": server.counters,
+                }
+    finally:
+        server.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
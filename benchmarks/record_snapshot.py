@@ -0,0 +1,103 @@
+"""Records a snapshot of the website for benchmarks replica server.
+
+Every same-origin page, stylesheet and image reachable from the home
+page is stored under the snapshot directory, following URL paths.
+
+Usage:
+    python -m benchmarks.record_snapshot [--url URL] [--output DIR]
+"""
+
+import argparse
+
+from collections import deque
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+from bs4 import BeautifulSoup
+
+
+def local_path(output_dir: Path, url: str):
+    """Maps an URL to its file in snapshot directory.
+
+    Args:
+        output_dir (Path): Snapshot directory.
+        url (str): Recorded URL.
+
+    Returns:
+        Path: File path for this URL.
+    """
+
+    path = urlsplit(url).path
+
+    if path.endswith("/"):
+        path += "index.html"
+
+    return output_dir.joinpath(path.lstrip("/"))
+
+
+def record(website_url: str, output_dir: Path):
+    """Crawls the website breadth first and stores every response.
+
+    Args:
+        website_url (str): Website root url.
+        output_dir (Path): Snapshot directory.
+
+    Returns:
+        int: Number of recorded files.
+    """
+
+    origin = urlsplit(website_url).netloc
+    session = requests.Session()
+    queue = deque([website_url])
+    seen = {website_url}
+
+    while queue:
+        url = queue.popleft()
+        response = session.get(url)
+
+        if response.status_code != 200:
+            print("Skipped {url} ({code})".format(url=url, code=response.status_code))
+            continue
+
+        path = local_path(output_dir=output_dir, url=url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(response.content)
+
+        if not path.name.endswith(".html"):
+            continue
+
+        soup = BeautifulSoup(response.content, "html.parser")
+        links = [tag.get("href") for tag in soup.find_all(["a", "link"])]
+        links += [tag.get("src") for tag in soup.find_all("img")]
+
+        for link in links:
+            if not link:
+                continue
+
+            absolute_url = urljoin(url, link).split("#")[0]
+
+            if urlsplit(absolute_url).netloc != origin or absolute_url in seen:
+                continue
+
+            seen.add(absolute_url)
+            queue.append(absolute_url)
+
+    return len(seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.record_snapshot")
+    parser.add_argument("--url", default="https://books.toscrape.com/")
+    parser.add_argument(
+        "--output", default=str(Path(__file__).parent.joinpath("snapshot"))
+    )
+    arguments = parser.parse_args()
+
+    number = record(website_url=arguments.url, output_dir=Path(arguments.output))
+    print("Recorded {num} URL(s) to {path}.".format(num=number, path=arguments.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import threading
+
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ReplicaRequestHandler(SimpleHTTPRequestHandler):
+    """Serves snapshot files and counts served requests by kind.
+    Counters are stored on the server object."""
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+
+        if path.endswith((".jpg", ".jpeg", ".png", ".gif")):
+            kind = "images"
+        elif path.endswith("/") or path.endswith(".html"):
+            kind = "pages"
+        else:
+            kind = "other"
+
+        with self.server.counters_lock:
+            self.server.counters[kind] += 1
+
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean.
+        pass
+
+
+class ReplicaServer:
+    """ReplicaServer class serves a recorded snapshot of the website
+    from a local directory, in a background thread.
+
+    Attributes:
+        root (str): Snapshot directory.
+        server (ThreadingHTTPServer): Underlying HTTP server.
+        thread (threading.Thread): Thread running the server loop.
+    """
+
+    def __init__(self, root: str):
+        """Constructor for ReplicaServer class.
+
+        Args:
+            root (str): Snapshot directory.
+        """
+
+        self.root = root
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """Starts serving on a random local port.
+
+        Returns:
+            str: Base URL of the served website.
+        """
+
+        handler = partial(ReplicaRequestHandler, directory=str(self.root))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.server.counters = {"pages": 0, "images": 0, "other": 0}
+        self.server.counters_lock = threading.Lock()
+
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self.base_url
+
+    def stop(self):
+        """Stops the server and its thread."""
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return "http://{host}:{port}/".format(host=host, port=port)
+
+    @property
+    def counters(self):
+        with self.server.counters_lock:
+            return dict(self.server.counters)
+
+    def reset_counters(self):
+        """Sets all request counters back to zero."""
+
+        with self.server.counters_lock:
+            for kind in self.server.counters:
+                self.server.counters[kind] = 0
@@ -0,0 +1,251 @@
+"""Benchmark suite driver.
+
+Serves the recorded snapshot from a local HTTP server, runs end-to-end
+and micro benchmarks, emits results as JSON and compares them against
+a stored baseline.
+
+Usage:
+    python -m benchmarks.run [--snapshot DIR | --synthetic BOOKS] [--output FILE]
+                             [--baseline FILE] [--save-baseline]
+                             [--tolerance RATIO]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+
+from pathlib import Path
+
+from benchmarks import micro
+from benchmarks.replica import ReplicaServer
+from benchmarks.synthetic_site import SyntheticServer, SyntheticSite
+
+BENCHMARKS_DIR = Path(__file__).parent
+
+
+def metric(value: float, unit: str, better: str):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def run_end_to_end(server):
+    """Runs the full pipeline in a child process against the local server.
+
+    Args:
+        server (ReplicaServer or SyntheticServer): Running local server.
+
+    Returns:
+        dict: End-to-end metrics.
+    """
+
+    server.reset_counters()
+
+    with tempfile.TemporaryDirectory() as save_path:
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.end_to_end", server.base_url, save_path],
+            capture_output=True,
+            text=True,
+            cwd=str(BENCHMARKS_DIR.parent),
+        )
+
+    if process.returncode != 0:
+        sys.exit("End-to-end run failed:\n{err}".format(err=process.stderr))
+
+    measures = json.loads(process.stdout.strip().splitlines()[-1])
+    counters = server.counters
+    wall_time = measures["wall_time"]
+
+    return {
+        "e2e.wall_time": metric(wall_time, "s", "lower"),
+        "e2e.pages_per_sec": metric(counters["pages"] / wall_time, "1/s", "higher"),
+        "e2e.books_per_sec": metric(measures["books"] / wall_time, "1/s", "higher"),
+        "e2e.images_per_sec": metric(counters["images"] / wall_time, "1/s", "higher"),
+        "e2e.save_time": metric(measures["save_time"], "s", "lower"),
+        "e2e.peak_rss": metric(measures["peak_rss_kib"], "KiB", "lower"),
+    }
+
+
+def snapshot_urls(snapshot: Path, server: ReplicaServer):
+    """Picks the first category and book pages found in snapshot.
+
+    Args:
+        snapshot (Path): Snapshot directory.
+        server (ReplicaServer): Running replica server.
+
+    Returns:
+        tuple: Category page URL and book page URL.
+    """
+
+    category_page = sorted(snapshot.glob("catalogue/category/books/*/index.html"))[0]
+    book_page = sorted(
+        path
+        for path in snapshot.glob("catalogue/*/index.html")
+        if path.parent.name != "category"
+    )[0]
+
+    return (
+        server.base_url + category_page.relative_to(snapshot).as_posix(),
+        server.base_url + book_page.relative_to(snapshot).as_posix(),
+    )
+
+
+def run_micro(category_url: str, book_url: str, repeat: int):
+    """Runs micro benchmarks.
+
+    Args:
+        category_url (str): Category page URL on local server.
+        book_url (str): Book page URL on local server.
+        repeat (int): Number of timing runs per benchmark.
+
+    Returns:
+        dict: Micro benchmark metrics.
+    """
+
+    return {
+        "micro.scrap_book": metric(
+            micro.bench_scrap_book(book_url=book_url, repeat=repeat), "s", "lower"
+        ),
+        "micro.scrap_book_memo": metric(
+            micro.bench_scrap_book_memo(book_url=book_url, repeat=repeat), "s", "lower"
+        ),
+        "micro.scrap_category_page": metric(
+            micro.bench_scrap_category_page(category_url=category_url, repeat=repeat),
+            "s",
+            "lower",
+        ),
+        "micro.slugify": metric(micro.bench_slugify(repeat=repeat), "s", "lower"),
+        "micro.save_csv": metric(micro.bench_save_csv(repeat=repeat), "s", "lower"),
+        "micro.columns_report": metric(
+            micro.bench_columns_report(repeat=repeat), "s", "lower"
+        ),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Prints a comparison table and lists regressed metrics.
+
+    Args:
+        results (dict): Current metrics.
+        baseline (dict): Baseline metrics.
+        tolerance (float): Accepted relative change before regression.
+
+    Returns:
+        list: Names of regressed metrics.
+    """
+
+    regressions = []
+
+    print("{:<28} {:>14} {:>14} {:>9}".format("Metric", "Baseline", "Current", "Change"))
+
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+
+        before = baseline[name]["value"]
+        change = (current["value"] - before) / before if before else 0.0
+        worse = -change if current["better"] == "higher" else change
+
+        flag = ""
+        if worse > tolerance:
+            regressions.append(name)
+            flag = " REGRESSION"
+
+        print(
+            "{:<28} {:>14.6g} {:>14.6g} {:>+8.1%}{flag}".format(
+                name, before, current["value"], change, flag=flag
+            )
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.run")
+    parser.add_argument("--snapshot", default=str(BENCHMARKS_DIR.joinpath("snapshot")))
+    parser.add_argument("--output", help="Write JSON results to this file.")
+    parser.add_argument(
+        "--baseline", default=str(BENCHMARKS_DIR.joinpath("baseline.json"))
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store results as the new baseline.",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="BOOKS",
+        help="Run against a synthetic site of BOOKS books instead of snapshot.",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+
+    snapshot = Path(arguments.snapshot)
+
+    if arguments.synthetic:
+        site = SyntheticSite(number_of_books=arguments.synthetic, number_of_categories=50)
+        server = SyntheticServer(site=site)
+        server.start()
+        category_url = server.base_url + site.category_url(0)
+        book_url = server.base_url + site.book_url(0)
+
+    elif snapshot.joinpath("index.html").exists():
+        server = ReplicaServer(root=snapshot)
+        server.start()
+        category_url, book_url = snapshot_urls(snapshot=snapshot, server=server)
+
+    else:
+        sys.exit(
+            "No snapshot found at {path}. Record one with "
+            "'python -m benchmarks.record_snapshot' or use --synthetic.".format(
+                path=snapshot
+            )
+        )
+
+    results = {}
+
+    try:
+        results.update(run_end_to_end(server=server))
+        results.update(
+            run_micro(category_url=category_url, book_url=book_url, repeat=arguments.repeat)
+        )
+    finally:
+        server.stop()
+
+    document = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "metrics": results,
+    }
+    output = json.dumps(document, indent=2)
+
+    if arguments.output:
+        Path(arguments.output).write_text(output)
+    else:
+        print(output)
+
+    baseline_path = Path(arguments.baseline)
+
+    if arguments.save_baseline:
+        baseline_path.write_text(output)
+        print("Baseline saved to {path}.".format(path=baseline_path))
+        return
+
+    if not baseline_path.exists():
+        print("No baseline found at {path}.".format(path=baseline_path))
+        return
+
+    baseline = json.loads(baseline_path.read_text())["metrics"]
+    regressions = compare(results=results, baseline=baseline, tolerance=arguments.tolerance)
+
+    if regressions:
+        sys.exit("Regressed: {names}".format(names=", ".join(regressions)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Scaling harness running the full pipeline against synthetic sites
+of growing size, with optional fault injection.
+
+Usage:
+    python -m benchmarks.scale [--sizes 1000 10000 100000] [--categories 50]
+                               [--latency 0.01] [--error-rate 0.01]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+
+from pathlib import Path
+
+from benchmarks.synthetic_site import FaultInjector, SyntheticServer, SyntheticSite
+
+
+def run_size(number_of_books: int, arguments: argparse.Namespace):
+    """Crawls a synthetic site of given size in a child process.
+
+    Args:
+        number_of_books (int): Number of books of the synthetic site.
+        arguments (argparse.Namespace): Site and fault options.
+
+    Returns:
+        dict: Measures for this size.
+    """
+
+    site = SyntheticSite(
+        number_of_books=number_of_books,
+        number_of_categories=arguments.categories,
+        skew=arguments.skew,
+    )
+    faults = FaultInjector(
+        latency=arguments.latency,
+        error_rate=arguments.error_rate,
+        throttle=arguments.throttle,
+        slow_body_rate=arguments.slow_body_rate,
+    )
+    server = SyntheticServer(site=site, faults=faults)
+    server.start()
+
+    try:
+        with tempfile.TemporaryDirectory() as save_path:
+            process = subprocess.run(
+                [sys.executable, "-m", "benchmarks.end_to_end", server.base_url, save_path],
+                capture_output=True,
+                text=True,
+                cwd=str(Path(__file__).parent.parent),
+            )
+    finally:
+        server.stop()
+
+    result = {"books": number_of_books, "requests": server.counters}
+
+    if process.returncode != 0:
+        result["error"] = process.stderr.strip().splitlines()[-1]
+        return result
+
+    measures = json.loads(process.stdout.strip().splitlines()[-1])
+    result.update(measures)
+    result["books_per_sec"] = measures["books"] / measures["wall_time"]
+    result["rss_per_book_kib"] = measures["peak_rss_kib"] / max(measures["books"], 1)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.scale")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--throttle", type=float, default=0)
+    parser.add_argument("--slow-body-rate", type=float, default=0)
+    arguments = parser.parse_args()
+
+    results = []
+
+    for size in arguments.sizes:
+        result = run_size(number_of_books=size, arguments=arguments)
+        results.append(result)
+        print(json.dumps(result), flush=True)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmarks output sinks fed by one stream against one pass per sink.
+
+Usage:
+    python -m benchmarks.sinks [--books 100000] [--buffer 1024] [--slow-ms 0.05]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+
+from pathlib import Path
+
+from oc_web_scraper.sinks import (
+    JsonlSink,
+    Sink,
+    SnapshotSink,
+    SqliteSink,
+    run_sinks,
+    stream_library,
+)
+
+from benchmarks.snapshot_load import synthetic_library
+
+
+class SlowSink(Sink):
+    """Sink sleeping every 64 books, to simulate a slow destination."""
+
+    name = "slow"
+
+    def __init__(self, delay: float):
+        super().__init__()
+
+        self.delay = delay
+        self.count = 0
+
+    def write_book(self, book_object):
+        self.count += 1
+
+        if self.count % 64 == 0:
+            time.sleep(self.delay * 64)
+
+
+def fast_sinks(directory: Path):
+    return [
+        JsonlSink(path=directory.joinpath("books.jsonl")),
+        SqliteSink(path=directory.joinpath("books.sqlite")),
+        SnapshotSink(path=directory.joinpath("library.snap")),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.sinks")
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--buffer", type=int, default=1024)
+    parser.add_argument(
+        "--slow-ms", type=float, default=0.05, help="Delay per book of slow sink."
+    )
+    arguments = parser.parse_args()
+
+    library = synthetic_library(arguments.books, arguments.categories)
+    results = {"books": arguments.books, "buffer": arguments.buffer}
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        directory = Path(temporary_dir)
+
+        # One pass over the library per sink, one after another.
+        start = time.perf_counter()
+        for sink in fast_sinks(directory.joinpath("sequential")):
+            sink.path.parent.mkdir(exist_ok=True)
+            run_sinks(sinks=[sink], events=stream_library(library), buffer=arguments.buffer)
+        results["sequential_passes"] = time.perf_counter() - start
+
+        # One stream shared by every sink.
+        directory.joinpath("fan_out").mkdir()
+        start = time.perf_counter()
+        results["fan_out_sinks"] = run_sinks(
+            sinks=fast_sinks(directory.joinpath("fan_out")),
+            events=stream_library(library),
+            buffer=arguments.buffer,
+        )
+        results["fan_out"] = time.perf_counter() - start
+
+        # A slow sink blocks the stream: buffered events stay bounded.
+        directory.joinpath("slow").mkdir()
+        tracemalloc.start()
+        start = time.perf_counter()
+        results["with_slow_sink_sinks"] = run_sinks(
+            sinks=fast_sinks(directory.joinpath("slow"))
+            + [SlowSink(delay=arguments.slow_ms / 1000)],
+            events=stream_library(library),
+            buffer=arguments.buffer,
+        )
+        results["with_slow_sink"] = time.perf_counter() - start
+        results["with_slow_sink_peak_traced_mib"] = round(
+            tracemalloc.get_traced_memory()[1] / 2 ** 20, 1
+        )
+        tracemalloc.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmarks library snapshot reload against reading the csv tree.
+
+Usage:
+    python -m benchmarks.snapshot_load [--books 100000] [--categories 50]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from oc_web_scraper import snapshot
+from oc_web_scraper.data_tree import CSV_FIELDNAMES, DataTree, book_row
+from oc_web_scraper.logger import Logger
+
+
+def synthetic_library(number_of_books: int, number_of_categories: int, seed: int = 0):
+    """Builds a lightweight library-like object, without any scraping.
+
+    Args:
+        number_of_books (int): Number of books.
+        number_of_categories (int): Number of categories.
+        seed (int): Random seed.
+
+    Returns:
+        SimpleNamespace: Object with the Library and Category attributes
+        read by SnapshotWriter.
+    """
+
+    generator = random.Random(seed)
+    categories = {}
+
+    for cat in range(number_of_categories):
+        name = "Category {cat}".format(cat=cat)
+        categories[name] = SimpleNamespace(
+            name=name,
+            url="https://books.toscrape.com/catalogue/category/books/cat_{cat}/index.html".format(
+                cat=cat
+            ),
+            number_of_books=0,
+            complete=True,
+            books={},
+        )
+
+    for num in range(number_of_books):
+        category = categories["Category {cat}".format(cat=num % number_of_categories)]
+        url = "https://books.toscrape.com/catalogue/book_{num}/index.html".format(num=num)
+        category.books[url] = SimpleNamespace(
+            title="Book {num}".format(num=num),
+            url=url,
+            category=category.name,
+            upc="{num:016x}".format(num=num),
+            price_including_tax="£{price:.2f}".format(price=generator.uniform(10, 60)),
+            price_excluding_tax="£{price:.2f}".format(price=generator.uniform(10, 60)),
+            product_description="Description of book {num}. ".format(num=num) * 20,
+            image_url="https://books.toscrape.com/media/cache/{num:08x}.jpg".format(
+                num=num
+            ),
+            number_available=generator.randrange(0, 23),
+            review_rating=generator.randrange(0, 6),
+        )
+        category.number_of_books += 1
+
+    return SimpleNamespace(categories=categories)
+
+
+def write_csv_tree(library, save_path: Path):
+    """Writes one csv file per category, as Saver does, without images."""
+
+    for num, category in enumerate(library.categories.values()):
+        category_dir = save_path.joinpath("data", "category_{num}".format(num=num))
+        category_dir.mkdir(parents=True)
+
+        with open(
+            category_dir.joinpath("category_{num}.csv".format(num=num)), "w", newline=""
+        ) as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(book_row(book) for book in category.books.values())
+
+
+def timed(function, repeat: int = 3):
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.snapshot_load")
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--categories", type=int, default=50)
+    arguments = parser.parse_args()
+
+    library = synthetic_library(arguments.books, arguments.categories)
+    logger = Logger(enable_logging=False, log_to_file=False, log_path="", log_level="")
+    results = {"books": arguments.books, "categories": arguments.categories}
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        save_path = Path(temporary_dir)
+
+        start = time.perf_counter()
+        write_csv_tree(library, save_path)
+        results["csv_write"] = time.perf_counter() - start
+        data_tree = DataTree(save_path=save_path)
+
+        for compress in (False, True):
+            path = save_path.joinpath("library_{compress}.snap".format(compress=compress))
+            name = "snapshot_zlib" if compress else "snapshot_raw"
+
+            start = time.perf_counter()
+            snapshot.save_library(library, path, compress=compress)
+            results[name + "_write"] = time.perf_counter() - start
+            results[name + "_size"] = os.path.getsize(path)
+
+            results[name + "_iter_records"], _ = timed(
+                lambda: sum(1 for _ in snapshot.iter_records(path))
+            )
+            results[name + "_load_library"], loaded = timed(
+                lambda: snapshot.load_library(path, logger=logger, fetcher=None)
+            )
+            assert len(loaded.index) == arguments.books
+
+        results["csv_size"] = sum(
+            path.stat().st_size for path in save_path.joinpath("data").rglob("*.csv")
+        )
+        results["csv_iter_rows"], _ = timed(lambda: sum(1 for _ in data_tree.iter_rows()))
+
+    results["speedup_iter"] = results["csv_iter_rows"] / results["snapshot_raw_iter_records"]
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Startup time check for the command line interface.
+
+Runs --help and the local commands in fresh interpreters, and fails
+when their median wall time exceeds the budget or when they import
+scraping dependencies.
+
+Usage:
+    python -m benchmarks.startup [--runs 10] [--help-budget 0.15]
+                                 [--command-budget 0.25]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from pathlib import Path
+
+HEAVY_MODULES = ("requests", "bs4", "tqdm", "urllib3")
+
+# Prints heavy modules imported by the command, after it has run.
+PROBE = """
+import atexit, sys
+atexit.register(lambda: print("IMPORTED", ",".join(
+    name for name in {modules!r} if name in sys.modules), file=sys.stderr))
+sys.argv = ["oc_web_scraper"] + {argv!r}
+from oc_web_scraper.cli import main
+main()
+"""
+
+
+def run_command(argv: list):
+    """Runs a command in a fresh interpreter.
+
+    Args:
+        argv (list): Command line arguments.
+
+    Returns:
+        tuple: Wall seconds and list of imported heavy modules.
+    """
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-c", PROBE.format(modules=HEAVY_MODULES, argv=argv)],
+        capture_output=True,
+        text=True,
+        cwd=str(Path(__file__).parent.parent),
+    )
+    wall_time = time.perf_counter() - start
+
+    imported = []
+    for line in process.stderr.splitlines():
+        if line.startswith("IMPORTED"):
+            imported = [name for name in line.split(" ", 1)[1].split(",") if name]
+
+    return wall_time, imported
+
+
+def timed_python():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.startup")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--help-budget", type=float, default=0.15)
+    parser.add_argument("--command-budget", type=float, default=0.25)
+    arguments = parser.parse_args()
+
+    # Interpreter startup alone, for reference.
+    baseline = statistics.median(timed_python() for _ in range(arguments.runs))
+
+    failures = []
+    results = {"python_startup": baseline}
+
+    with tempfile.TemporaryDirectory() as save_path:
+        Path(save_path).joinpath("data").mkdir()
+        local = ["--set", "save_path={path}".format(path=save_path)]
+
+        cases = {
+            "help": (["--help"], arguments.help_budget),
+            "stats": (["stats"] + local, arguments.command_budget),
+            "verify": (["verify"] + local, arguments.command_budget),
+            "export": (["export"] + local, arguments.command_budget),
+            "trace": (
+                ["trace", "--set", "trace_path={path}".format(path=save_path)] + local,
+                arguments.command_budget,
+            ),
+        }
+
+        for name, (argv, budget) in cases.items():
+            runs = [run_command(argv) for _ in range(arguments.runs)]
+            median = statistics.median(wall_time for wall_time, _ in runs)
+            imported = runs[-1][1]
+            results[name] = median
+
+            if median > budget:
+                failures.append(
+                    "{name}: {time:.3f}s over {budget:.3f}s budget".format(
+                        name=name, time=median, budget=budget
+                    )
+                )
+            if imported:
+                failures.append(
+                    "{name}: imports {modules}".format(
+                        name=name, modules=", ".join(imported)
+                    )
+                )
+
+    print(json.dumps(results, indent=2))
+
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,582 @@
+"""Synthetic stand-in for the website, for load and scaling tests.
+
+Pages are generated on the fly with the markup parsed by Handler,
+Category and Book, for any number of categories and books. Latency,
+errors, throttling and slow bodies can be injected.
+
+Usage:
+    python -m benchmarks.synthetic_site --books 100000 --categories 50
+                                        [--port 8000] [--latency 0.05]
+                                        [--error-rate 0.01] [--throttle 200]
+"""
+
+import argparse
+import hashlib
+import random
+import re
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RATINGS = ("Zero", "One", "Two", "Three", "Four", "Five")
+BOOKS_PER_PAGE = 20
+
+CATEGORY_PATH = re.compile(
+    r"^/catalogue/category/books/category-(\d+)_(\d+)/(index|page-(\d+))\.html$"
+)
+BOOK_PATH = re.compile(r"^/catalogue/book-(\d+)_(\d+)/index\.html$")
+IMAGE_PATH = re.compile(r"^/media/cache/(\d+)\.jpg$")
+
+DESCRIPTION = (
+    "It is a truth universally acknowledged, that a single scraper in "
+    "possession of a good connection, must be in want of a catalogue. "
+) * 8
+
+
+class SyntheticSite:
+    """SyntheticSite class generates website pages from book and category
+    numbers only, without storing anything per book.
+
+    Attributes:
+        number_of_books (int): Total number of books.
+        number_of_categories (int): Number of categories.
+        image_size (int): Size in bytes of generated cover images.
+        padding (str): Inert markup added to pages to mimic real page weight.
+        revision (int): Changes prices and stock of one book out of ten,
+        to simulate successive states of the catalogue.
+        category_offsets (list): First book number of each category, plus
+        total number of books as last item.
+        shared (int): Number of first books also listed at the start of the
+        last category, as books belonging to several categories.
+    """
+
+    def __init__(
+        self,
+        number_of_books: int,
+        number_of_categories: int,
+        skew: float = 1.0,
+        image_size: int = 4096,
+        padding: int = 8192,
+        revision: int = 0,
+        shared: int = 0,
+    ):
+        """Constructor for SyntheticSite class.
+
+        Args:
+            number_of_books (int): Total number of books.
+            number_of_categories (int): Number of categories.
+            skew (float): Zipf exponent of category sizes, 0 for even sizes.
+            image_size (int): Size in bytes of generated cover images.
+            padding (int): Approximate bytes of inert markup per page.
+            revision (int): Catalogue revision.
+            shared (int): Number of first books also listed by last category.
+        """
+
+        self.number_of_books = number_of_books
+        self.number_of_categories = number_of_categories
+        self.image_size = image_size
+        self.padding = '<li><a href="#">Navigation link</a></li>\n' * (padding // 42)
+        self.revision = revision
+        self.shared = shared
+
+        weights = [1 / (rank + 1) ** skew for rank in range(number_of_categories)]
+        total_weight = sum(weights)
+        sizes = [int(number_of_books * w / total_weight) for w in weights]
+        for rank in range(number_of_books - sum(sizes)):
+            sizes[rank] += 1
+
+        self.category_offsets = [0]
+        for size in sizes:
+            self.category_offsets.append(self.category_offsets[-1] + size)
+
+    def category_books(self, category: int):
+        """Returns book numbers listed by a category, in listing order.
+
+        Args:
+            category (int): Category number.
+
+        Returns:
+            list: Book numbers.
+        """
+
+        books = list(
+            range(self.category_offsets[category], self.category_offsets[category + 1])
+        )
+        if category == self.number_of_categories - 1:
+            books[:0] = range(self.shared)
+
+        return books
+
+    def category_size(self, category: int):
+        return len(self.category_books(category))
+
+    def category_url(self, category: int, page: int = 0):
+        """Returns a category page path, page 0 being the index.
+
+        Args:
+            category (int): Category number.
+            page (int): Page number.
+
+        Returns:
+            str: Page path, relative to website root.
+        """
+
+        name = "index" if page == 0 else "page-{num}".format(num=page)
+
+        return "catalogue/category/books/category-{cat}_{id}/{name}.html".format(
+            cat=category, id=category + 2, name=name
+        )
+
+    def book_url(self, book: int):
+        return "catalogue/book-{book}_{book}/index.html".format(book=book)
+
+    def book_title(self, book: int):
+        return "Synthetic Book {book}".format(book=book)
+
+    def book_price(self, book: int):
+        seed = book * 7919 + (self.revision if book % 10 == 0 else 0) * 104729
+        return "£{price:.2f}".format(price=10 + (seed % 5000) / 100)
+
+    def book_stock(self, book: int):
+        return (book + (self.revision if book % 10 == 0 else 0)) % 23
+
+    def page(self, title: str, body: str):
+        return (
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            "<title>{title}</title></head>\n<body><ul class=\"nav\">{padding}</ul>\n"
+            "{body}\n</body></html>\n"
+        ).format(title=title, padding=self.padding, body=body)
+
+    def homepage(self):
+        categories = "".join(
+            '<li><a href="{url}">\n    Category {cat}\n</a></li>\n'.format(
+                url=self.category_url(category), cat=category
+            )
+            for category in range(self.number_of_categories)
+        )
+        body = (
+            '<div class="side_categories"><ul><li>'
+            '<a href="catalogue/category/books_1/index.html">Books</a>'
+            "<ul>\n{categories}</ul></li></ul></div>"
+        ).format(categories=categories)
+
+        return self.page(title="All products", body=body)
+
+    def category_page(self, category: int, page: int):
+        """Generates a category listing page.
+
+        Args:
+            category (int): Category number.
+            page (int): Page number, 0 being the index.
+
+        Returns:
+            str: Page markup, None if page does not exist.
+        """
+
+        size = self.category_size(category)
+        first = (max(page, 1) - 1) * BOOKS_PER_PAGE
+
+        if category >= self.number_of_categories or 0 < first >= size:
+            return None
+
+        books = self.category_books(category)[first : first + BOOKS_PER_PAGE]
+
+        pods = "".join(
+            (
+                '<li><article class="product_pod">'
+                '<div class="image_container"><a href="../../../{slug}/index.html">'
+                '<img src="../../../../media/cache/{book}.jpg" alt="{title}" '
+                'class="thumbnail"></a></div>'
+                '<p class="star-rating {rating}"></p>'
+                '<h3><a href="../../../{slug}/index.html" title="{title}">{title}</a></h3>'
+                '<div class="product_price"><p class="price_color">{price}</p>'
+                '<p class="instock availability">In stock</p></div>'
+                "</article></li>\n"
+            ).format(
+                slug="book-{book}_{book}".format(book=book),
+                book=book,
+                title=self.book_title(book),
+                rating=RATINGS[book % 6],
+                price=self.book_price(book),
+            )
+            for book in books
+        )
+        body = (
+            '<form method="get" class="form-horizontal">'
+            "<strong>{size}</strong> results - showing <strong>{first}</strong> "
+            "to <strong>{last}</strong>.</form>\n<ol class=\"row\">\n{pods}</ol>"
+        ).format(size=size, first=first + 1, last=first + len(books), pods=pods)
+
+        return self.page(title="Category {cat}".format(cat=category), body=body)
+
+    def book_page(self, book: int):
+        """Generates a book page.
+
+        Args:
+            book (int): Book number.
+
+        Returns:
+            str: Page markup, None if book does not exist.
+        """
+
+        if book >= self.number_of_books:
+            return None
+
+        title = self.book_title(book)
+        price = self.book_price(book)
+        body = (
+            '<div class="product_main"><h1>{title}</h1></div>'
+            '<div class="item active"><img src="../../media/cache/{book}.jpg" '
+            'alt="{title}" /></div>'
+            '<p class="star-rating {rating}"><i class="icon-star"></i></p>'
+            '<div id="product_description" class="sub-header">'
+            "<h2>Product Description</h2></div><p>{description}</p>"
+            '<table class="table table-striped">'
+            "<tr><th>UPC</th><td>{upc:016x}</td></tr>"
+            "<tr><th>Product Type</th><td>Books</td></tr>"
+            "<tr><th>Price (excl. tax)</th><td>{price}</td></tr>"
+            "<tr><th>Price (incl. tax)</th><td>{price}</td></tr>"
+            "<tr><th>Tax</th><td>£0.00</td></tr>"
+            "<tr><th>Availability</th><td>In stock ({stock} available)</td></tr>"
+            "<tr><th>Number of reviews</th><td>0</td></tr></table>"
+        ).format(
+            title=title,
+            book=book,
+            rating=RATINGS[book % 6],
+            description=DESCRIPTION,
+            upc=(book * 2654435761) % 2 ** 64,
+            price=price,
+            stock=self.book_stock(book),
+        )
+
+        return self.page(title=title, body=body)
+
+    def image(self, book: int):
+        if book >= self.number_of_books:
+            return None
+
+        return (book.to_bytes(8, "big") * (self.image_size // 8 + 1))[
+            : self.image_size
+        ]
+
+    def render(self, path: str):
+        """Renders the resource at given path.
+
+        Args:
+            path (str): Request path.
+
+        Returns:
+            tuple: Resource kind, content type and body. Body is None
+            if resource does not exist.
+        """
+
+        if path in ("/", "/index.html"):
+            return "pages", "text/html", self.homepage()
+
+        match = CATEGORY_PATH.match(path)
+        if match:
+            page = int(match.group(4) or 0)
+            return "pages", "text/html", self.category_page(int(match.group(1)), page)
+
+        match = BOOK_PATH.match(path)
+        if match:
+            return "pages", "text/html", self.book_page(int(match.group(1)))
+
+        match = IMAGE_PATH.match(path)
+        if match:
+            return "images", "image/jpeg", self.image(int(match.group(1)))
+
+        return "other", "text/html", None
+
+
+class FaultInjector:
+    """FaultInjector class decides, for each request, which faults
+    are applied.
+
+    Attributes:
+        latency (float): Seconds waited before answering.
+        jitter (float): Maximum random seconds added to latency.
+        error_rate (float): Probability of answering 503.
+        throttle (float): Maximum requests per second before
+        answering 429, 0 to disable.
+        slow_body_rate (float): Probability of sending body slowly.
+        slow_body_delay (float): Seconds waited between two body chunks.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0,
+        jitter: float = 0,
+        error_rate: float = 0,
+        throttle: float = 0,
+        slow_body_rate: float = 0,
+        slow_body_delay: float = 0.01,
+        seed: int = 0,
+    ):
+        """Constructor for FaultInjector class.
+
+        Args:
+            latency (float): Seconds waited before answering.
+            jitter (float): Maximum random seconds added to latency.
+            error_rate (float): Probability of answering 503.
+            throttle (float): Maximum requests per second, 0 to disable.
+            slow_body_rate (float): Probability of sending body slowly.
+            slow_body_delay (float): Seconds waited between two body chunks.
+            seed (int): Random seed, for reproducible fault sequences.
+        """
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle = throttle
+        self.slow_body_rate = slow_body_rate
+        self.slow_body_delay = slow_body_delay
+
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = throttle
+        self.last_refill = time.monotonic()
+
+    def delay(self):
+        with self.lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def should_send_slowly(self):
+        with self.lock:
+            return self.random.random() < self.slow_body_rate
+
+    def is_throttled(self):
+        """Token bucket refilled at throttle rate.
+
+        Returns:
+            bool: Request exceeds allowed rate.
+        """
+
+        if not self.throttle:
+            return False
+
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.throttle, self.tokens + (now - self.last_refill) * self.throttle
+            )
+            self.last_refill = now
+
+            if self.tokens < 1:
+                return True
+
+            self.tokens -= 1
+            return False
+
+
+class SyntheticRequestHandler(BaseHTTPRequestHandler):
+    """Answers requests from the server SyntheticSite, applying faults."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        faults = server.faults
+        path = self.path.split("?")[0]
+
+        time.sleep(faults.delay())
+
+        if faults.is_throttled():
+            server.count("throttled")
+            self.send_empty(429, extra_headers={"Retry-After": "1"})
+            return
+
+        if faults.should_fail():
+            server.count("errors")
+            self.send_empty(503)
+            return
+
+        kind, content_type, body = server.site.render(path)
+
+        if body is None:
+            server.count("not_found")
+            self.send_empty(404)
+            return
+
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+            content_type += "; charset=utf-8"
+
+        etag = '"{digest}"'.format(digest=hashlib.md5(body).hexdigest())
+        if self.headers.get("If-None-Match") == etag:
+            server.count("not_modified")
+            self.send_empty(304, extra_headers={"ETag": etag})
+            return
+
+        server.count(kind)
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+
+        if faults.should_send_slowly():
+            server.count("slow_bodies")
+            for start in range(0, len(body), 1024):
+                self.wfile.write(body[start : start + 1024])
+                self.wfile.flush()
+                time.sleep(faults.slow_body_delay)
+        else:
+            self.wfile.write(body)
+
+    def send_empty(self, code: int, extra_headers: dict = None):
+        self.send_response(code)
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean.
+        pass
+
+
+class SyntheticServer:
+    """SyntheticServer class serves a SyntheticSite from a background
+    thread. Its interface matches ReplicaServer.
+
+    Attributes:
+        site (SyntheticSite): Served website.
+        faults (FaultInjector): Faults applied to requests.
+        port (int): Listening port, 0 for a random one.
+        server (ThreadingHTTPServer): Underlying HTTP server.
+        thread (threading.Thread): Thread running the server loop.
+    """
+
+    def __init__(self, site: SyntheticSite, faults: FaultInjector = None, port: int = 0):
+        """Constructor for SyntheticServer class.
+
+        Args:
+            site (SyntheticSite): Served website.
+            faults (FaultInjector): Faults applied to requests, none if omitted.
+            port (int): Listening port, 0 for a random one.
+        """
+
+        self.site = site
+        self.faults = faults or FaultInjector()
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """Starts serving.
+
+        Returns:
+            str: Base URL of the served website.
+        """
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), SyntheticRequestHandler)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 128
+        self.server.site = self.site
+        self.server.faults = self.faults
+        self.server.counters = {}
+        self.server.counters_lock = threading.Lock()
+        self.reset_counters()
+
+        def count(kind):
+            with self.server.counters_lock:
+                self.server.counters[kind] += 1
+
+        self.server.count = count
+
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self.base_url
+
+    def stop(self):
+        """Stops the server and its thread."""
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return "http://{host}:{port}/".format(host=host, port=port)
+
+    @property
+    def counters(self):
+        with self.server.counters_lock:
+            return dict(self.server.counters)
+
+    def reset_counters(self):
+        """Sets all request counters back to zero."""
+
+        with self.server.counters_lock:
+            self.server.counters = {
+                kind: 0
+                for kind in (
+                    "pages",
+                    "images",
+                    "other",
+                    "not_found",
+                    "errors",
+                    "not_modified",
+                    "throttled",
+                    "slow_bodies",
+                )
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.synthetic_site")
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--image-size", type=int, default=4096)
+    parser.add_argument("--padding", type=int, default=8192)
+    parser.add_argument("--revision", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--throttle", type=float, default=0)
+    parser.add_argument("--slow-body-rate", type=float, default=0)
+    parser.add_argument("--slow-body-delay", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    site = SyntheticSite(
+        number_of_books=arguments.books,
+        number_of_categories=arguments.categories,
+        skew=arguments.skew,
+        image_size=arguments.image_size,
+        padding=arguments.padding,
+        revision=arguments.revision,
+    )
+    faults = FaultInjector(
+        latency=arguments.latency,
+        jitter=arguments.jitter,
+        error_rate=arguments.error_rate,
+        throttle=arguments.throttle,
+        slow_body_rate=arguments.slow_body_rate,
+        slow_body_delay=arguments.slow_body_delay,
+        seed=arguments.seed,
+    )
+    server = SyntheticServer(site=site, faults=faults, port=arguments.port)
+
+    print("Serving {books} book(s) at {url}".format(books=arguments.books, url=server.start()))
+
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+        print(server.counters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmarks the cost of span tracing per scraped book, disabled and enabled.
+
+Usage:
+    python -m benchmarks.tracing [--books 100000] [--repeat 5]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+from oc_web_scraper.tracing import NullTracer, Tracer
+
+
+def traced_books(tracer, number_of_books: int):
+    """Opens the spans of scraping a book, without doing any work: book,
+    then fetch with response attributes, then parse.
+
+    Args:
+        tracer (Tracer or NullTracer): Tracer under test.
+        number_of_books (int): Number of books.
+    """
+
+    for number in range(number_of_books):
+        url = "http://127.0.0.1:8000/catalogue/book_{num}/index.html".format(
+            num=number
+        )
+
+        with tracer.span("book", url=url, title="Book"):
+            with tracer.span("fetch", url=url) as span:
+                span.set(shared=False, status=200, bytes=5000, retries=0)
+            with tracer.span("parse", url=url):
+                pass
+
+
+def per_book(tracer, number_of_books: int, repeat: int):
+    """Times traced_books and keeps the best run.
+
+    Returns:
+        float: Best seconds per book.
+    """
+
+    best = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        traced_books(tracer, number_of_books)
+        best = min(best, time.perf_counter() - start)
+
+    return best / number_of_books
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmarks.tracing")
+    parser.add_argument("--books", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    arguments = parser.parse_args()
+
+    results = {"books": arguments.books}
+
+    results["disabled"] = per_book(NullTracer(), arguments.books, arguments.repeat)
+
+    with tempfile.TemporaryDirectory() as trace_path:
+        tracer = Tracer(path=trace_path)
+        results["enabled"] = per_book(tracer, arguments.books, arguments.repeat)
+        tracer.close()
+        results["trace_bytes_per_book"] = (
+            tracer.trace_file.stat().st_size / (arguments.books * arguments.repeat)
+        )
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,24 @@
-import requests
+def main():
+    # Command line interface imports scraping dependencies lazily.
+    from oc_web_scraper.cli import main as cli_main
 
-from bs4 import BeautifulSoup
+    cli_main()
 
-from oc_web_scraper.handler import Handler
 
+def __getattr__(name: str):
+    # Keep 'from oc_web_scraper import Handler' working without
+    # importing requests and bs4 on package import.
+    if name == "Handler":
+        from oc_web_scraper.handler import Handler
 
-def main():
-    Handler("https://books.toscrape.com/")
\ No newline at end of file
+        return Handler
+
+    # Streaming API, see oc_web_scraper.api.
+    if name in ("iter_books", "aiter_books"):
+        from oc_web_scraper import api
+
+        return getattr(api, name)
+
+    raise AttributeError(
+        "module 'oc_web_scraper' has no attribute '{name}'".format(name=name)
+    )
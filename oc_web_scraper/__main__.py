@@ -1,3 +1,3 @@
 import oc_web_scraper
 
-oc_web_scraper.main()
\ No newline at end of file
+oc_web_scraper.main()
@@ -0,0 +1,346 @@
+"""Programmatic API streaming books as they are scraped.
+
+    from oc_web_scraper import iter_books
+
+    for book in iter_books(categories=["Poetry"], config={"scrape_workers": 8}):
+        ingest(book)
+
+Nothing is saved, and scraped books are not kept: memory use does not
+grow with the catalogue. The crawl runs in a background thread feeding a
+bounded queue, so a slow consumer pauses scraping, and leaving the loop
+(or closing the generator) cancels the crawl.
+"""
+
+import asyncio
+import queue
+import threading
+
+from oc_web_scraper.book import SCRAPED_FIELDS
+from oc_web_scraper.budget import Budget, MemoryBudget
+from oc_web_scraper.config import load_config
+from oc_web_scraper.handler import Handler
+from oc_web_scraper.library import Library
+from oc_web_scraper.seen import SeenUrls
+
+DEFAULT_WEBSITE_URL = "https://books.toscrape.com/"
+
+# Embedded use does not print progress nor leave log, parse memo, trace
+# or history files behind, unless config asks for it.
+API_CONFIG = {
+    "enable_logging": False,
+    "log_to_file": False,
+    "parse_memo": False,
+    "trace": False,
+    "history": False,
+}
+
+# Marks the end of the stream in the feed queue.
+END = object()
+
+
+def book_record(book_object):
+    """Returns the values of a scraped book.
+
+    Args:
+        book_object (Book): Scraped book.
+
+    Returns:
+        dict: Book values keyed by Book attribute name.
+    """
+
+    record = {
+        "title": book_object.title,
+        "url": book_object.url,
+        "category": book_object.category,
+    }
+    for field in SCRAPED_FIELDS:
+        record[field] = getattr(book_object, field)
+
+    return record
+
+
+def api_config(config: dict = None, categories: list = None, fields: list = None):
+    """Builds app config of a stream: package config.yml values, then API
+    defaults, then given values.
+
+    Args:
+        config (dict): Config values overriding config.yml ones.
+        categories (list): Names or patterns of categories to scrap, all
+        if None.
+        fields (list): Book fields to scrap, all if None.
+
+    Returns:
+        dict: App config.
+    """
+
+    full_config = load_config()
+    full_config.update(API_CONFIG)
+    full_config.update(config or {})
+
+    if categories is not None:
+        full_config["categories"] = list(categories)
+    if fields is not None:
+        full_config["fields"] = list(fields)
+
+    return full_config
+
+
+class BookStream(Handler):
+    """BookStream class scraps the website like Handler, but hands each
+    book to a callback as soon as it is scraped instead of saving the
+    library. Signal handlers are left untouched, so that it can run in
+    any thread.
+
+    Attributes:
+        on_book (callable): Called with each scraped Book.
+    """
+
+    def __init__(self, website_url: str, config: dict, on_book):
+        """Constructor for BookStream class. Nothing runs until run is called.
+
+        Args:
+            website_url (str): Website root url.
+            config (dict): App config.
+            on_book (callable): Called with each scraped Book, from
+            scraping workers.
+        """
+
+        self.on_book = on_book
+
+        self.setup(website_url=website_url, config=config)
+
+        self.budget = Budget(
+            max_seconds=self.config.get("budget_seconds"),
+            max_requests=self.config.get("budget_requests"),
+            max_bytes=self.config.get("budget_bytes"),
+        )
+        self.fetcher.budget = self.budget
+        self.fetcher.memory = MemoryBudget(max_bytes=self.config.get("memory_budget"))
+
+    def create_saver(self):
+        # Books are streamed, nothing is saved.
+        return None
+
+    def run(self):
+        """Scraps the website, handing books to on_book."""
+
+        if self.fetcher.mirrors is not None:
+            self.fetcher.check_mirrors()
+
+        self.library = Library(
+            logger=self.logger,
+            fetcher=self.fetcher,
+            seen=SeenUrls(
+                exact_limit=self.config.get("seen_exact_limit", 1000000),
+                bloom_capacity=self.config.get("seen_bloom_capacity", 10000000),
+                error_rate=self.config.get("seen_error_rate", 0.001),
+            ),
+            on_book=self.on_book,
+            fields=self.fields,
+        )
+
+        with self.fetcher.tracer.span("run", url=self.website_url):
+            self.scrap_homepage()
+
+        if self.fetcher.memo is not None:
+            self.fetcher.memo.flush()
+
+    def cancel(self):
+        """Stops starting new work. Work in flight finishes."""
+
+        self.budget.stop("cancelled")
+
+
+class BookFeed:
+    """BookFeed class runs a BookStream in a background thread and hands
+    book records over through a bounded queue.
+
+    Attributes:
+        records (queue.Queue): Pending book records, END last.
+        cancelled (threading.Event): Set once consumer is gone.
+        error (BaseException): Error which ended the crawl, if any.
+        stream (BookStream): Scraping process.
+        thread (threading.Thread): Thread running the stream.
+    """
+
+    # Seconds between checks of cancellation while waiting on the queue.
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, website_url: str, config: dict, buffer: int):
+        """Constructor for BookFeed class.
+
+        Args:
+            website_url (str): Website root url.
+            config (dict): App config.
+            buffer (int): Maximum number of scraped books waiting for the
+            consumer. Scraping workers wait once it is reached.
+        """
+
+        self.records = queue.Queue(maxsize=buffer)
+        self.cancelled = threading.Event()
+        self.error = None
+
+        self.stream = BookStream(
+            website_url=website_url,
+            config=config,
+            on_book=lambda book_object: self.offer(book_record(book_object)),
+        )
+        self.thread = threading.Thread(
+            target=self.produce, name="oc-web-scraper-feed", daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+
+    def offer(self, item):
+        """Queues an item, waiting for room unless feed is cancelled, in
+        which case the item is dropped."""
+
+        while not self.cancelled.is_set():
+            try:
+                self.records.put(item, timeout=self.POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def produce(self):
+        try:
+            self.stream.run()
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.offer(END)
+
+    def get(self):
+        """Waits for next book record.
+
+        Raises:
+            BaseException: Error which ended the crawl.
+
+        Returns:
+            dict: Book record, END once the crawl is over or cancelled.
+        """
+
+        while True:
+            try:
+                item = self.records.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                if self.cancelled.is_set():
+                    return END
+                continue
+
+            if item is END and self.error is not None:
+                raise self.error
+
+            return item
+
+    def cancel(self):
+        self.cancelled.set()
+        self.stream.cancel()
+
+    def close(self):
+        """Cancels the crawl if still running, waits for work in flight
+        and releases fetcher resources."""
+
+        self.cancel()
+        self.thread.join()
+        self.stream.close()
+
+
+def iter_books(
+    url: str = DEFAULT_WEBSITE_URL,
+    categories: list = None,
+    config: dict = None,
+    buffer: int = 64,
+    fields: list = None,
+):
+    """Yields books as soon as they are scraped, in no particular order.
+
+    Args:
+        url (str): Website root url.
+        categories (list): Names or patterns of categories to scrap, all
+        if None. Others are never fetched.
+        config (dict): Values overriding config.yml ones, e.g. budgets,
+        scrape_workers or parse_memo.
+        buffer (int): Maximum number of scraped books waiting to be
+        consumed before scraping pauses.
+        fields (list): Book fields to scrap, all if None. Others are None.
+
+    Raises:
+        Exception: Error which ended the crawl, after books yielded so far.
+
+    Yields:
+        dict: Book values keyed by Book attribute name.
+    """
+
+    feed = BookFeed(
+        website_url=url,
+        config=api_config(config=config, categories=categories, fields=fields),
+        buffer=buffer,
+    )
+    feed.start()
+
+    try:
+        while True:
+            record = feed.get()
+
+            if record is END:
+                return
+
+            yield record
+    finally:
+        feed.close()
+
+
+async def aiter_books(
+    url: str = DEFAULT_WEBSITE_URL,
+    categories: list = None,
+    config: dict = None,
+    buffer: int = 64,
+    fields: list = None,
+):
+    """Asynchronous variant of iter_books. Scraping runs in a thread, so
+    the event loop is never blocked. Consume it within
+    contextlib.aclosing so that the crawl is cancelled as soon as the
+    consuming task stops or is cancelled, rather than when the event
+    loop finalizes the generator.
+
+    Args:
+        url (str): Website root url.
+        categories (list): Names or patterns of categories to scrap, all
+        if None. Others are never fetched.
+        config (dict): Values overriding config.yml ones.
+        buffer (int): Maximum number of scraped books waiting to be
+        consumed before scraping pauses.
+        fields (list): Book fields to scrap, all if None. Others are None.
+
+    Raises:
+        Exception: Error which ended the crawl, after books yielded so far.
+
+    Yields:
+        dict: Book values keyed by Book attribute name.
+    """
+
+    loop = asyncio.get_running_loop()
+
+    feed = await loop.run_in_executor(
+        None,
+        lambda: BookFeed(
+            website_url=url,
+            config=api_config(config=config, categories=categories, fields=fields),
+            buffer=buffer,
+        ),
+    )
+    feed.start()
+
+    try:
+        while True:
+            record = await loop.run_in_executor(None, feed.get)
+
+            if record is END:
+                return
+
+            yield record
+    finally:
+        feed.cancel()
+        await loop.run_in_executor(None, feed.close)
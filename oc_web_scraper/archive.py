@@ -0,0 +1,145 @@
+import gzip
+import json
+import threading
+
+from pathlib import Path
+
+from oc_web_scraper import errors as _CUSTOM_ERRORS
+
+
+class ArchivedResponse:
+    """ArchivedResponse class mimics the parts of requests.Response
+    used by the scraper, for responses replayed from an archive.
+
+    Attributes:
+        url (str): Requested URL.
+        status_code (int): Recorded status code.
+        headers (dict): Recorded response headers.
+        content (bytes): Recorded response body.
+    """
+
+    def __init__(self, url: str, status_code: int, headers: dict, content: bytes):
+        """Constructor for ArchivedResponse class.
+
+        Args:
+            url (str): Requested URL.
+            status_code (int): Recorded status code.
+            headers (dict): Recorded response headers.
+            content (bytes): Recorded response body.
+        """
+
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+
+class Archive:
+    """Archive class stores raw responses in a compressed, append-only file.
+    Each record is an independent gzip member holding a JSON header line
+    followed by the body, so the archive can also be read sequentially.
+    An index file maps every URL to the offset and length of its last record.
+
+    Attributes:
+        archive_file (Path): Records file.
+        index_file (Path): Index file, one JSON line per record.
+        index (dict): Format is "url": (offset, length).
+    """
+
+    def __init__(self, path: str):
+        """Constructor for Archive class.
+
+        Args:
+            path (str): Directory holding archive and index files.
+        """
+
+        self.archive_file = Path(path).joinpath("web_scraper_archive.gz")
+        self.index_file = Path(path).joinpath("web_scraper_archive.idx")
+        self.index = {}
+        self.lock = threading.Lock()
+
+        self._archive = None
+        self._index = None
+
+        self.load_index()
+
+    def load_index(self):
+        """Loads index file, later records overriding earlier ones."""
+
+        if not self.index_file.exists():
+            return
+
+        with open(self.index_file) as index_file:
+            for line in index_file:
+                entry = json.loads(line)
+                self.index[entry["url"]] = (entry["offset"], entry["length"])
+
+    def write(self, url: str, status_code: int, headers: dict, content: bytes):
+        """Appends a response record to the archive.
+
+        Args:
+            url (str): Requested URL.
+            status_code (int): Response status code.
+            headers (dict): Response headers.
+            content (bytes): Response body.
+        """
+
+        header = json.dumps(
+            {"url": url, "status": status_code, "headers": dict(headers)}
+        ).encode("utf-8")
+        record = gzip.compress(header + b"\n" + content)
+
+        with self.lock:
+            if self._archive is None:
+                self._archive = open(self.archive_file, "ab")
+                self._index = open(self.index_file, "a")
+
+            offset = self._archive.tell()
+            self._archive.write(record)
+            self._index.write(
+                json.dumps({"url": url, "offset": offset, "length": len(record)})
+                + "\n"
+            )
+            self.index[url] = (offset, len(record))
+
+    def read(self, url: str):
+        """Reads last recorded response for given URL.
+
+        Args:
+            url (str): Requested URL.
+
+        Raises:
+            _CUSTOM_ERRORS.NotFoundInArchive: If URL was never recorded.
+
+        Returns:
+            ArchivedResponse: Recorded response.
+        """
+
+        if url not in self.index:
+            raise _CUSTOM_ERRORS.NotFoundInArchive(url=url)
+
+        offset, length = self.index[url]
+
+        with open(self.archive_file, "rb") as archive_file:
+            archive_file.seek(offset)
+            record = gzip.decompress(archive_file.read(length))
+
+        header, content = record.split(b"\n", 1)
+        header = json.loads(header)
+
+        return ArchivedResponse(
+            url=url,
+            status_code=header["status"],
+            headers=header["headers"],
+            content=content,
+        )
+
+    def close(self):
+        """Flushes and closes archive files opened for writing."""
+
+        with self.lock:
+            if self._archive is not None:
+                self._archive.close()
+                self._index.close()
+                self._archive = None
+                self._index = None
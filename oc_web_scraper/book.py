@@ -1,10 +1,87 @@
 import re
-import requests
+import time
+
+from functools import lru_cache
+from urllib.parse import urljoin
 
 from bs4 import BeautifulSoup, element
 
 from oc_web_scraper import errors as _CUSTOM_ERRORS
 from oc_web_scraper.logger import Logger
+from oc_web_scraper.fetcher import Fetcher
+
+# Bump when extraction logic changes, so that parse memo entries of
+# previous versions are no longer used.
+EXTRACTOR_VERSION = 1
+
+# Attributes set during infos scraping, stored in parse memo.
+SCRAPED_FIELDS = (
+    "product_description",
+    "upc",
+    "price_including_tax",
+    "price_excluding_tax",
+    "number_available",
+    "review_rating",
+    "image_url",
+)
+
+# Method setting each scraped field from book page, in extraction order.
+# Product information fields are parsed from a single table.
+EXTRACTORS = {
+    "image_url": "set_image_url",
+    "review_rating": "set_rating",
+    "product_description": "set_product_description",
+    "upc": "set_product_info",
+    "price_including_tax": "set_product_info",
+    "price_excluding_tax": "set_product_info",
+    "number_available": "set_product_info",
+}
+
+# Fields a category page also shows for each book. Book pages are not
+# fetched when only these are selected.
+LISTING_FIELDS = ("review_rating", "price_including_tax")
+
+
+def parse_fields(fields: list = None):
+    """Validates a selection of scraped fields.
+
+    Args:
+        fields (list): Book attribute names, every scraped field if None.
+
+    Raises:
+        _CUSTOM_ERRORS.CouldNotParseField: If a field is not a scraped one.
+
+    Returns:
+        tuple: Selected fields, in SCRAPED_FIELDS order.
+    """
+
+    if fields is None:
+        return SCRAPED_FIELDS
+
+    for field in fields:
+        if field not in SCRAPED_FIELDS:
+            raise _CUSTOM_ERRORS.CouldNotParseField(field=field)
+
+    return tuple(field for field in SCRAPED_FIELDS if field in fields)
+
+
+@lru_cache(maxsize=None)
+def extractors_for(fields: tuple):
+    """Lists book page extractors needed for a selection of fields.
+
+    Args:
+        fields (tuple): Selected fields.
+
+    Returns:
+        list: Book method names, each once, in extraction order.
+    """
+
+    extractors = []
+    for field, extractor in EXTRACTORS.items():
+        if field in fields and extractor not in extractors:
+            extractors.append(extractor)
+
+    return extractors
 
 
 class Book:
@@ -13,8 +90,7 @@ class Book:
 
     Attributes:
         logger (Logger): Main app logger object. Passed in instantiation arguments.
-        image_relative_path (str): Relative path hard-coded in image URLs.
-        image_absolute_path (str): Absolute equivalent of the relative path.
+        fetcher (Fetcher): Main app fetcher object. Passed in instantiation arguments.
         title (str): Book title. Passed in instantiation arguments.
         url (str): Book page URL. Passed in instantiation arguments.
         category (str): Book category. Passed in instantiation arguments.
@@ -24,9 +100,20 @@ class Book:
         price_excluding_tax (str): Price excluding tax, set during infos scraping.
         number_available (str): Number of books available, set during infos scraping.
         review_rating (str): Review rating, set during infos scraping.
-        image_url (str): Book cover image URL, set during infos scraping."""
-
-    def __init__(self, title: str, url: str, category: str, logger: Logger):
+        image_url (str): Book cover image URL, set during infos scraping.
+        fields (tuple): Scraped fields set, others are left to None."""
+
+    def __init__(
+        self,
+        title: str,
+        url: str,
+        category: str,
+        logger: Logger,
+        fetcher: Fetcher,
+        lazy: bool = False,
+        fields: tuple = SCRAPED_FIELDS,
+        listing: element.Tag = None,
+    ):
         """Constructor for Book class.
 
         Args:
@@ -34,24 +121,21 @@ class Book:
             url (str): Book page URL.
             category (str): Category of the book.
             logger (Logger): Main app logger object.
+            fetcher (Fetcher): Main app fetcher object.
+            lazy (bool): Do not scrap on instantiation, infos are then
+            set by the caller, e.g. when loading a snapshot.
+            fields (tuple): Scraped fields to set, see parse_fields.
+            listing (element.Tag): Book element of the category page, read
+            instead of the book page when it shows every selected field.
         """
 
         self.logger = logger
-
-        # Image URL relative part and its absolute equivalent
-        # are hard coded to ease eventual adaptation for
-        # future website structure modifications.
-        self.image_relative_path = "../../"
-        self.image_absolute_path = "https://books.toscrape.com/"
+        self.fetcher = fetcher
 
         self.title = title
         self.url = url
         self.category = category
-
-        self.logger.write(
-            log_level="info",
-            message="Created book titled {title}.".format(title=self.title),
-        )
+        self.fields = fields
 
         self.product_description = None
         self.upc = None
@@ -61,7 +145,21 @@ class Book:
         self.review_rating = None
         self.image_url = None
 
-        self.scrap_book()
+        if lazy:
+            return
+
+        start = time.perf_counter()
+        with self.fetcher.tracer.span("book", url=self.url, title=self.title):
+            self.scrap_book(listing=listing)
+
+        self.logger.write(
+            log_level="info",
+            message="Created book titled {title}.",
+            title=self.title,
+            url=self.url,
+            stage="book",
+            duration=time.perf_counter() - start,
+        )
 
     def __str__(self):
         stdout_content = " - Title: {title}\n".format(title=self.title)
@@ -86,31 +184,185 @@ class Book:
 
         return stdout_content
 
-    def scrap_book(self):
+    def scrap_book(self, listing: element.Tag = None):
         """Scraping process for book pages.
         Relevant infos are picked using bs4 and stored in class
-        attributes.
+        attributes, only running extractors of selected fields. When
+        fetcher has a parse memo, infos of a page already parsed with
+        identical content are reused instead.
+
+        Args:
+            listing (element.Tag): Book element of the category page. The
+            book page is not fetched if it shows every selected field.
+        """
+
+        if listing is not None and set(self.fields) <= set(LISTING_FIELDS):
+            self.scrap_listing(listing=listing)
+            return
+
+        raw_response, held = self.fetch_page()
+        soup = None
+
+        try:
+            with self.fetcher.tracer.span("parse", url=self.url) as span:
+                memo_key, hit = self.recall(raw_response=raw_response)
+                if memo_key is not None:
+                    span.set(memo="hit" if hit else "miss")
+                if hit:
+                    return
+
+                soup = self.create_soup(raw_response=raw_response)
+                # Body is not needed once parsed.
+                raw_response = None
+                self.extract(soup=soup, memo_key=memo_key)
+        finally:
+            self.release_page(held=held, soup=soup)
+
+    def fetch_page(self):
+        """Gets book page once fetcher memory budget admits it.
+
+        Returns:
+            tuple: Book page response, and memory charged for it, to
+            release with release_page.
+        """
+
+        memory = self.fetcher.memory
+        memory.admit()
+
+        try:
+            raw_response = self.get_page()
+        except Exception:
+            memory.release(0, admitted=True)
+            raise
+
+        return raw_response, memory.charge(memory.estimate(len(raw_response.content)))
+
+    def release_page(self, held: int, soup: BeautifulSoup = None):
+        """Decomposes parsed book page, so that its tree is freed right
+        away instead of by garbage collection, and releases its memory.
+
+        Args:
+            held (int): Memory charged by fetch_page.
+            soup (BeautifulSoup): Parsed book page, if parsed.
+        """
+
+        if soup is not None:
+            soup.decompose()
+
+        self.fetcher.memory.release(held, admitted=True)
+
+    def recall(self, raw_response):
+        """Sets selected fields from parse memo, if fetcher has one and
+        a page with identical content was already parsed.
+
+        Args:
+            raw_response (requests.Response): Book page response.
+
+        Returns:
+            tuple: Memo key (None without parse memo), and whether fields
+            were set from memo.
+        """
+
+        memo = self.fetcher.memo
+        if memo is None:
+            return None, False
+
+        key = memo.key(
+            version=EXTRACTOR_VERSION,
+            url=self.url,
+            title=self.title,
+            content=raw_response.content,
+        )
+        fields = memo.get(key)
+
+        if fields is None:
+            return key, False
+
+        for field in self.fields:
+            setattr(self, field, fields[field])
+
+        return key, True
+
+    def extract(self, soup: BeautifulSoup, memo_key: str = None):
+        """Runs extractors of selected fields on a parsed book page.
+
+        Args:
+            soup (BeautifulSoup): BeautifulSoup object of the book page.
+            memo_key (str): Parse memo key of the page, from recall.
+        """
+
+        for extractor in extractors_for(self.fields):
+            getattr(self, extractor)(soup=soup)
+
+        if self.fields != SCRAPED_FIELDS:
+            # Product information table sets fields beyond the selection.
+            for field in SCRAPED_FIELDS:
+                if field not in self.fields:
+                    setattr(self, field, None)
+
+        # Entries are shared by every selection, so they hold every field.
+        elif memo_key is not None:
+            self.fetcher.memo.put(
+                memo_key, {field: getattr(self, field) for field in SCRAPED_FIELDS}
+            )
+
+    def scrap_listing(self, listing: element.Tag):
+        """Sets selected fields from the book element of a category page.
+
+        Args:
+            listing (element.Tag): Book element of the category page.
+
+        Raises:
+            _CUSTOM_ERRORS.CouldNotParseInfo: If the price is not found.
         """
 
-        soup = self.create_soup()
+        if "review_rating" in self.fields:
+            self.set_rating(soup=listing)
+
+        if "price_including_tax" in self.fields:
+            price = listing.find("p", attrs={"class": "price_color"})
+
+            if price is None:
+                self.logger.write(
+                    log_level="error",
+                    message="Could not parse price on category page.",
+                )
+                raise _CUSTOM_ERRORS.CouldNotParseInfo(
+                    title=self.title, info="Price including Tax", url=self.url
+                )
 
-        self.set_image_url(soup=soup)
-        self.set_rating(soup=soup)
-        self.set_product_description(soup=soup)
-        self.set_product_info(soup=soup)
+            self.price_including_tax = price.get_text().strip()
 
-    def create_soup(self):
+    def create_soup(self, raw_response=None):
         """Create a BeautifulSoup object from raw request response.
 
+        Args:
+            raw_response (requests.Response): Book page response, fetched
+            if omitted.
+
+        Returns:
+            BeautifulSoup: Object to work with during further scraping.
+        """
+
+        if raw_response is None:
+            raw_response = self.get_page()
+
+        return BeautifulSoup(
+            self.fetcher.decoder.decode(raw_response, kind="book"), "html.parser"
+        )
+
+    def get_page(self):
+        """Gets book page.
+
         Raises:
             _CUSTOM_ERRORS.CouldNotGetBookPage: If response code is
             different from 200.
 
         Returns:
-            BeautifulSoup: Object to work with during further scraping.
+            requests.Response: Book page response.
         """
 
-        raw_response = requests.get(self.url)
+        raw_response = self.fetcher.get(self.url)
 
         if raw_response.status_code != 200:
             self.logger.write(
@@ -124,9 +376,7 @@ class Book:
             message="Received response for book page with status code 200.",
         )
 
-        soup = BeautifulSoup(raw_response.content, "html.parser")
-
-        return soup
+        return raw_response
 
     def set_image_url(self, soup: BeautifulSoup):
         """Find the book cover image in the page and sets the image_url
@@ -148,12 +398,8 @@ class Book:
             )
             raise _CUSTOM_ERRORS.NoImageFound(self.title, url=self.url)
 
-        image_relative_url = raw_image["src"]
-        image_absolute_url = image_relative_url.replace(
-            self.image_relative_path, self.image_absolute_path
-        )
-
-        self.image_url = image_absolute_url
+        # Image source is relative to the book page URL.
+        self.image_url = urljoin(self.url, raw_image["src"])
 
     def set_rating(self, soup: BeautifulSoup):
         """Finds the review rating element in the page then calls
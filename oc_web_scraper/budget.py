@@ -0,0 +1,253 @@
+import threading
+import time
+
+
+class Budget:
+    """Budget class bounds a run by wall time, number of requests and
+    downloaded bytes, and records work skipped once it is exhausted.
+
+    Limits are checked before starting a unit of work (category, page,
+    book or image): work in flight always finishes, so totals may
+    slightly exceed limits. A budget can also be stopped explicitly,
+    e.g. on SIGINT/SIGTERM.
+
+    Attributes:
+        max_seconds (float): Wall time limit, unlimited if None.
+        max_requests (int): Requests limit, unlimited if None.
+        max_bytes (int): Downloaded bytes limit, unlimited if None.
+        started (float): Monotonic start time.
+        requests (int): Requests performed.
+        bytes (int): Bytes downloaded.
+        reason (str): Why the budget is exhausted, None while it is not.
+        skipped (list): Skipped work, as dicts with a "type" key.
+    """
+
+    def __init__(
+        self, max_seconds: float = None, max_requests: int = None, max_bytes: int = None
+    ):
+        """Constructor for Budget class.
+
+        Args:
+            max_seconds (float): Wall time limit, unlimited if None.
+            max_requests (int): Requests limit, unlimited if None.
+            max_bytes (int): Downloaded bytes limit, unlimited if None.
+        """
+
+        self.max_seconds = max_seconds
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+
+        self.started = time.monotonic()
+        self.requests = 0
+        self.bytes = 0
+        self.reason = None
+        self.skipped = []
+
+        self.lock = threading.Lock()
+
+    def charge(self, size: int):
+        """Accounts for a performed request.
+
+        Args:
+            size (int): Response body size in bytes.
+        """
+
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+
+    def stop(self, reason: str):
+        """Exhausts the budget, so that no new work starts.
+
+        Args:
+            reason (str): Reason reported in manifest.
+        """
+
+        with self.lock:
+            if self.reason is None:
+                self.reason = reason
+
+    def exhausted(self):
+        """Checks limits, to be called before starting a unit of work.
+
+        Returns:
+            bool: No new work should start.
+        """
+
+        if self.reason is not None:
+            return True
+
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            self.stop("max_seconds")
+        elif self.max_requests is not None and self.requests >= self.max_requests:
+            self.stop("max_requests")
+        elif self.max_bytes is not None and self.bytes >= self.max_bytes:
+            self.stop("max_bytes")
+
+        return self.reason is not None
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def skip(self, work_type: str, **details):
+        """Records a unit of work skipped because budget is exhausted.
+
+        Args:
+            work_type (str): "category", "page", "book" or "image".
+            **details: Identifying fields, e.g. url.
+        """
+
+        with self.lock:
+            self.skipped.append(dict(type=work_type, **details))
+
+    def usage(self):
+        """Returns consumption and limits, for reports.
+
+        Returns:
+            dict: Elapsed seconds, requests and bytes with their limits.
+        """
+
+        return {
+            "seconds": round(self.elapsed(), 3),
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "max_seconds": self.max_seconds,
+            "max_requests": self.max_requests,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class MemoryBudget:
+    """MemoryBudget class bounds the memory held by pages being scraped,
+    by pausing admission of new book page fetches while tracked memory
+    is near its limit.
+
+    Tracked memory is an estimate: each page is charged its body size
+    times PARSED_PAGE_FACTOR, for the body, its decoded text and its
+    parsed tree, from fetch until its tree is decomposed. Admission only
+    waits while admitted pages are held, since their release is what
+    frees memory, so that pages held otherwise, e.g. first category
+    pages kept between planning and scraping, never block a run.
+
+    Attributes:
+        max_bytes (int): Tracked memory limit, unlimited if None.
+        high_water (float): Share of limit above which admission pauses.
+        used (int): Tracked bytes.
+        peak (int): Highest tracked bytes.
+        admitted (int): Admitted pages not yet released.
+        waits (int): Number of admissions which had to wait.
+        waited (float): Seconds spent waiting for admission.
+        stopped (bool): Admission no longer waits, e.g. after a failure.
+    """
+
+    # Tracemalloc measure of a body, its decoded text and its html.parser
+    # tree, relative to body size, on website book and category pages.
+    PARSED_PAGE_FACTOR = 40
+
+    def __init__(self, max_bytes: int = None, high_water: float = 0.9):
+        """Constructor for MemoryBudget class.
+
+        Args:
+            max_bytes (int): Tracked memory limit, unlimited if None.
+            high_water (float): Share of limit above which admission pauses.
+        """
+
+        self.max_bytes = max_bytes
+        self.high_water = high_water
+
+        self.used = 0
+        self.peak = 0
+        self.admitted = 0
+        self.waits = 0
+        self.waited = 0.0
+        self.stopped = False
+
+        self.condition = threading.Condition()
+
+    def estimate(self, size: int):
+        """Returns tracked memory of a page until its tree is decomposed.
+
+        Args:
+            size (int): Page body size in bytes.
+
+        Returns:
+            int: Bytes to charge.
+        """
+
+        return size * self.PARSED_PAGE_FACTOR
+
+    def admit(self):
+        """Waits until a new page fetch fits in the budget, then counts
+        it as admitted. Must be followed by release(admitted=True)."""
+
+        with self.condition:
+            if self.max_bytes is not None:
+                start = None
+                while (
+                    not self.stopped
+                    and self.admitted
+                    and self.used >= self.max_bytes * self.high_water
+                ):
+                    if start is None:
+                        start = time.monotonic()
+                        self.waits += 1
+                    self.condition.wait()
+
+                if start is not None:
+                    self.waited += time.monotonic() - start
+
+            self.admitted += 1
+
+    def charge(self, size: int):
+        """Tracks memory held by a page.
+
+        Args:
+            size (int): Bytes, see estimate.
+
+        Returns:
+            int: Charged bytes, to release.
+        """
+
+        with self.condition:
+            self.used += size
+            self.peak = max(self.peak, self.used)
+
+        return size
+
+    def release(self, size: int, admitted: bool = False):
+        """Stops tracking memory held by a page, e.g. once its tree is
+        decomposed.
+
+        Args:
+            size (int): Charged bytes.
+            admitted (bool): Page was admitted through admit.
+        """
+
+        with self.condition:
+            self.used -= size
+            if admitted:
+                self.admitted -= 1
+            self.condition.notify_all()
+
+    def stop(self):
+        """Lets every admission through, e.g. once pages still held will
+        never be released."""
+
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def stats(self):
+        """Returns tracked memory counts, for reports.
+
+        Returns:
+            dict: Limit, peak tracked bytes, waits and waited seconds.
+        """
+
+        with self.condition:
+            return {
+                "max_bytes": self.max_bytes,
+                "peak": self.peak,
+                "waits": self.waits,
+                "waited": round(self.waited, 3),
+            }
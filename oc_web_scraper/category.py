@@ -1,11 +1,15 @@
 import re
-import requests
+import time
 
-from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, element
 
 from oc_web_scraper import errors as _CUSTOM_ERRORS
 from oc_web_scraper.logger import Logger
-from oc_web_scraper.book import Book
+from oc_web_scraper.fetcher import Fetcher
+from oc_web_scraper.book import SCRAPED_FIELDS, Book
+from oc_web_scraper.seen import SeenUrls, canonical_url
 
 
 class Category:
@@ -15,58 +19,228 @@ class Category:
 
     Attributes:
         logger (Logger): Main app logger object. Passed in instantiation arguments.
+        fetcher (Fetcher): Main app fetcher object. Passed in instantiation arguments.
         number_of_books_per_page (int): Number of books per page displayed
         by the website.
-        book_relative_path (str): Relative path hard-coded in book pages URLs.
-        book_absolute_path (str): Absolute equivalent of the relative path.
         name (str): Category name. Passed in instantiation arguments.
         url (str): Category page URL. Passed in instantiation arguments.
+        seen (SeenUrls): Crawl-wide set of scheduled book URLs. Passed in
+        instantiation arguments.
+        on_book (callable): Called with each scrapped Book instead of
+        keeping it in books, None to keep books. Passed in instantiation
+        arguments.
+        fields (tuple): Book fields to scrap, see book.parse_fields. Passed
+        in instantiation arguments.
         books (dict): Books scrapped in the category page(s).
-        Format is "book_title": Book object.
+        Format is "book_url": Book object.
+        number_of_books_handed (int): Number of books passed to on_book.
         number_of_books (int): Number of books associated with the category.
         Provided by a string in page source.
+        first_page (BeautifulSoup): First category page, fetched during
+        planning and released once scrapped.
+        first_page_held (int): Fetcher memory budget charged for first
+        page, released once it is decomposed.
+        complete (bool): Every page was scrapped, False if run budget
+        ran out before.
+        pipeline (CrawlPipeline): Scraps books created by the category in
+        stages, None to scrap each one on creation. Set by Handler.
+        queued (int): Books handed to pipeline and not done yet.
+        listed (bool): Every page was listed, in pipeline mode the
+        category is then done once no book is queued.
+        started (float): Scraping start time, for duration.
+        span (Span): Category span, ended by finish.
+        foreign (set): Canonical URLs of books also listed by a category
+        before this one on home page, which owns them. Set by Handler.
     """
 
-    def __init__(self, name: str, url: str, logger: Logger):
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        logger: Logger,
+        fetcher: Fetcher,
+        seen: SeenUrls = None,
+        lazy: bool = False,
+        on_book=None,
+        fields: tuple = SCRAPED_FIELDS,
+    ):
         """Constructor for Category class.
 
         Args:
             name (str): Category name.
             url (str): Category page URL.
             logger (Logger): Main app logger object.
+            fetcher (Fetcher): Main app fetcher object.
+            seen (SeenUrls): Crawl-wide set of scheduled book URLs. A set
+            local to the category is used if omitted.
+            lazy (bool): Do not scrap on instantiation, plan and scrap
+            methods are then called by the scheduler.
+            on_book (callable): Called with each scrapped Book instead of
+            keeping it, so that books can be streamed.
+            fields (tuple): Book fields to scrap, every one by default.
         """
 
         self.logger = logger
-
-        # Number of books per page displayed by the website and book
-        # pages URL relative part and its absolute equivalent
-        # are hard coded to ease eventual adaptation for
-        # future website structure modifications.
+        self.fetcher = fetcher
+        self.seen = seen if seen is not None else SeenUrls()
+        self.on_book = on_book
+        self.fields = fields
+
+        # Number of books per page displayed by the website is hard coded
+        # to ease eventual adaptation for future website structure
+        # modifications.
         self.number_of_books_per_page = 20
-        self.book_relative_path = "../../../"
-        self.book_absolute_path = "https://books.toscrape.com/catalogue/"
 
         self.name = name
         self.url = url
 
         self.books = {}
+        self.number_of_books_handed = 0
         self.number_of_books = 0
+        self.first_page = None
+        self.first_page_held = 0
+        self.complete = False
+        self.pipeline = None
+        self.queued = 0
+        self.listed = False
+        self.started = None
+        self.span = None
+        self.foreign = set()
+
+        if not lazy:
+            self.scrap()
+
+    def plan(self):
+        """Fetches first category page to learn the number of books,
+        keeping the page for scraping."""
+
+        if self.fetcher.budget.exhausted():
+            return
+
+        with self.fetcher.tracer.span(
+            "listing", url=self.url, category=self.name, page=1
+        ):
+            self.first_page = self.create_soup()
+            self.find_number_of_books_to_scrap(soup=self.first_page)
+
+    def list_urls(self):
+        """Lists book URLs of every category page, without scraping
+        books, so that books listed by several categories can be given to
+        one of them before scraping. First page is kept for scraping.
+
+        Returns:
+            list: Absolute book URLs, in website order.
+        """
+
+        if self.first_page is None:
+            return []
+
+        urls = self.page_urls(page_url=self.url, soup=self.first_page)
+        memory = self.fetcher.memory
+
+        for page_url in self.page_urls_to_scrap():
+            if self.fetcher.budget.exhausted():
+                break
+
+            with self.fetcher.tracer.span("listing", url=page_url, category=self.name):
+                raw_response = self.fetcher.get(page_url)
+                held = memory.charge(memory.estimate(len(raw_response.content)))
+                soup = BeautifulSoup(
+                    self.fetcher.decoder.decode(raw_response, kind="category"),
+                    "html.parser",
+                )
+                raw_response = None
+
+            try:
+                urls.extend(self.page_urls(page_url=page_url, soup=soup))
+            finally:
+                soup.decompose()
+                memory.release(held)
+
+        return urls
+
+    def page_urls(self, page_url: str, soup: BeautifulSoup):
+        """Finds absolute book URLs of a category page.
+
+        Args:
+            page_url (str): Page URL, to resolve book links.
+            soup (BeautifulSoup): Parsed category page.
+
+        Returns:
+            list: Absolute book URLs.
+        """
+
+        return [
+            urljoin(page_url, book.find("a")["href"]) for book in soup.find_all("h3")
+        ]
+
+    def page_urls_to_scrap(self):
+        """Builds URLs of category pages following the first one.
+
+        Returns:
+            list: Page URLs, empty if every book fits in the first page.
+        """
+
+        number_of_pages = -(-self.number_of_books // self.number_of_books_per_page)
+
+        return [
+            self.url.replace("index", "page-{num}".format(num=page_number))
+            for page_number in range(2, number_of_pages + 1)
+        ]
+
+    def scrap(self):
+        """Scraps every book of the category, timing the process.
+        Nothing is scrapped if run budget is exhausted."""
+
+        if self.fetcher.budget.exhausted():
+            self.fetcher.budget.skip("category", name=self.name, url=self.url)
+            return
 
         self.logger.write(
             log_level="info",
-            message="Created category named '{name}'. Starting scraping process...".format(
-                name=self.name
-            ),
+            message="Created category named '{name}'. Starting scraping process...",
+            name=self.name,
+            url=self.url,
+            stage="category",
         )
 
-        self.scrap_category()
+        tracer = self.fetcher.tracer
+        self.started = time.perf_counter()
+        self.span = tracer.span("category", url=self.url, category=self.name).begin()
+
+        try:
+            with tracer.activate(self.span):
+                self.scrap_category()
+        except Exception as error:
+            self.span.set(error=type(error).__name__)
+            self.span.end()
+            raise
+
+        if self.pipeline is not None:
+            # Books are still in pipeline stages, the last one done
+            # finishes the category.
+            self.pipeline.listed(self)
+            return
+
+        self.finish()
+
+    def finish(self):
+        """Ends category span and logs the number of scrapped books, once
+        every book is scrapped or skipped."""
+
+        number_of_books = len(self.books) + self.number_of_books_handed
+
+        self.span.set(books=number_of_books, complete=self.complete)
+        self.span.end()
 
         self.logger.write(
             log_level="info",
-            message="{scrapped_num}/{website_num} book(s) scrapped for category.".format(
-                scrapped_num=len(self.books),
-                website_num=self.number_of_books,
-            ),
+            message="{scrapped_num}/{website_num} book(s) scrapped for category.",
+            scrapped_num=number_of_books,
+            website_num=self.number_of_books,
+            url=self.url,
+            stage="category",
+            duration=time.perf_counter() - self.started,
         )
 
     def __str__(self):
@@ -81,16 +255,49 @@ class Category:
 
         return stdout_content
 
-    def create_book(self, title: str, url: str):
+    def create_book(self, title: str, url: str, listing: element.Tag = None):
         """Instantiate a Book object with previously scrapped infos.
 
         Args:
             title (str): Book title.
             url (str): Book page URL.
+            listing (element.Tag): Book element of the category page.
+        """
+
+        book_object = Book(
+            title=title,
+            url=url,
+            category=self.name,
+            logger=self.logger,
+            fetcher=self.fetcher,
+            lazy=self.pipeline is not None,
+            fields=self.fields,
+            listing=listing,
+        )
+
+        if self.pipeline is not None:
+            # Placeholder keeping website order, scrapped book replaces it.
+            if self.on_book is None:
+                self.books[url] = book_object
+            self.pipeline.put_book(
+                category_object=self, book_object=book_object, listing=listing
+            )
+            return
+
+        self.hand_book(book_object)
+
+    def hand_book(self, book_object: Book):
+        """Keeps a scrapped book, or passes it to on_book.
+
+        Args:
+            book_object (Book): Scrapped book.
         """
 
-        book_object = Book(title=title, url=url, category=self.name, logger=self.logger)
-        self.books[title] = book_object
+        if self.on_book is not None:
+            self.on_book(book_object)
+            self.number_of_books_handed += 1
+        else:
+            self.books[book_object.url] = book_object
 
     def scrap_category(self):
         """Scraping process for default category page.
@@ -98,29 +305,35 @@ class Category:
         per page.
         """
 
-        soup = self.create_soup()
+        if self.first_page is None:
+            self.plan()
 
-        self.find_number_of_books_to_scrap(soup=soup)
+        if self.first_page is None:
+            self.fetcher.budget.skip("category", name=self.name, url=self.url)
+            return
 
-        # If number of pages is greater than number displayed per
-        # page, handle multiple pages scraping.
-        if self.number_of_books <= self.number_of_books_per_page:
-            self.scrap_category_page(self.url)
+        self.complete = True
 
-        else:
-            number_of_pages = (
-                self.number_of_books // self.number_of_books_per_page
-            ) + 1
+        # First page is the index page, already fetched during planning.
+        self.scrap_category_page(
+            self.url, soup=self.first_page, held=self.first_page_held
+        )
+        self.first_page = None
+        self.first_page_held = 0
 
-            for page_number in range(1, number_of_pages + 1):
-                page_url = self.url.replace(
-                    "index", "page-{num}".format(num=page_number)
-                )
+        # If number of pages is greater than number displayed per
+        # page, handle multiple pages scraping.
+        for page_url in self.page_urls_to_scrap():
+            if self.fetcher.budget.exhausted():
+                self.fetcher.budget.skip("page", category=self.name, url=page_url)
+                self.complete = False
+                continue
 
-                self.scrap_category_page(page_url)
+            self.scrap_category_page(page_url)
 
     def create_soup(self):
-        """Create a BeautifulSoup object from raw request response.
+        """Create a BeautifulSoup object from raw request response of
+        first category page, charging fetcher memory budget for it.
 
         Raises:
             _CUSTOM_ERRORS.CouldNotGetCategoryPage: If response code is
@@ -130,7 +343,7 @@ class Category:
             BeautifulSoup: Object to work with during further scraping.
         """
 
-        raw_response = requests.get(self.url)
+        raw_response = self.fetcher.get(self.url)
 
         if raw_response.status_code != 200:
             self.logger.write(
@@ -144,7 +357,12 @@ class Category:
             message="Received response for category page with status code 200.",
         )
 
-        soup = BeautifulSoup(raw_response.content, "html.parser")
+        memory = self.fetcher.memory
+        self.first_page_held = memory.charge(memory.estimate(len(raw_response.content)))
+
+        soup = BeautifulSoup(
+            self.fetcher.decoder.decode(raw_response, kind="category"), "html.parser"
+        )
 
         return soup
 
@@ -174,27 +392,85 @@ class Category:
         self.number_of_books = int(re.findall("([0-9]+) result", results_text)[0])
         self.logger.write(
             log_level="debug",
-            message="{number} book(s) to scrap for this category.".format(
-                number=self.number_of_books
-            ),
+            message="{number} book(s) to scrap for this category.",
+            number=self.number_of_books,
         )
 
-    def scrap_category_page(self, page_url: str):
+    def scrap_category_page(
+        self, page_url: str, soup: BeautifulSoup = None, held: int = 0
+    ):
         """Scraps a category page.
         Search for books and calls crate_book to instantiate a Book object.
+        The page is decomposed once its books are listed.
 
         Args:
             url (str): Desired page URL
+            soup (BeautifulSoup): Already parsed page, fetched if omitted.
+            held (int): Fetcher memory budget charged for an already
+            parsed page.
         """
 
-        raw_response = requests.get(page_url)
-        soup = BeautifulSoup(raw_response.content, "html.parser")
+        memory = self.fetcher.memory
+
+        if soup is None:
+            with self.fetcher.tracer.span("listing", url=page_url, category=self.name):
+                raw_response = self.fetcher.get(page_url)
+                held = memory.charge(memory.estimate(len(raw_response.content)))
+                soup = BeautifulSoup(
+                    self.fetcher.decoder.decode(raw_response, kind="category"),
+                    "html.parser",
+                )
+                raw_response = None
+
+        try:
+            self.list_books(page_url=page_url, soup=soup)
+        finally:
+            # Books listed in the page are scrapped or queued by now.
+            soup.decompose()
+            memory.release(held)
+
+    def list_books(self, page_url: str, soup: BeautifulSoup):
+        """Creates a Book for each book of a category page not seen yet,
+        unless run budget is exhausted.
+
+        Args:
+            page_url (str): Page URL, to resolve book links.
+            soup (BeautifulSoup): Parsed category page.
+        """
 
         books_titles = soup.find_all("h3")
 
         for book in books_titles:
             url = book.find("a")["href"]
-            absolute_url = url.replace(self.book_relative_path, self.book_absolute_path)
+            absolute_url = urljoin(page_url, url)
             book_title = book.find("a")["title"].strip()
 
-            self.create_book(title=book_title, url=absolute_url)
+            if self.fetcher.budget.exhausted():
+                self.fetcher.budget.skip(
+                    "book", category=self.name, title=book_title, url=absolute_url
+                )
+                self.complete = False
+                continue
+
+            # Same book listed twice, in this category or another one.
+            # Books owned by a category before this one on home page are
+            # left to it, whichever worker lists them first.
+            if canonical_url(absolute_url) in self.foreign:
+                self.seen.reject()
+                duplicate = True
+            else:
+                duplicate = not self.seen.add(absolute_url)
+
+            if duplicate:
+                self.logger.write(
+                    log_level="debug",
+                    message="Skipped duplicate book '{title}'.",
+                    title=book_title,
+                    url=absolute_url,
+                    stage="category",
+                )
+                continue
+
+            self.create_book(
+                title=book_title, url=absolute_url, listing=book.find_parent("article")
+            )
@@ -0,0 +1,723 @@
+"""Command line interface.
+
+Only the standard library is imported at module level: scraping
+dependencies are imported by the commands needing them, so that
+--help and local commands start fast.
+"""
+
+import argparse
+import os
+import sys
+
+COMMANDS = (
+    "scrape",
+    "daemon",
+    "export",
+    "verify",
+    "stats",
+    "history",
+    "trace",
+    "unpack",
+)
+DEFAULT_WEBSITE_URL = "https://books.toscrape.com/"
+EXIT_PARTIAL = 3
+
+
+def build_parser():
+    """Builds the command line parser.
+
+    Returns:
+        argparse.ArgumentParser: Parser with one subparser per command.
+    """
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--config",
+        metavar="FILE",
+        help="Config file to use instead of the package config.yml.",
+    )
+    common.add_argument(
+        "--set",
+        dest="overrides",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override a config.yml value, e.g. --set log_level=debug.",
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="oc_web_scraper",
+        description="Scrapes books.toscrape.com and saves its library locally. "
+        "Runs 'scrape' when no command is given.",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    scrape = subparsers.add_parser(
+        "scrape", parents=[common], help="Scrape the website and save it locally."
+    )
+    scrape.add_argument("--url", default=DEFAULT_WEBSITE_URL, help="Website root URL.")
+    scrape.add_argument(
+        "--from-snapshot",
+        metavar="FILE",
+        help="Save library from a snapshot instead of scraping the website.",
+    )
+    scrape.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Profile the run and write reports to DIR.",
+    )
+    scrape.add_argument(
+        "--profile-top",
+        type=int,
+        default=25,
+        metavar="N",
+        help="Number of allocation sites listed in profiling report.",
+    )
+
+    for option, key, value_type in (
+        ("--max-seconds", "budget_seconds", float),
+        ("--max-requests", "budget_requests", int),
+        ("--max-bytes", "budget_bytes", int),
+    ):
+        scrape.add_argument(
+            option,
+            dest=key,
+            type=value_type,
+            metavar="N",
+            help="Stop starting new work after N {unit} and save partial "
+            "output (config.yml '{key}').".format(unit=option[6:], key=key),
+        )
+
+    daemon = subparsers.add_parser(
+        "daemon",
+        parents=[common],
+        help="Keep running and scrape the website on a schedule.",
+    )
+    daemon.add_argument("--url", default=DEFAULT_WEBSITE_URL, help="Website root URL.")
+    daemon.add_argument(
+        "--interval",
+        type=float,
+        metavar="SECONDS",
+        help="Seconds between crawls (config.yml 'daemon_interval').",
+    )
+    daemon.add_argument(
+        "--port",
+        type=int,
+        help="Control endpoint port (config.yml 'daemon_port').",
+    )
+
+    for command in (scrape, daemon):
+        command.add_argument(
+            "--category",
+            dest="categories",
+            action="append",
+            metavar="NAME",
+            help="Only scrape categories matching NAME, a name or a pattern such "
+            "as 'science*' (case insensitive). Repeatable (config.yml 'categories').",
+        )
+        command.add_argument(
+            "--fields",
+            metavar="FIELD[,FIELD...]",
+            help="Only scrape these book fields, e.g. price_including_tax,"
+            "number_available (config.yml 'fields').",
+        )
+        command.add_argument(
+            "--mirror",
+            dest="mirrors",
+            action="append",
+            metavar="URL",
+            help="Root URL of an equivalent copy of the website to spread "
+            "requests across. Repeatable (config.yml 'mirrors').",
+        )
+
+    export = subparsers.add_parser(
+        "export", parents=[common], help="Export saved books to a single file."
+    )
+    export.add_argument("--format", choices=("csv", "jsonl"), default="jsonl")
+    export.add_argument(
+        "--snapshot", metavar="FILE", help="Read books from a library snapshot."
+    )
+    export.add_argument(
+        "--output", metavar="FILE", help="Output file, standard output if omitted."
+    )
+
+    subparsers.add_parser(
+        "verify", parents=[common], help="Check saved csv files and images."
+    )
+    stats = subparsers.add_parser(
+        "stats", parents=[common], help="Print statistics about saved books."
+    )
+    stats.add_argument(
+        "--snapshot", metavar="FILE", help="Read books from a library snapshot."
+    )
+    stats.add_argument(
+        "--by-category",
+        action="store_true",
+        help="Also print price and stock statistics of each category.",
+    )
+
+    history = subparsers.add_parser(
+        "history",
+        parents=[common],
+        help="Print price and stock history recorded across runs.",
+    )
+    when = history.add_mutually_exclusive_group(required=True)
+    when.add_argument(
+        "--since",
+        metavar="DATE",
+        help="Print changes recorded after DATE (YYYY-MM-DD[THH:MM:SS], UTC), "
+        "a date alone meaning the end of that day.",
+    )
+    when.add_argument(
+        "--as-of",
+        metavar="DATE",
+        help="Print state of every book as of DATE (YYYY-MM-DD[THH:MM:SS], UTC).",
+    )
+    history.add_argument("--upc", help="Only print history of this book.")
+
+    unpack = subparsers.add_parser(
+        "unpack",
+        parents=[common],
+        help="Write images of an image pack as per category image files.",
+    )
+    unpack.add_argument(
+        "--output",
+        metavar="DIR",
+        help="Directory receiving CATEGORY/images/ trees, data directory if omitted.",
+    )
+
+    trace = subparsers.add_parser(
+        "trace",
+        parents=[common],
+        help="Print slowest spans of a traced run (config.yml 'trace').",
+    )
+    trace.add_argument(
+        "--file",
+        metavar="FILE",
+        help="Trace file, trace_path/web_scraper_trace.jsonl if omitted.",
+    )
+    trace.add_argument(
+        "--run", metavar="TRACE_ID", help="Run to summarize, last one if omitted."
+    )
+    trace.add_argument(
+        "--top", type=int, default=10, metavar="N", help="Number of spans listed."
+    )
+
+    return parser
+
+
+def parse_arguments(argv: list = None):
+    """Parses command line arguments. 'scrape' is assumed when no
+    command is given, to keep 'python -m oc_web_scraper' behavior.
+
+    Args:
+        argv (list): Arguments, sys.argv[1:] if omitted.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "scrape")
+
+    return build_parser().parse_args(argv)
+
+
+def apply_selection(arguments: argparse.Namespace, config: dict):
+    """Copies category and field selection and mirror options to config.
+
+    Args:
+        arguments (argparse.Namespace): Parsed scrape or daemon arguments.
+        config (dict): App config, updated.
+    """
+
+    if arguments.categories is not None:
+        config["categories"] = arguments.categories
+    if arguments.mirrors is not None:
+        config["mirrors"] = arguments.mirrors
+    if arguments.fields is not None:
+        config["fields"] = [
+            field.strip() for field in arguments.fields.split(",") if field.strip()
+        ]
+
+
+def run_scrape(arguments: argparse.Namespace, config: dict):
+    from oc_web_scraper.handler import Handler
+
+    apply_selection(arguments=arguments, config=config)
+
+    for key in ("budget_seconds", "budget_requests", "budget_bytes", "from_snapshot"):
+        if getattr(arguments, key) is not None:
+            config[key] = getattr(arguments, key)
+
+    if arguments.profile is None:
+        handler = Handler(arguments.url, config=config)
+    else:
+        from oc_web_scraper.profiler import Profiler
+
+        with Profiler(output_dir=arguments.profile, top=arguments.profile_top):
+            handler = Handler(arguments.url, config=config)
+
+    # Partial output, run budget exhausted or interrupted.
+    return EXIT_PARTIAL if handler.budget.skipped else 0
+
+
+def run_daemon(arguments: argparse.Namespace, config: dict):
+    from oc_web_scraper.daemon import Daemon
+
+    apply_selection(arguments=arguments, config=config)
+
+    if arguments.interval is not None:
+        config["daemon_interval"] = arguments.interval
+    if arguments.port is not None:
+        config["daemon_port"] = arguments.port
+
+    Daemon(arguments.url, config=config).serve()
+
+    return 0
+
+
+def snapshot_rows(path: str):
+    """Yields csv rows of books stored in a library snapshot.
+
+    Args:
+        path (str): Snapshot file path.
+
+    Yields:
+        dict: Book row, as written in csv files.
+    """
+
+    from types import SimpleNamespace
+
+    from oc_web_scraper.data_tree import book_row
+    from oc_web_scraper.snapshot import iter_records
+
+    for record_type, values in iter_records(path):
+        if record_type == "book":
+            yield book_row(SimpleNamespace(**values))
+
+
+def close_stdout():
+    """Points stdout to devnull once the reading end of its pipe is
+    closed, e.g. by head, so that flushing it at exit does not fail again.
+    Called by main for every command.
+
+    Returns:
+        int: Exit status.
+    """
+
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+
+    return 1
+
+
+def run_export(arguments: argparse.Namespace, config: dict):
+    import csv
+    import json
+
+    from oc_web_scraper.data_tree import CSV_FIELDNAMES, DataTree
+
+    if arguments.snapshot is not None:
+        if not os.path.isfile(arguments.snapshot):
+            print("No snapshot found at {path}.".format(path=arguments.snapshot))
+            return 1
+        rows = snapshot_rows(arguments.snapshot)
+    else:
+        data_tree = DataTree(save_path=config["save_path"])
+        if not data_tree.exists():
+            print("No saved data found in {path}.".format(path=data_tree.data_path))
+            return 1
+        rows = data_tree.iter_rows()
+
+    output = open(arguments.output, "w", newline="") if arguments.output else sys.stdout
+
+    try:
+        if arguments.format == "csv":
+            writer = csv.DictWriter(output, fieldnames=CSV_FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                output.write(json.dumps(row) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    return 0
+
+
+def open_image_pack(data_tree):
+    """Opens image pack of a saved tree.
+
+    Args:
+        data_tree (DataTree): Saved tree.
+
+    Returns:
+        PackReader: Image pack, None if images are saved as files.
+    """
+
+    from oc_web_scraper.image_pack import PACK_FILENAME, PackReader
+
+    if not data_tree.data_path.joinpath(PACK_FILENAME).exists():
+        return None
+
+    return PackReader(path=data_tree.data_path)
+
+
+def run_verify(arguments: argparse.Namespace, config: dict):
+    from oc_web_scraper.data_tree import (
+        CSV_FIELDNAMES,
+        FIELD_COLUMNS,
+        MANDATORY_FIELDS,
+        DataTree,
+    )
+
+    data_tree = DataTree(save_path=config["save_path"])
+    if not data_tree.exists():
+        print("No saved data found in {path}.".format(path=data_tree.data_path))
+        return 1
+
+    image_pack = open_image_pack(data_tree)
+
+    problems = []
+    number_of_books = 0
+
+    # Images skipped by a partial run are reported, not counted as problems.
+    manifest = data_tree.manifest() or {}
+    skipped_images = {
+        skipped["url"]
+        for skipped in manifest.get("skipped", [])
+        if skipped["type"] == "image"
+    }
+    number_of_skipped_images = 0
+
+    # Fields left out of the run field selection are empty.
+    fields = manifest.get("fields") or list(FIELD_COLUMNS)
+    unselected = {
+        column for field, column in FIELD_COLUMNS.items() if field not in fields
+    }
+    mandatory_fields = [
+        column for column in MANDATORY_FIELDS if column not in unselected
+    ]
+    images_selected = "image_url" in fields
+
+    for category_dir in data_tree.category_dirs():
+        csv_file = data_tree.csv_file(category_dir)
+
+        if not csv_file.exists():
+            problems.append("{path}: missing csv file".format(path=csv_file))
+            continue
+
+        fieldnames, rows = data_tree.read_category(category_dir)
+
+        if fieldnames != CSV_FIELDNAMES:
+            problems.append("{path}: unexpected header".format(path=csv_file))
+
+        image_files = data_tree.image_files(category_dir, rows)
+
+        for line, (row, image_file) in enumerate(zip(rows, image_files), start=2):
+            number_of_books += 1
+            missing = [field for field in mandatory_fields if not row.get(field)]
+
+            if missing:
+                problems.append(
+                    "{path}:{line}: missing {fields}".format(
+                        path=csv_file, line=line, fields=", ".join(missing)
+                    )
+                )
+
+            if not images_selected:
+                continue
+
+            if image_pack is not None:
+                image = image_pack.get(url=row.get("URL", ""))
+                has_image = image is not None
+                if has_image:
+                    image.release()
+            else:
+                has_image = image_file.exists()
+
+            if not has_image and row.get("Image URL") in skipped_images:
+                number_of_skipped_images += 1
+            elif not has_image:
+                problems.append(
+                    "{path}:{line}: missing image".format(path=csv_file, line=line)
+                )
+
+    if image_pack is not None:
+        image_pack.close()
+
+    for problem in problems:
+        print(problem)
+
+    if manifest.get("status") == "partial":
+        print(
+            "Partial run ({reason}): {num} unit(s) of work skipped, "
+            "{images} image(s) not downloaded.".format(
+                reason=manifest["reason"],
+                num=len(manifest["skipped"]),
+                images=number_of_skipped_images,
+            )
+        )
+
+    print(
+        "{books} book(s) checked, {num} problem(s) found.".format(
+            books=number_of_books, num=len(problems)
+        )
+    )
+
+    return 1 if problems else 0
+
+
+def format_price(price):
+    return "-" if price is None else "£{price:.2f}".format(price=price / 100)
+
+
+def run_stats(arguments: argparse.Namespace, config: dict):
+    from oc_web_scraper.columns import BookColumns
+    from oc_web_scraper.data_tree import DataTree
+
+    number_of_categories = 0
+    number_of_images = 0
+    images_size = 0
+    rows = []
+
+    if arguments.snapshot is not None:
+        if not os.path.isfile(arguments.snapshot):
+            print("No snapshot found at {path}.".format(path=arguments.snapshot))
+            return 1
+        rows = list(snapshot_rows(arguments.snapshot))
+        number_of_categories = len({row["Category"] for row in rows})
+    else:
+        data_tree = DataTree(save_path=config["save_path"])
+        if not data_tree.exists():
+            print("No saved data found in {path}.".format(path=data_tree.data_path))
+            return 1
+
+        image_pack = open_image_pack(data_tree)
+        if image_pack is not None:
+            number_of_images = len(image_pack)
+            images_size = image_pack.size()
+            image_pack.close()
+
+        for category_dir in data_tree.category_dirs():
+            number_of_categories += 1
+
+            if data_tree.csv_file(category_dir).exists():
+                rows.extend(data_tree.read_category(category_dir)[1])
+
+            for image in category_dir.joinpath("images").glob("*.jpg"):
+                number_of_images += 1
+                images_size += image.stat().st_size
+
+    report = BookColumns.from_rows(rows).report()
+
+    print("Categories: {num}".format(num=number_of_categories))
+    print("Books: {num}".format(num=report["books"]))
+    if arguments.snapshot is None:
+        print(
+            "Images: {num} ({size:.1f} MiB)".format(
+                num=number_of_images, size=images_size / 2 ** 20
+            )
+        )
+    print(
+        "Stock: {num} copies, {out} book(s) out of stock".format(
+            num=report["stock"], out=report["out_of_stock"]
+        )
+    )
+    print(
+        "Ratings: {histogram}".format(
+            histogram=", ".join(
+                "{rating}: {num}".format(rating=rating, num=num)
+                for rating, num in report["ratings"].items()
+            )
+        )
+    )
+    print("Tax mismatches: {num}".format(num=report["tax_mismatches"]))
+
+    if arguments.by_category:
+        print()
+        print(
+            "{name:<30} {books:>6} {low:>8} {mean:>8} {high:>8} {stock:>6} {tax:>6}".format(
+                name="Category",
+                books="Books",
+                low="Min",
+                mean="Mean",
+                high="Max",
+                stock="Stock",
+                tax="Tax",
+            )
+        )
+
+        for name, stats in report["categories"].items():
+            print(
+                "{name:<30} {books:>6} {low:>8} {mean:>8} {high:>8} {stock:>6} {tax:>6}".format(
+                    name=name[:30],
+                    books=stats["books"],
+                    low=format_price(stats["min_price"]),
+                    mean=format_price(stats["mean_price"]),
+                    high=format_price(stats["max_price"]),
+                    stock=stats["stock"],
+                    tax="-"
+                    if stats["tax_ratio"] is None
+                    else "{ratio:.3f}".format(ratio=stats["tax_ratio"]),
+                )
+            )
+
+    return 0
+
+
+def run_history(arguments: argparse.Namespace, config: dict):
+    import json
+
+    from oc_web_scraper.history import History
+
+    history = History(path=config.get("history_path", config["save_path"]))
+    if not history.runs:
+        print("No history found in {path}.".format(path=history.history_file))
+        return 1
+
+    if arguments.as_of is not None:
+        if arguments.upc is not None:
+            state = history.state_as_of(upc=arguments.upc, timestamp=arguments.as_of)
+            states = {} if state is None else {arguments.upc: state}
+        else:
+            states = history.as_of(timestamp=arguments.as_of)
+
+        for upc, state in states.items():
+            print(json.dumps(dict(upc=upc, **state)))
+
+        return 0
+
+    for timestamp, upc, changes in history.since(timestamp=arguments.since):
+        if arguments.upc is None or upc == arguments.upc:
+            print(json.dumps({"time": timestamp, "upc": upc, "changes": changes}))
+
+    return 0
+
+
+def run_unpack(arguments: argparse.Namespace, config: dict):
+    from oc_web_scraper.data_tree import DataTree
+
+    data_tree = DataTree(save_path=config["save_path"])
+    image_pack = open_image_pack(data_tree) if data_tree.exists() else None
+    if image_pack is None:
+        print("No image pack found in {path}.".format(path=data_tree.data_path))
+        return 1
+
+    output_path = arguments.output or data_tree.data_path
+
+    with image_pack:
+        number_of_files = image_pack.unpack(output_path=output_path)
+
+    print(
+        "{num} image file(s) unpacked to {path}.".format(
+            num=number_of_files, path=output_path
+        )
+    )
+
+    return 0
+
+
+def run_trace(arguments: argparse.Namespace, config: dict):
+    from oc_web_scraper.tracing import TRACE_FILENAME, read_spans, summarize
+
+    path = arguments.file
+    if path is None:
+        path = os.path.join(
+            config.get("trace_path", config["save_path"]), TRACE_FILENAME
+        )
+
+    if not os.path.isfile(path):
+        print("No trace found at {path}.".format(path=path))
+        return 1
+
+    spans = read_spans(path, trace_id=arguments.run)
+    if not spans:
+        print("No span recorded for this run in {path}.".format(path=path))
+        return 1
+
+    summary = summarize(spans, top=arguments.top)
+
+    print("Run {trace}: {num} span(s)".format(trace=spans[0]["trace"], num=len(spans)))
+    print()
+    print(
+        "{path:<40} {count:>7} {total:>10} {mean:>9} {high:>9} {errors:>6}".format(
+            path="Path",
+            count="Spans",
+            total="Total (s)",
+            mean="Mean (s)",
+            high="Max (s)",
+            errors="Errors",
+        )
+    )
+    for entry in summary["paths"]:
+        print(
+            "{path:<40} {count:>7} {total:>10.3f} {mean:>9.3f} {high:>9.3f} "
+            "{errors:>6}".format(
+                path=entry["path"][-40:],
+                count=entry["count"],
+                total=entry["total"],
+                mean=entry["mean"],
+                high=entry["max"],
+                errors=entry["errors"],
+            )
+        )
+
+    print()
+    print("Slowest spans:")
+    for entry in summary["slowest"]:
+        print(
+            "{duration:>8.3f}s {path} {url}".format(
+                duration=entry["duration"],
+                path=entry["path"],
+                url=entry["attributes"].get("url", ""),
+            )
+        )
+        if entry["children"]:
+            print(
+                "          "
+                + ", ".join(
+                    "{name} {seconds:.3f}s".format(name=name, seconds=seconds)
+                    for name, seconds in entry["children"].items()
+                )
+            )
+
+    return 0
+
+
+def main(argv: list = None):
+    """Parses arguments, loads config and runs selected command.
+
+    Args:
+        argv (list): Arguments, sys.argv[1:] if omitted.
+    """
+
+    arguments = parse_arguments(argv)
+
+    from oc_web_scraper.config import load_config
+
+    config = load_config(config_path=arguments.config, overrides=arguments.overrides)
+
+    commands = {
+        "scrape": run_scrape,
+        "daemon": run_daemon,
+        "export": run_export,
+        "verify": run_verify,
+        "stats": run_stats,
+        "history": run_history,
+        "trace": run_trace,
+        "unpack": run_unpack,
+    }
+
+    try:
+        status = commands[arguments.command](arguments=arguments, config=config)
+        # Buffered output is written here, while broken pipes are handled.
+        sys.stdout.flush()
+    except BrokenPipeError:
+        status = close_stdout()
+
+    sys.exit(status)
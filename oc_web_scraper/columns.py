@@ -0,0 +1,238 @@
+from array import array
+from operator import gt
+
+from oc_web_scraper.index import parse_price
+
+RATINGS = range(6)
+
+# Stored in numeric columns when a value is missing.
+MISSING = -1
+
+
+def to_int(raw_value):
+    """Converts a scraped or csv value to int.
+
+    Args:
+        raw_value: Value as an int, a str or None.
+
+    Returns:
+        int: Value, MISSING if empty or not a number.
+    """
+
+    if raw_value is None or raw_value == "":
+        return MISSING
+
+    try:
+        return int(raw_value)
+    except ValueError:
+        return MISSING
+
+
+def price_or_missing(raw_price: str):
+    price = parse_price(raw_price)
+
+    return MISSING if price is None else price
+
+
+class BookColumns:
+    """BookColumns class holds a columnar view of scraped books: one
+    typed array per numeric field, prices as integer minor units.
+
+    Books of a category are appended together, so that each category is
+    a contiguous segment and summaries run as builtin operations over
+    array slices instead of Python loops over Book objects.
+
+    Attributes:
+        categories (list): Category names, indexed by category code.
+        category_codes (dict): Format is "category name": category code.
+        segments (list): (category code, start, stop) of each contiguous run.
+        price_including_tax (array): Prices including tax, in minor units.
+        price_excluding_tax (array): Prices excluding tax, in minor units.
+        number_available (array): Number of books available.
+        review_rating (array): Review ratings, from 0 to 5.
+    """
+
+    def __init__(self):
+        self.categories = []
+        self.category_codes = {}
+        self.segments = []
+
+        self.price_including_tax = array("q")
+        self.price_excluding_tax = array("q")
+        self.number_available = array("l")
+        self.review_rating = array("b")
+
+    def __len__(self):
+        return len(self.price_including_tax)
+
+    @classmethod
+    def from_library(cls, library):
+        """Builds columns from a scraped Library.
+
+        Args:
+            library (Library): Library object created by Handler.
+
+        Returns:
+            BookColumns: Columns of every book.
+        """
+
+        columns = cls()
+
+        for category_object in library.categories.values():
+            for book_object in category_object.books.values():
+                columns.append(
+                    category=category_object.name,
+                    price_including_tax=price_or_missing(book_object.price_including_tax),
+                    price_excluding_tax=price_or_missing(book_object.price_excluding_tax),
+                    number_available=to_int(book_object.number_available),
+                    review_rating=to_int(book_object.review_rating),
+                )
+
+        return columns
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Builds columns from csv rows, as yielded by DataTree.iter_rows.
+
+        Args:
+            rows (iterable): Book rows keyed by csv field name.
+
+        Returns:
+            BookColumns: Columns of every row.
+        """
+
+        columns = cls()
+
+        for row in rows:
+            columns.append(
+                category=row.get("Category") or "",
+                price_including_tax=price_or_missing(row.get("Price Including Tax")),
+                price_excluding_tax=price_or_missing(row.get("Price Excluding Tax")),
+                number_available=to_int(row.get("Number Available")),
+                review_rating=to_int(row.get("Review Rating")),
+            )
+
+        return columns
+
+    def append(
+        self,
+        category: str,
+        price_including_tax: int,
+        price_excluding_tax: int,
+        number_available: int,
+        review_rating: int,
+    ):
+        """Appends a book to every column.
+
+        Args:
+            category (str): Category name.
+            price_including_tax (int): Minor units, MISSING if unknown.
+            price_excluding_tax (int): Minor units, MISSING if unknown.
+            number_available (int): Number available, MISSING if unknown.
+            review_rating (int): Rating, MISSING if unknown.
+        """
+
+        code = self.category_codes.get(category)
+        if code is None:
+            code = self.category_codes[category] = len(self.categories)
+            self.categories.append(category)
+
+        position = len(self)
+
+        if self.segments and self.segments[-1][0] == code:
+            self.segments[-1][2] = position + 1
+        else:
+            self.segments.append([code, position, position + 1])
+
+        self.price_including_tax.append(price_including_tax)
+        self.price_excluding_tax.append(price_excluding_tax)
+        self.number_available.append(number_available)
+        self.review_rating.append(review_rating)
+
+    def report(self):
+        """Computes catalogue summaries from columns: per category price
+        stats, stock totals and tax ratio (over the tax_pairs books having
+        both prices), rating histogram and tax mismatches, i.e. books whose
+        price excluding tax exceeds price including tax or whose price
+        including tax is missing.
+
+        Returns:
+            dict: Summaries, prices in minor units.
+        """
+
+        category_stats = {}
+
+        for code, start, stop in self.segments:
+            stats = category_stats.setdefault(
+                self.categories[code],
+                {
+                    "books": 0,
+                    "priced": 0,
+                    "min_price": None,
+                    "max_price": None,
+                    "total_price": 0,
+                    "tax_pairs": 0,
+                    "paired_price": 0,
+                    "paired_price_excluding_tax": 0,
+                    "stock": 0,
+                },
+            )
+
+            prices = self.price_including_tax[start:stop]
+            prices_excluding_tax = self.price_excluding_tax[start:stop]
+            available = self.number_available[start:stop]
+
+            # Tax ratio only sums books having both prices.
+            if MISSING in prices or MISSING in prices_excluding_tax:
+                pairs = [
+                    (price, price_excluding_tax)
+                    for price, price_excluding_tax in zip(prices, prices_excluding_tax)
+                    if price >= 0 and price_excluding_tax >= 0
+                ]
+                stats["tax_pairs"] += len(pairs)
+                stats["paired_price"] += sum(pair[0] for pair in pairs)
+                stats["paired_price_excluding_tax"] += sum(pair[1] for pair in pairs)
+            else:
+                stats["tax_pairs"] += stop - start
+                stats["paired_price"] += sum(prices)
+                stats["paired_price_excluding_tax"] += sum(prices_excluding_tax)
+
+            if MISSING in prices:
+                prices = array("q", filter((0).__le__, prices))
+            if MISSING in available:
+                available = array("l", filter((0).__le__, available))
+
+            stats["books"] += stop - start
+            stats["stock"] += sum(available)
+
+            if prices:
+                stats["priced"] += len(prices)
+                stats["total_price"] += sum(prices)
+                low, high = min(prices), max(prices)
+                stats["min_price"] = (
+                    low if stats["min_price"] is None else min(stats["min_price"], low)
+                )
+                stats["max_price"] = (
+                    high if stats["max_price"] is None else max(stats["max_price"], high)
+                )
+
+        for stats in category_stats.values():
+            stats["mean_price"] = (
+                stats["total_price"] / stats["priced"] if stats["priced"] else None
+            )
+            stats["tax_ratio"] = (
+                stats["paired_price"] / stats["paired_price_excluding_tax"]
+                if stats["paired_price_excluding_tax"]
+                else None
+            )
+
+        return {
+            "books": len(self),
+            "stock": sum(stats["stock"] for stats in category_stats.values()),
+            "out_of_stock": self.number_available.count(0),
+            "ratings": {rating: self.review_rating.count(rating) for rating in RATINGS},
+            "tax_mismatches": sum(
+                map(gt, self.price_excluding_tax, self.price_including_tax)
+            ),
+            "categories": category_stats,
+        }
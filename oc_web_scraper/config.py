@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from oc_web_scraper import errors as _CUSTOM_ERRORS
+
+DEFAULT_CONFIG_PATH = Path(__file__).parent.joinpath("config.yml")
+
+
+def load_config(config_path: str = None, overrides: list = None):
+    """Parses configuration from a config.yml file to a dict, then applies
+    command line overrides.
+
+    Args:
+        config_path (str): Config file path, package config.yml if omitted.
+        overrides (list): "key=value" strings. Values are parsed as YAML
+        scalars, so booleans and numbers keep their type.
+
+    Raises:
+        _CUSTOM_ERRORS.CouldNotParseConfigOverride: If an override is not
+        formatted as "key=value" or targets an unknown key.
+
+    Returns:
+        dict: App config.
+    """
+
+    # Only imported when a config is actually needed.
+    import yaml
+
+    config_path = Path(config_path or DEFAULT_CONFIG_PATH).resolve()
+
+    with open(str(config_path)) as config_file:
+        config = yaml.load(config_file, Loader=yaml.FullLoader)
+
+    for override in overrides or []:
+        key, separator, value = override.partition("=")
+        key = key.strip()
+
+        if not separator or key not in config:
+            raise _CUSTOM_ERRORS.CouldNotParseConfigOverride(override=override)
+
+        config[key] = yaml.safe_load(value)
+
+    return config
@@ -0,0 +1,218 @@
+import json
+import signal
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from oc_web_scraper.config import load_config
+from oc_web_scraper.handler import Handler
+
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    """Answers control endpoint requests of the daemon:
+    GET /status, POST /crawl and POST /stop."""
+
+    def do_GET(self):
+        if self.path != "/status":
+            self.send_json(404, {"error": "not found"})
+            return
+
+        self.send_json(200, self.server.scraper_daemon.status())
+
+    def do_POST(self):
+        if self.path == "/crawl":
+            self.server.scraper_daemon.trigger()
+            self.send_json(202, {"crawl": "triggered"})
+        elif self.path == "/stop":
+            self.server.scraper_daemon.stop()
+            self.send_json(202, {"stop": "requested"})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def send_json(self, code: int, content: dict):
+        body = json.dumps(content, indent=2).encode("utf-8")
+
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Requests are logged through the app logger instead.
+        self.server.scraper_daemon.logger.write(
+            log_level="debug",
+            message="Control request: {request}.",
+            request=format % args,
+        )
+
+
+class Daemon(Handler):
+    """Daemon class keeps the app running and re-crawls the website on a
+    schedule or when triggered, reusing state between runs: session
+    connection pool, response cache revalidated with conditional requests,
+    and last Library, whose unchanged files are linked instead of being
+    written again. A local HTTP endpoint reports status.
+
+    Attributes:
+        interval (float): Seconds between the end of a crawl and the next one.
+        host (str): Control endpoint host.
+        port (int): Control endpoint port.
+        wake (threading.Event): Set to start next crawl early.
+        stopping (threading.Event): Set to leave the crawl loop.
+        state (str): "idle", "crawling" or "stopped".
+        runs (int): Number of finished crawls.
+        last_run (dict): Summary of last crawl.
+        next_run (float): Epoch time of next scheduled crawl.
+    """
+
+    def __init__(self, website_url: str, config: dict = None):
+        """Constructor for Daemon class. Nothing runs until serve is called.
+
+        Args:
+            website_url (str): Website root url.
+            config (dict): App config. Parsed from config.yml if not provided.
+        """
+
+        if config is None:
+            config = load_config()
+        # Left to null, parse memo is only enabled for re-crawls.
+        if config.get("parse_memo") is None:
+            config = dict(config, parse_memo=True)
+
+        self.setup(website_url=website_url, config=config)
+        self.fetcher.enable_cache(
+            max_entries=self.config.get("daemon_cache_entries", 20000)
+        )
+
+        self.interval = self.config.get("daemon_interval", 900)
+        self.host = self.config.get("daemon_host", "127.0.0.1")
+        self.port = self.config.get("daemon_port", 8790)
+
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+
+        self.state = "idle"
+        self.runs = 0
+        self.last_run = None
+        self.next_run = None
+
+    def serve(self):
+        """Starts control endpoint and crawls until stopped."""
+
+        server = ThreadingHTTPServer((self.host, self.port), ControlRequestHandler)
+        server.scraper_daemon = self
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        self.logger.write(
+            log_level="info",
+            message="Daemon started, control endpoint at http://{host}:{port}/status.",
+            host=self.host,
+            port=server.server_address[1],
+        )
+
+        previous_handlers = self.handle_signals()
+
+        try:
+            while not self.stopping.is_set():
+                self.crawl()
+
+                if self.stopping.is_set():
+                    break
+
+                self.next_run = time.time() + self.interval
+                self.wake.wait(timeout=self.interval)
+                self.wake.clear()
+        finally:
+            self.state = "stopped"
+            server.shutdown()
+            server.server_close()
+            for signal_number, previous_handler in previous_handlers.items():
+                signal.signal(signal_number, previous_handler)
+            self.close()
+
+    def crawl(self):
+        """Runs a crawl, keeping the daemon alive if it fails."""
+
+        self.state = "crawling"
+        self.next_run = None
+        started = time.time()
+        revalidated = self.fetcher.revalidated
+
+        try:
+            self.run()
+        except Exception as error:
+            self.logger.write(
+                log_level="error",
+                message="Crawl failed: {error}",
+                error=repr(error),
+            )
+            self.last_run = {
+                "started": started,
+                "duration": time.time() - started,
+                "error": repr(error),
+            }
+        else:
+            self.last_run = {
+                "started": started,
+                "duration": time.time() - started,
+                "categories": len(self.library.categories),
+                "books": len(self.library.index),
+                "partial": bool(self.budget.skipped),
+                "requests": self.budget.requests,
+                "bytes": self.budget.bytes,
+                "not_modified": self.fetcher.revalidated - revalidated,
+                "reused_files": self.saver.reused_files,
+                "parse_memo": (
+                    self.fetcher.memo.stats() if self.fetcher.memo is not None else None
+                ),
+                "stages": self.pipeline.stats() if self.pipeline is not None else None,
+                "memory": self.fetcher.memory.stats(),
+            }
+        finally:
+            self.runs += 1
+            self.state = "idle"
+
+    def trigger(self):
+        """Starts next crawl now, or right after current one."""
+
+        self.wake.set()
+
+    def stop(self):
+        """Leaves crawl loop once current crawl, if any, is saved."""
+
+        self.stopping.set()
+        self.wake.set()
+
+    def interrupt(self, signal_name: str):
+        """Stops current crawl budget and the daemon on SIGINT/SIGTERM.
+
+        Args:
+            signal_name (str): Received signal name.
+        """
+
+        super().interrupt(signal_name=signal_name)
+        self.stop()
+
+    def status(self):
+        """Returns daemon status, for control endpoint.
+
+        Returns:
+            dict: State, number of runs, last run summary and next run time.
+        """
+
+        return {
+            "state": self.state,
+            "url": self.website_url,
+            "runs": self.runs,
+            "interval": self.interval,
+            "next_run": self.next_run,
+            "last_run": self.last_run,
+            "cached_responses": len(self.fetcher.cache),
+            "mirrors": (
+                self.fetcher.mirrors.stats()
+                if self.fetcher.mirrors is not None
+                else None
+            ),
+        }
@@ -0,0 +1,234 @@
+import csv
+import json
+
+from string import ascii_letters
+from pathlib import Path
+
+CSV_FIELDNAMES = [
+    "URL",
+    "UPC",
+    "Title",
+    "Price Including Tax",
+    "Price Excluding Tax",
+    "Number Available",
+    "Product Description",
+    "Category",
+    "Review Rating",
+    "Image URL",
+]
+
+MANDATORY_FIELDS = [
+    "URL",
+    "UPC",
+    "Title",
+    "Price Including Tax",
+    "Price Excluding Tax",
+    "Number Available",
+]
+
+# Csv column of each scraped Book field, for field selection.
+FIELD_COLUMNS = {
+    "product_description": "Product Description",
+    "upc": "UPC",
+    "price_including_tax": "Price Including Tax",
+    "price_excluding_tax": "Price Excluding Tax",
+    "number_available": "Number Available",
+    "review_rating": "Review Rating",
+    "image_url": "Image URL",
+}
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def book_row(book_object):
+    """Returns csv row of a book.
+
+    Args:
+        book_object (Book): Scraped book, or any object with Book attributes.
+
+    Returns:
+        dict: Book values keyed by csv field name.
+    """
+
+    return {
+        "URL": book_object.url,
+        "UPC": book_object.upc,
+        "Title": book_object.title,
+        "Price Including Tax": book_object.price_including_tax,
+        "Price Excluding Tax": book_object.price_excluding_tax,
+        "Number Available": book_object.number_available,
+        "Product Description": book_object.product_description,
+        "Category": book_object.category,
+        "Review Rating": book_object.review_rating,
+        "Image URL": book_object.image_url,
+    }
+
+
+class SlugTable(dict):
+    """str.translate table dropping every character it does not map."""
+
+    def __missing__(self, key):
+        return None
+
+
+# Keeps letters, lowercased, turns spaces to underscores and drops
+# anything else, in a single str.translate pass.
+SLUG_TABLE = SlugTable({ord(char): char.lower() for char in ascii_letters})
+SLUG_TABLE[ord(" ")] = "_"
+
+
+def slugify(raw_string: str):
+    """Transforms raw name to slug to avoid any file/dir naming problems.
+
+    Args:
+        raw_string (str): Raw name to be slugified
+
+    Returns:
+        str: Slugified name
+    """
+
+    return raw_string.translate(SLUG_TABLE).strip("_")
+
+
+def unique_slug(raw_string: str, used_slugs: set):
+    """Slugifies a name, appending a number if the slug is already used.
+    Names are expected in a stable order, so that the same name always
+    gets the same slug.
+
+    Args:
+        raw_string (str): Raw name to be slugified.
+        used_slugs (set): Slugs already given. Updated with returned slug.
+
+    Returns:
+        str: Slug, unique within used_slugs.
+    """
+
+    base = slugify(raw_string) or "untitled"
+    slug = base
+    number = 1
+
+    while slug in used_slugs:
+        number += 1
+        slug = "{base}_{num}".format(base=base, num=number)
+
+    used_slugs.add(slug)
+
+    return slug
+
+
+class DataTree:
+    """DataTree class reads the local tree written by Saver, without
+    any network access: one directory per category holding a csv file
+    and an 'images' directory.
+
+    Attributes:
+        data_path (Path): Root 'data' directory.
+    """
+
+    def __init__(self, save_path: str):
+        """Constructor for DataTree class.
+
+        Args:
+            save_path (str): Local save path, as set in config.yml.
+        """
+
+        self.data_path = Path(save_path).joinpath("data")
+
+    def exists(self):
+        return self.data_path.is_dir()
+
+    def category_dirs(self):
+        """Lists category directories.
+
+        Returns:
+            list: Sorted category directory paths.
+        """
+
+        return sorted(path for path in self.data_path.iterdir() if path.is_dir())
+
+    def manifest(self):
+        """Reads run manifest written by Saver.
+
+        Returns:
+            dict: Manifest, None if the tree has none.
+        """
+
+        manifest_file = self.data_path.joinpath(MANIFEST_FILENAME)
+
+        if not manifest_file.exists():
+            return None
+
+        with open(manifest_file) as manifest_fp:
+            return json.load(manifest_fp)
+
+    def csv_file(self, category_dir: Path):
+        return category_dir.joinpath("{slug}.csv".format(slug=category_dir.name))
+
+    def image_files(self, category_dir: Path, rows: list):
+        """Returns image file paths of category rows, resolving slug
+        collisions the same way Saver does.
+
+        Args:
+            category_dir (Path): Category directory.
+            rows (list): Category rows, in csv order.
+
+        Returns:
+            list: Image file path of each row.
+        """
+
+        used_slugs = set()
+
+        return [
+            category_dir.joinpath(
+                "images", unique_slug(row.get("Title", ""), used_slugs) + ".jpg"
+            )
+            for row in rows
+        ]
+
+    def category_name(self, category_dir: Path):
+        """Reads the name of a category from its first csv row.
+
+        Args:
+            category_dir (Path): Category directory.
+
+        Returns:
+            str: Category name, None if the category has no row.
+        """
+
+        csv_file = self.csv_file(category_dir)
+        if not csv_file.exists():
+            return None
+
+        with open(csv_file, newline="") as csv_fp:
+            row = next(csv.DictReader(csv_fp), None)
+
+        return row.get("Category") or None if row is not None else None
+
+    def read_category(self, category_dir: Path):
+        """Reads a category csv file.
+
+        Args:
+            category_dir (Path): Category directory.
+
+        Returns:
+            tuple: csv header as a list and rows as dicts.
+        """
+
+        with open(self.csv_file(category_dir), newline="") as csv_file:
+            reader = csv.DictReader(csv_file)
+            rows = list(reader)
+
+        return reader.fieldnames, rows
+
+    def iter_rows(self):
+        """Yields every book row of the tree.
+
+        Yields:
+            dict: Book row, as written in csv files.
+        """
+
+        for category_dir in self.category_dirs():
+            if not self.csv_file(category_dir).exists():
+                continue
+
+            yield from self.read_category(category_dir)[1]
@@ -0,0 +1,133 @@
+import codecs
+import re
+import threading
+
+from urllib.parse import urlsplit
+
+# Byte order marks, checked before anything else.
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+CONTENT_TYPE_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+# Matches both <meta charset="..."> and
+# <meta http-equiv="Content-Type" content="text/html; charset=...">.
+META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# Browsers only look for <meta> charset declarations in the first bytes.
+META_SCAN_BYTES = 2048
+
+
+class Decoder:
+    """Decoder class turns response bodies into text before parsing, so
+    that BeautifulSoup does not run its encoding detection on every page.
+
+    The encoding is taken, in order, from a byte order mark, from the
+    charset of Content-Type header, from a <meta> charset declaration, or
+    from the encoding last used for the same host and page kind. Full
+    detection by bs4 UnicodeDammit is only used when none of them
+    decodes the body, and its result is cached too.
+
+    Attributes:
+        encodings (dict): Format is ("host", "kind"): encoding.
+        sources (dict): Number of bodies decoded by source: "bom",
+        "header", "meta", "cache" and "detected".
+    """
+
+    def __init__(self):
+        self.encodings = {}
+        self.sources = {"bom": 0, "header": 0, "cache": 0, "meta": 0, "detected": 0}
+        self.lock = threading.Lock()
+
+    def decode(self, response, kind: str):
+        """Decodes a response body.
+
+        Args:
+            response (requests.Response): Response to decode.
+            kind (str): Page kind, e.g. "home", "category" or "book".
+            Pages of a kind share their encoding.
+
+        Returns:
+            str: Decoded body.
+        """
+
+        content = response.content
+        key = (urlsplit(response.url or "").netloc, kind)
+
+        for bom, encoding in BOMS:
+            if content.startswith(bom):
+                text = self.try_decode(content, encoding, "bom", key)
+                if text is not None:
+                    return text
+
+        content_type = response.headers.get("Content-Type", "")
+        match = CONTENT_TYPE_CHARSET.search(content_type)
+        if match is not None:
+            text = self.try_decode(content, match.group(1), "header", key)
+            if text is not None:
+                return text
+
+        match = META_CHARSET.search(content, 0, META_SCAN_BYTES)
+        if match is not None:
+            text = self.try_decode(content, match.group(1).decode("ascii"), "meta", key)
+            if text is not None:
+                return text
+
+        # Single byte encodings decode any body, so the cache only comes
+        # after what the page declares.
+        cached = self.encodings.get(key)
+        if cached is not None:
+            text = self.try_decode(content, cached, "cache", key)
+            if text is not None:
+                return text
+
+        return self.detect(content, key)
+
+    def try_decode(self, content: bytes, encoding: str, source: str, key: tuple):
+        """Decodes content with a given encoding, strictly.
+
+        Args:
+            content (bytes): Body.
+            encoding (str): Encoding name.
+            source (str): Where encoding comes from, for stats.
+            key (tuple): Host and page kind, to cache encoding.
+
+        Returns:
+            str: Decoded body, None if encoding is unknown or does not
+            decode content.
+        """
+
+        try:
+            text = content.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            return None
+
+        with self.lock:
+            self.encodings[key] = encoding
+            self.sources[source] += 1
+
+        return text
+
+    def detect(self, content: bytes, key: tuple):
+        """Falls back on bs4 encoding detection.
+
+        Args:
+            content (bytes): Body.
+            key (tuple): Host and page kind, to cache encoding.
+
+        Returns:
+            str: Decoded body.
+        """
+
+        from bs4 import UnicodeDammit
+
+        dammit = UnicodeDammit(content, is_html=True)
+
+        with self.lock:
+            if dammit.original_encoding is not None:
+                self.encodings[key] = dammit.original_encoding
+            self.sources["detected"] += 1
+
+        return dammit.unicode_markup
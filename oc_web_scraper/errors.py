@@ -31,6 +31,50 @@ class CouldNotParseLogLevel(Exception):
         )
 
 
+class CouldNotParseConfigOverride(Exception):
+    """Raised when a command line config override is malformed or unknown."""
+
+    def __init__(self, override):
+        super().__init__(
+            "Could not parse config override, expected an existing KEY=VALUE.\nValue: {override}".format(
+                override=override
+            )
+        )
+
+
+class CouldNotParseScrapePriority(Exception):
+    """Raised when scrape priority provided in config is not recognized."""
+
+    def __init__(self, priority):
+        super().__init__(
+            "Could not parse scrape priority provided in config.yml file.\nValue: {priority}".format(
+                priority=priority
+            )
+        )
+
+
+class CouldNotParseArchiveMode(Exception):
+    """Raised when archive mode provided in config is not recognized."""
+
+    def __init__(self, mode):
+        super().__init__(
+            "Could not parse archive mode provided in config.yml file.\nValue: {mode}".format(
+                mode=mode
+            )
+        )
+
+
+class NotFoundInArchive(Exception):
+    """Raised when a replayed URL was never recorded in archive."""
+
+    def __init__(self, url: str):
+        super().__init__(
+            "URL not found in archive. Record it before replaying.\nURL: {url}".format(
+                url=url
+            )
+        )
+
+
 class NoCategoryContainerFound(Exception):
     """Raised when category container is not found during scraping"""
 
@@ -160,4 +204,70 @@ class FailedToSaveImage(Exception):
             "Could get image for title: {title}.\nURL: {url}".format(
                 title=title, url=url
             )
-        )
\ No newline at end of file
+        )
+
+
+class CouldNotParseSink(Exception):
+    """Raised when an output sink provided in config is not recognized."""
+
+    def __init__(self, sink):
+        super().__init__(
+            "Could not parse output sink provided in config.yml file.\nValue: {sink}".format(
+                sink=sink
+            )
+        )
+
+
+class UnsupportedSnapshot(Exception):
+    """Raised when a snapshot file cannot be read."""
+
+    def __init__(self, path: str, reason: str):
+        super().__init__(
+            "Could not read snapshot: {reason}.\nPath: {path}".format(
+                reason=reason, path=path
+            )
+        )
+
+
+class UnsupportedImagePack(Exception):
+    """Raised when an image pack cannot be read."""
+
+    def __init__(self, path: str, reason: str):
+        super().__init__(
+            "Could not read image pack: {reason}.\nPath: {path}".format(
+                reason=reason, path=path
+            )
+        )
+
+
+class CouldNotParseImageStore(Exception):
+    """Raised when the image store provided in config is not recognized."""
+
+    def __init__(self, store):
+        super().__init__(
+            "Could not parse image store provided in config.yml file.\nValue: {store}".format(
+                store=store
+            )
+        )
+
+
+class CouldNotParseField(Exception):
+    """Raised when a field provided in config is not a scraped book field."""
+
+    def __init__(self, field):
+        super().__init__(
+            "Could not parse field provided in config.yml file.\nValue: {field}".format(
+                field=field
+            )
+        )
+
+
+class CouldNotParseMirror(Exception):
+    """Raised when a mirror provided in config is not an absolute HTTP URL."""
+
+    def __init__(self, mirror):
+        super().__init__(
+            "Could not parse mirror provided in config.yml file.\nValue: {mirror}".format(
+                mirror=mirror
+            )
+        )
@@ -0,0 +1,402 @@
+import threading
+import time
+
+from collections import OrderedDict
+
+import requests
+
+from oc_web_scraper import errors as _CUSTOM_ERRORS
+from oc_web_scraper.archive import Archive
+from oc_web_scraper.budget import Budget, MemoryBudget
+from oc_web_scraper.decode import Decoder
+from oc_web_scraper.logger import Logger
+from oc_web_scraper.seen import canonical_url
+from oc_web_scraper.tracing import NullTracer
+
+
+def retry_count(response):
+    """Returns the number of retries urllib3 performed for a response.
+
+    Args:
+        response: Response, possibly replayed or cached.
+
+    Returns:
+        int: Number of retries, 0 if unknown.
+    """
+
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+
+    return len(retries.history) if retries is not None else 0
+
+
+class InFlightRequest:
+    """InFlightRequest class lets concurrent callers wait for the
+    response of a request already being performed.
+
+    Attributes:
+        done (threading.Event): Set once response or error is known.
+        response: Shared response.
+        error (Exception): Error raised by the request, if any.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+
+        if self.error is not None:
+            raise self.error
+
+        return self.response
+
+
+class Fetcher:
+    """Fetcher class performs every GET request of the app through
+    a shared session. Depending on archive mode, responses are also
+    recorded to an archive, or replayed from it without any network access.
+
+    Attributes:
+        logger (Logger): Main app logger object. Passed in instantiation arguments.
+        archive_mode (str): "off", "record" or "replay".
+        archive (Archive): Archive used in record and replay modes.
+        budget (Budget): Run budget, charged with every request.
+        memory (MemoryBudget): Memory held by pages being scraped, pausing
+        admission of book page fetches near its limit. Unlimited unless
+        set by Handler.
+        memo (ParseMemo): Parse memo used by pages scrapped through this
+        fetcher, None unless set by Handler.
+        decoder (Decoder): Decodes response bodies before parsing.
+        tracer (Tracer): Records spans of requests and of the work around
+        them, a NullTracer unless set by Handler.
+        mirrors (MirrorPool): Equivalent copies of the website requests
+        are spread across, None unless set by Handler.
+        session (requests.Session): Session reusing connections between requests.
+        in_flight (dict): Format is "canonical url": InFlightRequest.
+        coalesced (int): Number of requests served by an identical
+        concurrent request.
+        cache (OrderedDict): Format is "canonical url": response, for
+        responses with validators, least recently used first. None unless
+        enabled with enable_cache.
+        cache_entries (int): Maximum number of cached responses.
+        revalidated (int): Number of requests answered 304 Not Modified
+        and served from cache.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        archive_mode: str = "off",
+        archive_path: str = None,
+        budget: Budget = None,
+    ):
+        """Constructor for Fetcher class.
+
+        Args:
+            logger (Logger): Main app logger object.
+            archive_mode (str): "off", "record" or "replay".
+            archive_path (str): Directory holding archive files.
+            budget (Budget): Run budget, unlimited if omitted.
+
+        Raises:
+            _CUSTOM_ERRORS.CouldNotParseArchiveMode: If archive mode is
+            not recognized.
+        """
+
+        self.logger = logger
+        self.budget = budget if budget is not None else Budget()
+        self.memory = MemoryBudget()
+        self.memo = None
+        self.decoder = Decoder()
+        self.tracer = NullTracer()
+        self.mirrors = None
+
+        self.archive_mode = archive_mode.lower()
+        if self.archive_mode not in ("off", "record", "replay"):
+            raise _CUSTOM_ERRORS.CouldNotParseArchiveMode(mode=archive_mode)
+
+        self.archive = None
+        if self.archive_mode != "off":
+            self.archive = Archive(path=archive_path)
+            self.logger.write(
+                log_level="info",
+                message="Archive {mode} mode, using '{path}'.",
+                mode=self.archive_mode,
+                path=self.archive.archive_file,
+            )
+
+        self.session = requests.Session()
+
+        self.in_flight = {}
+        self.in_flight_lock = threading.Lock()
+        self.coalesced = 0
+
+        self.cache = None
+        self.cache_entries = 0
+        self.cache_lock = threading.Lock()
+        self.revalidated = 0
+
+    def enable_cache(self, max_entries: int):
+        """Keeps responses carrying ETag or Last-Modified headers, so that
+        later requests for the same URL are conditional and unchanged
+        resources are served from memory.
+
+        Args:
+            max_entries (int): Maximum number of cached responses.
+        """
+
+        self.cache = OrderedDict()
+        self.cache_entries = max_entries
+
+    def get(self, url: str):
+        """Performs a GET request. Concurrent requests for the same
+        canonical URL share a single response.
+
+        Args:
+            url (str): Requested URL.
+
+        Returns:
+            requests.Response or ArchivedResponse: Response with at least
+            url, status_code, headers and content attributes.
+        """
+
+        with self.tracer.span("fetch", url=url) as span:
+            response, shared = self.get_shared(url)
+            span.set(
+                shared=shared,
+                status=response.status_code,
+                bytes=len(response.content),
+                retries=retry_count(response),
+            )
+
+        return response
+
+    def get_shared(self, url: str):
+        """Performs a GET request, or waits for the identical one in
+        flight.
+
+        Args:
+            url (str): Requested URL.
+
+        Returns:
+            tuple: Response, and whether it was shared with an identical
+            request.
+        """
+
+        key = canonical_url(url)
+
+        with self.in_flight_lock:
+            call = self.in_flight.get(key)
+            shared = call is not None
+
+            if shared:
+                self.coalesced += 1
+            else:
+                call = self.in_flight[key] = InFlightRequest()
+
+        if shared:
+            return call.wait(), True
+
+        try:
+            call.response = self.fetch(url)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.in_flight_lock:
+                del self.in_flight[key]
+            call.done.set()
+
+        return call.response, False
+
+    def fetch(self, url: str):
+        """Performs a GET request, or replays it from archive.
+
+        Args:
+            url (str): Requested URL.
+
+        Returns:
+            requests.Response or ArchivedResponse: Response with at least
+            url, status_code, headers and content attributes.
+        """
+
+        if self.archive_mode == "replay":
+            response = self.archive.read(url)
+            self.budget.charge(len(response.content))
+            return response
+
+        if self.cache is None:
+            response = self.request(url)
+            self.budget.charge(len(response.content))
+        else:
+            response = self.fetch_conditional(url)
+
+        if self.archive_mode == "record":
+            self.archive.write(
+                url=url,
+                status_code=response.status_code,
+                headers=response.headers,
+                content=response.content,
+            )
+
+        return response
+
+    def fetch_conditional(self, url: str):
+        """Performs a GET request revalidating cached response, if any.
+
+        Args:
+            url (str): Requested URL.
+
+        Returns:
+            requests.Response: Fresh or cached response.
+        """
+
+        key = canonical_url(url)
+
+        with self.cache_lock:
+            cached = self.cache.get(key)
+
+        headers = {}
+        if cached is not None:
+            if "ETag" in cached.headers:
+                headers["If-None-Match"] = cached.headers["ETag"]
+            if "Last-Modified" in cached.headers:
+                headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+
+        response = self.request(url, headers=headers)
+        self.budget.charge(len(response.content))
+
+        with self.cache_lock:
+            if response.status_code == 304 and cached is not None:
+                self.revalidated += 1
+                self.cache.move_to_end(key)
+                return cached
+
+            if response.status_code == 200 and (
+                "ETag" in response.headers or "Last-Modified" in response.headers
+            ):
+                self.cache[key] = response
+                self.cache.move_to_end(key)
+                if len(self.cache) > self.cache_entries:
+                    self.cache.popitem(last=False)
+
+        return response
+
+    def request(self, url: str, headers: dict = None):
+        """Performs a GET request on the network. URLs of the website go
+        to the mirror chosen by the mirror pool, and fail over to the
+        next one on connection errors, 5xx and 429 responses.
+
+        Args:
+            url (str): Requested URL.
+            headers (dict): Request headers.
+
+        Raises:
+            requests.RequestException: If every mirror failed with a
+            connection error.
+
+        Returns:
+            requests.Response: Response, the one of last mirror tried if
+            every mirror failed with an error status.
+        """
+
+        path = self.mirrors.relative(url) if self.mirrors is not None else None
+        if path is None:
+            return self.session.get(url, headers=headers)
+
+        tried = []
+        response = None
+        error = None
+
+        while True:
+            mirror = self.mirrors.acquire(exclude=tried)
+            if mirror is None:
+                break
+            tried.append(mirror)
+
+            started = time.perf_counter()
+            settled = False
+            try:
+                response = self.session.get(mirror.base + path, headers=headers)
+                settled = True
+            except requests.RequestException as request_error:
+                response, error = None, request_error
+                settled = True
+            finally:
+                # Other errors, e.g. interrupts, say nothing of the mirror.
+                if not settled:
+                    self.mirrors.release(mirror)
+
+            if response is not None and (
+                response.status_code < 500 and response.status_code != 429
+            ):
+                self.mirrors.succeeded(mirror, seconds=time.perf_counter() - started)
+                return response
+
+            cooldown = self.mirrors.failed(mirror)
+            self.logger.write(
+                log_level="warning",
+                message="Mirror {mirror} failed for {url} ({reason}), "
+                "skipped for {cooldown:.0f}s.",
+                mirror=mirror.base,
+                url=url,
+                reason=(
+                    type(error).__name__ if response is None else response.status_code
+                ),
+                cooldown=cooldown,
+                stage="fetch",
+            )
+
+        if response is None:
+            raise error
+
+        return response
+
+    def check_mirrors(self):
+        """Requests website root on every mirror, so that mirrors down
+        are skipped from the first request of a run and latencies of the
+        others are known before balancing requests.
+
+        Returns:
+            int: Number of mirrors up.
+        """
+
+        up = 0
+
+        for mirror in self.mirrors.mirrors:
+            self.mirrors.begin(mirror)
+
+            started = time.perf_counter()
+            settled = False
+            try:
+                response = self.session.get(mirror.base)
+                settled = True
+            except requests.RequestException:
+                response = None
+                settled = True
+            finally:
+                if not settled:
+                    self.mirrors.release(mirror)
+
+            if response is not None and response.status_code == 200:
+                self.mirrors.succeeded(mirror, seconds=time.perf_counter() - started)
+                up += 1
+            else:
+                self.mirrors.failed(mirror)
+                self.logger.write(
+                    log_level="warning",
+                    message="Mirror {mirror} failed health check.",
+                    mirror=mirror.base,
+                )
+
+        return up
+
+    def close(self):
+        """Closes session and archive."""
+
+        self.session.close()
+
+        if self.archive is not None:
+            self.archive.close()
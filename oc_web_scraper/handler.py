@@ -1,16 +1,23 @@
-import requests
-import yaml
+import fnmatch
+import signal
+import threading
 
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
 from bs4 import BeautifulSoup, element
 
 from tqdm import tqdm
 
 from oc_web_scraper import errors as _CUSTOM_ERRORS
+from oc_web_scraper.config import load_config
 
+from oc_web_scraper.book import parse_fields
+from oc_web_scraper.budget import Budget, MemoryBudget
 from oc_web_scraper.saver import Saver
+from oc_web_scraper.fetcher import Fetcher
 from oc_web_scraper.logger import Logger
 from oc_web_scraper.library import Library
+from oc_web_scraper.seen import SeenUrls, canonical_url
 
 
 class Handler:
@@ -23,52 +30,352 @@ class Handler:
     Attributes:
         config (dict): App config parsed from config.yaml.
         logger (Logger): Main app logger object.
+        budget (Budget): Current run budget, from config and stopped by
+        SIGINT/SIGTERM.
+        fetcher (Fetcher): Fetcher object performing every request.
         saver (Saver): Saver object used to store scrapped content locally.
+        fields (tuple): Book fields to scrap, from config.
         website_url (str): Website root url. Passed as instantiation argument.
-        library (Library): Main object used to initiate scrapping events.
+        library (Library): Main object used to initiate scrapping events,
+        created by each run.
+        pipeline (CrawlPipeline): Stages of last run scraping, when
+        enabled in config.
     """
 
-    def __init__(self, website_url: str):
-        """Constructor for Handler class.
+    def __init__(self, website_url: str, config: dict = None):
+        """Constructor for Handler class. Performs a whole run.
 
         Args:
             website_url (str): Website root url.
+            config (dict): App config. Parsed from config.yml if not provided.
         """
 
-        self.config = None
-        self.parse_config()
+        self.setup(website_url=website_url, config=config)
+
+        previous_handlers = self.handle_signals()
+
+        try:
+            self.run()
+        finally:
+            for signal_number, previous_handler in previous_handlers.items():
+                signal.signal(signal_number, previous_handler)
+            self.close()
+
+    def setup(self, website_url: str, config: dict = None):
+        """Instantiates objects kept for the whole process: config,
+        logger, fetcher and saver.
+
+        Args:
+            website_url (str): Website root url.
+            config (dict): App config. Parsed from config.yml if not provided.
+        """
+
+        self.config = config
+        if self.config is None:
+            self.parse_config()
         self.logger = Logger(
             enable_logging=self.config["enable_logging"],
             log_to_file=self.config["log_to_file"],
             log_path=self.config["log_path"],
             log_level=self.config["log_level"],
+            log_format=self.config.get("log_format", "text"),
+        )
+        self.budget = None
+        self.fields = parse_fields(self.config.get("fields"))
+        self.fetcher = Fetcher(
+            logger=self.logger,
+            archive_mode=self.config.get("archive_mode", "off"),
+            archive_path=self.config.get("archive_path"),
         )
-        self.saver = Saver(save_path=self.config["save_path"], logger=self.logger)
+        if self.config.get("parse_memo", False):
+            from oc_web_scraper.memo import ParseMemo
+
+            self.fetcher.memo = ParseMemo(
+                path=self.config.get("parse_memo_path", self.config["save_path"]),
+                memory_entries=self.config.get("parse_memo_memory_entries", 10000),
+                disk_entries=self.config.get("parse_memo_disk_entries", 1000000),
+            )
+        if self.config.get("trace", False):
+            from oc_web_scraper.tracing import Tracer
+
+            self.fetcher.tracer = Tracer(
+                path=self.config.get("trace_path", self.config["save_path"])
+            )
+        if self.config.get("mirrors"):
+            from oc_web_scraper.mirrors import MirrorPool
+
+            self.fetcher.mirrors = MirrorPool(
+                website_url=website_url,
+                mirrors=self.config["mirrors"],
+                cooldown=self.config.get("mirror_cooldown", 5),
+            )
+        self.saver = self.create_saver()
 
         self.website_url = website_url
-        self.library = Library(logger=self.logger)
+        self.library = None
+        self.pipeline = None
+
+    def create_saver(self):
+        """Instantiates saver from config.
+
+        Returns:
+            Saver: Saver object used by every run.
+        """
+
+        return Saver(
+            save_path=self.config["save_path"],
+            logger=self.logger,
+            fetcher=self.fetcher,
+            workers=self.config.get("save_workers", 8),
+            sinks=self.config.get("sinks", ["csv"]),
+            sink_buffer=self.config.get("sink_buffer", 1024),
+            snapshot_compress=self.config.get("snapshot_compress", True),
+            image_store=self.config.get("image_store", "files"),
+            fields=self.fields,
+        )
+
+    def run(self):
+        """Performs one crawl: scraps website into a new Library, saves
+        it and records history."""
+
+        self.budget = Budget(
+            max_seconds=self.config.get("budget_seconds"),
+            max_requests=self.config.get("budget_requests"),
+            max_bytes=self.config.get("budget_bytes"),
+        )
+        self.fetcher.budget = self.budget
+        self.fetcher.memory = MemoryBudget(max_bytes=self.config.get("memory_budget"))
+        self.fetcher.coalesced = 0
+        if self.fetcher.memo is not None:
+            self.fetcher.memo.reset_stats()
+        if self.fetcher.mirrors is not None:
+            self.fetcher.mirrors.reset_stats()
+            if self.fetcher.archive_mode != "replay":
+                self.fetcher.check_mirrors()
+
+        self.library = Library(
+            logger=self.logger,
+            fetcher=self.fetcher,
+            seen=SeenUrls(
+                exact_limit=self.config.get("seen_exact_limit", 1000000),
+                bloom_capacity=self.config.get("seen_bloom_capacity", 10000000),
+                error_rate=self.config.get("seen_error_rate", 0.001),
+            ),
+            fields=self.fields,
+        )
+
+        with self.fetcher.tracer.span("run", url=self.website_url) as span:
+            if self.config.get("from_snapshot"):
+                self.load_snapshot()
+            else:
+                self.scrap_homepage()
+
+            self.saver.save_library(self.library)
+
+            span.set(books=len(self.library.index), skipped=len(self.budget.skipped))
+
+        # A partial run would record books it did not reach as removed,
+        # and fields it did not scrape as changed.
+        if self.config.get("history", False) and not self.budget.skipped:
+            from oc_web_scraper.history import SOURCE_FIELDS
+
+            missing = [field for field in SOURCE_FIELDS if field not in self.fields]
+            if self.config.get("categories") is not None:
+                self.logger.write(
+                    log_level="warning",
+                    message="History not recorded: only some categories were "
+                    "scraped.",
+                )
+            elif missing:
+                self.logger.write(
+                    log_level="warning",
+                    message="History not recorded: tracked fields {missing} are "
+                    "not among selected fields.",
+                    missing=", ".join(missing),
+                )
+            else:
+                self.record_history()
+
+        self.report_duplicates()
+
+        if self.fetcher.memo is not None:
+            self.fetcher.memo.flush()
+            self.report_memo()
+
+        if self.fetcher.mirrors is not None:
+            self.report_mirrors()
+
+        if self.fetcher.memory.max_bytes is not None:
+            self.report_memory()
+
+    def close(self):
+        """Closes fetcher, parse memo and tracer, and flushes logs."""
+
+        self.fetcher.close()
+        if self.fetcher.memo is not None:
+            self.fetcher.memo.close()
+        self.fetcher.tracer.close()
+        self.logger.stop()
+
+    def handle_signals(self):
+        """Makes SIGINT/SIGTERM stop the budget instead of killing the
+        run: work in flight finishes and everything scrapped so far is
+        saved. A second signal gets the previous behavior back.
+
+        Returns:
+            dict: Previous handlers, to restore, keyed by signal number.
+        """
+
+        # Signal handlers can only be set from main thread.
+        if threading.current_thread() is not threading.main_thread():
+            return {}
+
+        previous_handlers = {}
+
+        def stop(signal_number, frame):
+            signal.signal(signal_number, previous_handlers[signal_number])
+            self.interrupt(signal_name=signal.Signals(signal_number).name)
+
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            previous_handlers[signal_number] = signal.signal(signal_number, stop)
+
+        return previous_handlers
+
+    def interrupt(self, signal_name: str):
+        """Stops current run budget on SIGINT/SIGTERM.
+
+        Args:
+            signal_name (str): Received signal name.
+        """
+
+        if self.budget is not None:
+            self.budget.stop(signal_name)
+
+        self.logger.write(
+            log_level="warning",
+            message="Received {signal}, saving scrapped data before exiting.",
+            signal=signal_name,
+        )
+
+    def report_duplicates(self):
+        """Logs requests avoided by deduplication during the run."""
+
+        message = (
+            "Duplicates avoided: {books} book page(s), {images} image(s), "
+            "{coalesced} coalesced request(s)."
+        )
+        counts = {
+            "books": self.library.seen.duplicates,
+            "images": self.saver.duplicate_images,
+            "coalesced": self.fetcher.coalesced,
+        }
+
+        self.logger.write(log_level="info", message=message, **counts)
+
+        # Inform the user if logging outputs to file
+        if self.logger.log_to_file:
+            print(" - " + message.format(**counts))
+
+    def report_memo(self):
+        """Logs parse memo hit rate during the run."""
+
+        message = (
+            "Parse memo: {hit_rate:.0%} hit rate, {memory_hits} memory hit(s), "
+            "{disk_hits} disk hit(s), {misses} miss(es)."
+        )
+        counts = self.fetcher.memo.stats()
+
+        self.logger.write(log_level="info", message=message, **counts)
+
+        # Inform the user if logging outputs to file
+        if self.logger.log_to_file:
+            print(" - " + message.format(**counts))
+
+    def report_memory(self):
+        """Logs peak tracked memory and fetches paused by memory budget
+        during the run."""
+
+        message = (
+            "Memory budget: {peak_mib:.1f} MiB peak of {max_mib:.1f} MiB tracked, "
+            "{waits} fetch(es) paused for {waited}s."
+        )
+        counts = self.fetcher.memory.stats()
+        counts["peak_mib"] = counts["peak"] / 2**20
+        counts["max_mib"] = counts["max_bytes"] / 2**20
+
+        self.logger.write(log_level="info", message=message, **counts)
+
+        # Inform the user if logging outputs to file
+        if self.logger.log_to_file:
+            print(" - " + message.format(**counts))
+
+    def report_mirrors(self):
+        """Logs requests answered and failed by each mirror during the run."""
+
+        message = (
+            "Mirror {base}: {requests} request(s), {failures} failure(s), "
+            "{latency_ms:.0f}ms average latency."
+        )
+
+        for counts in self.fetcher.mirrors.stats():
+            counts["latency_ms"] = (counts["latency"] or 0.0) * 1000
+
+            self.logger.write(log_level="info", message=message, **counts)
+
+            # Inform the user if logging outputs to file
+            if self.logger.log_to_file:
+                print(" - " + message.format(**counts))
+
+    def load_snapshot(self):
+        """Replaces scraping with a library loaded from a snapshot, e.g.
+        to save it again."""
+
+        from oc_web_scraper.snapshot import load_library
+
+        self.library = load_library(
+            path=self.config["from_snapshot"], logger=self.logger, fetcher=self.fetcher
+        )
+
+        self.logger.write(
+            log_level="info",
+            message="Library loaded from snapshot '{path}': {num} book(s).",
+            path=self.config["from_snapshot"],
+            num=len(self.library.index),
+        )
+
+    def record_history(self):
+        """Appends price and stock changes since previous run to history."""
 
-        self.scrap_homepage()
+        from oc_web_scraper.history import History
 
-        self.saver.save_library(self.library)
+        history = History(path=self.config.get("history_path", self.config["save_path"]))
+        counts = history.record_run(
+            book_object
+            for category_object in self.library.categories.values()
+            for book_object in category_object.books.values()
+        )
+
+        self.logger.write(
+            log_level="info",
+            message="History updated: {added} added, {changed} changed, "
+            "{removed} removed, {unchanged} unchanged.",
+            **counts,
+        )
 
     def parse_config(self):
         """Parses configuration from the config.yaml to a dict."""
 
-        package_dir = Path(__file__).parent
-        config_path = package_dir.joinpath("config.yml").resolve()
-
-        with open(str(config_path)) as config_file:
-            self.config = yaml.load(config_file, Loader=yaml.FullLoader)
+        self.config = load_config()
 
     def scrap_homepage(self):
         """Home page scraping process.
         Drives the library's categories increment.
         """
 
-        soup = self.create_soup()
+        with self.fetcher.tracer.span("home", url=self.website_url):
+            soup = self.create_soup()
 
-        raw_category_list = self.find_category_list(soup=soup)
+            raw_category_list = self.find_category_list(soup=soup)
 
         self.instantiate_categories(raw_category_list=raw_category_list)
 
@@ -83,7 +390,7 @@ class Handler:
             BeautifulSoup: Object to work with during further scraping.
         """
 
-        raw_response = requests.get(self.website_url)
+        raw_response = self.fetcher.get(self.website_url)
 
         if raw_response.status_code != 200:
             self.logger.write(
@@ -97,7 +404,9 @@ class Handler:
             message="Received response for main page with status code 200.",
         )
 
-        soup = BeautifulSoup(raw_response.content, "html.parser")
+        soup = BeautifulSoup(
+            self.fetcher.decoder.decode(raw_response, kind="home"), "html.parser"
+        )
 
         return soup
 
@@ -142,20 +451,243 @@ class Handler:
         return raw_category_list
 
     def instantiate_categories(self, raw_category_list: element.ResultSet):
-        """Parse categories in previously found results and instantiate
-        Category objects with library.create_category method.
+        """Parse categories in previously found results, then scrap them
+        in two phases through a worker pool: first pages are fetched
+        concurrently to learn category sizes, and books listed by several
+        categories are given to one of them, then categories are
+        scrapped in priority order, largest first by default, so that
+        the biggest ones do not finish alone at the end of the run.
 
         Args:
             raw_category_list (element.ResultSet): Results previously scrapped.
         """
 
+        # Only categories matching names or patterns listed in config are
+        # scrapped, if any. Others are never fetched.
+        selected = self.config.get("categories")
+        if selected is not None:
+            selected = [pattern.lower() for pattern in selected]
+        unmatched = set(selected or ())
+
+        categories = []
+        for cat in raw_category_list:
+            url = cat.find("a")["href"]
+
+            name = cat.get_text().strip()
+
+            if selected is not None:
+                matching = [
+                    pattern
+                    for pattern in selected
+                    if fnmatch.fnmatchcase(name.lower(), pattern)
+                ]
+                if not matching:
+                    continue
+                unmatched.difference_update(matching)
+
+            categories.append(
+                self.library.new_category(name=name, url=urljoin(self.website_url, url))
+            )
+
+        for pattern in unmatched:
+            self.logger.write(
+                log_level="warning",
+                message="No category matching '{name}' on website.",
+                name=pattern,
+            )
+
         # Inform the user if logging outputs to file
         if self.logger.log_to_file:
             print(" - Scraping...")
-        # Disable progress bar if logging outputs to terminal
-        for cat in tqdm(raw_category_list, disable=not (self.logger.log_to_file)):
-            url = cat.find("a")["href"]
 
-            name = cat.get_text().strip()
+        # Spans opened by workers are children of the run span.
+        bind = self.fetcher.tracer.bind
+
+        with ThreadPoolExecutor(
+            max_workers=self.config.get("scrape_workers", 1)
+        ) as executor:
+            for future in [
+                executor.submit(bind(category_object.plan))
+                for category_object in categories
+            ]:
+                future.result()
+
+            self.assign_books(categories=categories, executor=executor)
+
+            if self.config.get("pipeline", False):
+                self.scrap_in_stages(categories=self.schedule(categories=categories))
+            else:
+                futures = [
+                    executor.submit(bind(category_object.scrap))
+                    for category_object in self.schedule(categories=categories)
+                ]
+
+                # Disable progress bar if logging outputs to terminal
+                for future in tqdm(
+                    as_completed(futures),
+                    total=len(futures),
+                    disable=not (self.logger.log_to_file),
+                ):
+                    future.result()
+
+        # Keep website order, so that output does not depend on scheduling.
+        # Categories skipped entirely by budget are left out.
+        for category_object in categories:
+            if category_object.complete or category_object.books:
+                self.library.add_category(category_object)
+
+    def assign_books(self, categories: list, executor: ThreadPoolExecutor):
+        """Lists book URLs of planned categories concurrently, then gives
+        each book listed by several categories to the first of them on
+        home page. Its category then does not depend on which worker
+        lists it first, and is the same from one run to another.
+
+        Args:
+            categories (list): Planned Category objects, in website order.
+            executor (ThreadPoolExecutor): Category worker pool.
+        """
+
+        if len(categories) < 2:
+            return
+
+        bind = self.fetcher.tracer.bind
+        listings = [
+            executor.submit(bind(category_object.list_urls))
+            for category_object in categories
+        ]
+
+        seen = self.library.seen
+        owned = SeenUrls(
+            exact_limit=seen.exact_limit,
+            bloom_capacity=seen.bloom_capacity,
+            error_rate=seen.error_rate,
+        )
+
+        for category_object, future in zip(categories, listings):
+            # Books listed twice by the same category stay its own.
+            for url in dict.fromkeys(map(canonical_url, future.result())):
+                if not owned.add(url):
+                    category_object.foreign.add(url)
+
+    def scrap_in_stages(self, categories: list):
+        """Scraps planned categories through a crawl pipeline, see
+        pipeline module, and reports its stages.
+
+        Args:
+            categories (list): Planned Category objects, in scraping order.
+        """
+
+        from oc_web_scraper.pipeline import STAGES, CrawlPipeline
+
+        # Images are spooled while scraping, then linked by saving process.
+        saver = None
+        if self.saver is not None and "image_url" in self.fields:
+            saver = self.saver
+            saver.open_spool()
+
+        self.pipeline = CrawlPipeline(
+            logger=self.logger,
+            fetcher=self.fetcher,
+            saver=saver,
+            workers={
+                name: self.config.get("pipeline_{name}_workers".format(name=name), 1)
+                for name in STAGES
+            },
+            queue_size=self.config.get("pipeline_queue_size", 256),
+        )
+
+        self.pipeline.start()
+        try:
+            for category_object in categories:
+                category_object.pipeline = self.pipeline
+                self.pipeline.put("discover", category_object)
+        finally:
+            self.pipeline.join()
+
+        self.report_stages()
+
+    def report_stages(self):
+        """Logs worker count, utilization and queue depth of every crawl
+        pipeline stage, and the busiest one."""
+
+        message = (
+            "Stage {stage}: {workers} worker(s), {items} item(s), "
+            "{utilization:.0%} busy, queue depth {mean_depth:.1f} mean "
+            "{max_depth} max, producers blocked {blocked}s."
+        )
+
+        for counts in self.pipeline.stats():
+            self.logger.write(log_level="info", message=message, **counts)
+
+            # Inform the user if logging outputs to file
+            if self.logger.log_to_file:
+                print(" - " + message.format(**counts))
+
+        message = "Bottleneck stage: {stage}."
+        bottleneck = self.pipeline.bottleneck()
+
+        self.logger.write(log_level="info", message=message, stage=bottleneck)
+
+        # Inform the user if logging outputs to file
+        if self.logger.log_to_file:
+            print(" - " + message.format(stage=bottleneck))
+
+    def schedule(self, categories: list):
+        """Orders planned categories according to scrape priority
+        set in config.yml file.
+
+        Args:
+            categories (list): Planned Category objects, in website order.
+
+        Raises:
+            _CUSTOM_ERRORS.CouldNotParseScrapePriority: If scrape priority
+            is not recognized.
+
+        Returns:
+            list: Category objects in scraping order.
+        """
+
+        priority = self.config.get("scrape_priority", "largest")
+
+        if priority == "page":
+            return list(categories)
+
+        if priority == "largest":
+            return sorted(
+                categories,
+                key=lambda category_object: category_object.number_of_books,
+                reverse=True,
+            )
+
+        if priority == "changed":
+            last_changes = self.last_change_by_category()
+
+            return sorted(
+                categories,
+                key=lambda category_object: (
+                    last_changes.get(category_object.name, ""),
+                    category_object.number_of_books,
+                ),
+                reverse=True,
+            )
+
+        raise _CUSTOM_ERRORS.CouldNotParseScrapePriority(priority=priority)
+
+    def last_change_by_category(self):
+        """Finds most recent price or stock change of each category,
+        from history and previously saved data.
+
+        Returns:
+            dict: Format is "category name": timestamp.
+        """
+
+        from oc_web_scraper.data_tree import DataTree
+        from oc_web_scraper.history import History
+
+        data_tree = DataTree(save_path=self.config["save_path"])
+        if not data_tree.exists():
+            return {}
+
+        history = History(path=self.config.get("history_path", self.config["save_path"]))
 
-            self.library.create_category(name=name, url=self.website_url + url)
+        return history.last_change_by_category(rows=data_tree.iter_rows())
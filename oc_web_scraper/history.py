@@ -0,0 +1,297 @@
+import hashlib
+import json
+import time
+
+from bisect import bisect_right
+from pathlib import Path
+
+from oc_web_scraper.index import parse_price
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# Fields tracked across runs, compared to detect changes.
+TRACKED_FIELDS = (
+    "price_including_tax",
+    "price_excluding_tax",
+    "number_available",
+    "review_rating",
+    "description_hash",
+)
+
+# Book fields read by book_state, a run must scrape them all to be recorded.
+SOURCE_FIELDS = (
+    "upc",
+    "price_including_tax",
+    "price_excluding_tax",
+    "number_available",
+    "review_rating",
+    "product_description",
+)
+
+
+def now():
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime())
+
+
+def end_of_day(timestamp: str):
+    """Extends a date without time to the end of that day.
+
+    Args:
+        timestamp (str): Date or timestamp.
+
+    Returns:
+        str: Timestamp.
+    """
+
+    return timestamp + "T23:59:59" if len(timestamp) == 10 else timestamp
+
+
+def book_state(book):
+    """Returns tracked fields of a scraped book.
+
+    Args:
+        book (Book): Scraped book.
+
+    Returns:
+        dict: Tracked values, prices in minor units.
+    """
+
+    description = book.product_description or ""
+
+    return {
+        "price_including_tax": parse_price(book.price_including_tax),
+        "price_excluding_tax": parse_price(book.price_excluding_tax),
+        "number_available": book.number_available,
+        "review_rating": book.review_rating,
+        "description_hash": hashlib.sha1(description.encode("utf-8")).hexdigest()[:16],
+    }
+
+
+class History:
+    """History class keeps price and stock history of books across runs
+    in an append-only JSON lines file keyed by UPC.
+
+    Each run appends one line per book that appeared, changed or
+    disappeared since the previous run, holding changed fields only, so
+    that the file grows with the amount of change rather than with the
+    catalogue size. Timestamps are UTC ISO-8601 strings, which sort in
+    chronological order, so dates such as "2021-03-01" can be compared
+    with them directly.
+
+    Attributes:
+        history_file (Path): History file.
+        timelines (dict): Format is "upc": ([timestamps], [changes]), a
+        None change meaning that the book disappeared.
+        current (dict): Format is "upc": state, as of last run.
+        runs (list): Timestamps of recorded runs.
+    """
+
+    def __init__(self, path: str):
+        """Constructor for History class.
+
+        Args:
+            path (str): Directory holding history file.
+        """
+
+        self.history_file = Path(path).joinpath("web_scraper_history.jsonl")
+        self.timelines = {}
+        self.current = {}
+        self.runs = []
+
+        self.load()
+
+    def load(self):
+        """Replays history file to rebuild timelines and current state."""
+
+        if not self.history_file.exists():
+            return
+
+        with open(self.history_file) as history_file:
+            for line in history_file:
+                entry = json.loads(line)
+
+                if "run" in entry:
+                    self.runs.append(entry["t"])
+                    continue
+
+                self.apply(timestamp=entry["t"], upc=entry["upc"], changes=entry["c"])
+
+    def apply(self, timestamp: str, upc: str, changes: dict):
+        """Applies a change record to timelines and current state.
+
+        Args:
+            timestamp (str): Run timestamp.
+            upc (str): Book UPC.
+            changes (dict): Changed fields, None if the book disappeared.
+        """
+
+        timestamps, timeline = self.timelines.setdefault(upc, ([], []))
+        timestamps.append(timestamp)
+        timeline.append(changes)
+
+        if changes is None:
+            self.current.pop(upc, None)
+        else:
+            self.current.setdefault(upc, {}).update(changes)
+
+    def record_run(self, books, timestamp: str = None):
+        """Compares scraped books with last recorded state and appends
+        the differences to the history file.
+
+        Args:
+            books (iterable): Scraped books.
+            timestamp (str): Run timestamp, current UTC time if omitted.
+
+        Returns:
+            dict: Number of books added, changed, removed and unchanged.
+        """
+
+        timestamp = timestamp or now()
+        counts = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        records = []
+        seen = set()
+
+        for book in books:
+            if book.upc in seen:
+                continue
+            seen.add(book.upc)
+
+            state = book_state(book)
+            previous = self.current.get(book.upc)
+
+            if previous is None:
+                changes = state
+                counts["added"] += 1
+            else:
+                changes = {
+                    field: state[field]
+                    for field in TRACKED_FIELDS
+                    if previous.get(field) != state[field]
+                }
+                if not changes:
+                    counts["unchanged"] += 1
+                    continue
+                counts["changed"] += 1
+
+            records.append((book.upc, changes))
+
+        for upc in self.current.keys() - seen:
+            records.append((upc, None))
+            counts["removed"] += 1
+
+        lines = [json.dumps({"t": timestamp, "run": counts})]
+        for upc, changes in records:
+            lines.append(json.dumps({"t": timestamp, "upc": upc, "c": changes}))
+            self.apply(timestamp=timestamp, upc=upc, changes=changes)
+
+        self.runs.append(timestamp)
+
+        with open(self.history_file, "a") as history_file:
+            history_file.write("\n".join(lines) + "\n")
+
+        return counts
+
+    def state_as_of(self, upc: str, timestamp: str):
+        """Rebuilds a book state at a given time.
+
+        Args:
+            upc (str): Book UPC.
+            timestamp (str): Date or timestamp, inclusive.
+
+        Returns:
+            dict: Tracked values, None if the book was not listed then.
+        """
+
+        timestamp = end_of_day(timestamp)
+
+        if upc not in self.timelines:
+            return None
+
+        timestamps, timeline = self.timelines[upc]
+        stop = bisect_right(timestamps, timestamp)
+
+        # Only changes since the last disappearance are relevant.
+        state = None
+        for changes in timeline[:stop]:
+            if changes is None:
+                state = None
+            else:
+                state = dict(state or {}, **changes)
+
+        return state
+
+    def as_of(self, timestamp: str):
+        """Rebuilds every book state at a given time.
+
+        Args:
+            timestamp (str): Date or timestamp, inclusive.
+
+        Returns:
+            dict: Format is "upc": state, for books listed then.
+        """
+
+        timestamp = end_of_day(timestamp)
+
+        states = {}
+
+        for upc in self.timelines:
+            state = self.state_as_of(upc=upc, timestamp=timestamp)
+
+            if state is not None:
+                states[upc] = state
+
+        return states
+
+    def since(self, timestamp: str):
+        """Lists changes recorded after a given time. A date alone means
+        the end of that day, as for as_of, so that changes of that day
+        are in its state and not after it.
+
+        Args:
+            timestamp (str): Date or timestamp, exclusive.
+
+        Returns:
+            list: (timestamp, upc, changes) tuples sorted by timestamp, a
+            None change meaning that the book disappeared.
+        """
+
+        timestamp = end_of_day(timestamp)
+
+        changes = []
+
+        for upc, (timestamps, timeline) in self.timelines.items():
+            start = bisect_right(timestamps, timestamp)
+            changes.extend(
+                zip(timestamps[start:], [upc] * (len(timestamps) - start), timeline[start:])
+            )
+
+        changes.sort(key=lambda change: change[0])
+
+        return changes
+
+    def last_change_by_category(self, rows):
+        """Returns time of the most recent change in each category.
+
+        Args:
+            rows (iterable): Book rows with "UPC" and "Category" fields, as
+            yielded by DataTree.iter_rows.
+
+        Returns:
+            dict: Format is "category name": timestamp.
+        """
+
+        last_changes = {}
+
+        for row in rows:
+            timeline = self.timelines.get(row.get("UPC"))
+
+            if timeline is None:
+                continue
+
+            category = row.get("Category")
+            last_change = timeline[0][-1]
+
+            if last_change > last_changes.get(category, ""):
+                last_changes[category] = last_change
+
+        return last_changes
@@ -0,0 +1,266 @@
+"""Packed image store: every cover image of a run appended to a single
+blob file, with an index mapping image URLs, book UPCs and book URLs to
+offsets in the blob.
+
+    data/images.pack        image bytes, one after another
+    data/images.index.json  {"version": 1,
+                             "images": {"image url": [offset, length]},
+                             "books": [{"upc", "url", "image", "path"}]}
+
+A cover shared by several books is stored once. "path" is the image
+file a book would get in the per category layout, relative to the data
+directory, so that the pack can be unpacked into it.
+"""
+
+import json
+import mmap
+import os
+import threading
+
+from pathlib import Path
+
+from oc_web_scraper import errors as _CUSTOM_ERRORS
+from oc_web_scraper.seen import canonical_url
+
+PACK_FILENAME = "images.pack"
+INDEX_FILENAME = "images.index.json"
+VERSION = 1
+
+
+class PackWriter:
+    """PackWriter class appends images to a pack file from several
+    threads, then writes its index.
+
+    Attributes:
+        pack_file (Path): Blob file, opened in append mode.
+        index_file (Path): Index file, written on close.
+        images (dict): Format is "canonical image url": (offset, length).
+        books (list): Book entries of index.
+    """
+
+    def __init__(self, path: str):
+        """Constructor for PackWriter class.
+
+        Args:
+            path (str): Directory receiving pack and index files.
+        """
+
+        self.pack_file = Path(path).joinpath(PACK_FILENAME)
+        self.index_file = Path(path).joinpath(INDEX_FILENAME)
+        self.images = {}
+        self.books = []
+
+        self._lock = threading.Lock()
+        self._file = open(self.pack_file, "ab")
+        self._offset = self._file.tell()
+
+    def add_image(self, image_url: str, content: bytes):
+        """Appends an image, unless already stored.
+
+        Args:
+            image_url (str): Image URL.
+            content (bytes): Image bytes.
+        """
+
+        key = canonical_url(image_url)
+
+        with self._lock:
+            if key in self.images:
+                return
+
+            self._file.write(content)
+            self.images[key] = (self._offset, len(content))
+            self._offset += len(content)
+
+    def add_book(self, upc: str, url: str, image_url: str, path: str):
+        """Indexes the image of a book.
+
+        Args:
+            upc (str): Book UPC.
+            url (str): Book page URL.
+            image_url (str): Book cover image URL.
+            path (str): Image file path in per category layout, relative
+            to data directory.
+        """
+
+        with self._lock:
+            self.books.append(
+                {
+                    "upc": upc,
+                    "url": url,
+                    "image": canonical_url(image_url) if image_url else None,
+                    "path": path,
+                }
+            )
+
+    def close(self):
+        """Flushes pack file and writes index next to it."""
+
+        self._file.close()
+
+        temporary_path = self.index_file.with_name(self.index_file.name + ".tmp")
+        with open(temporary_path, "w", encoding="utf-8") as index_fp:
+            json.dump(
+                {"version": VERSION, "images": self.images, "books": self.books},
+                index_fp,
+            )
+
+        os.replace(temporary_path, self.index_file)
+
+
+class PackReader:
+    """PackReader class reads images from a pack through a memory map:
+    returned images are memoryviews over the mapped file, nothing is
+    copied until the caller does.
+
+    Views must be released before the reader is closed.
+
+    Attributes:
+        pack_file (Path): Blob file.
+        images (dict): Format is "canonical image url": (offset, length).
+        books (list): Book entries of index.
+        by_upc (dict): Format is "upc": book entry.
+        by_url (dict): Format is "canonical book url": book entry.
+    """
+
+    def __init__(self, path: str):
+        """Constructor for PackReader class.
+
+        Args:
+            path (str): Directory holding pack and index files.
+
+        Raises:
+            _CUSTOM_ERRORS.UnsupportedImagePack: If index is missing or
+            of another version.
+        """
+
+        self.pack_file = Path(path).joinpath(PACK_FILENAME)
+        index_file = Path(path).joinpath(INDEX_FILENAME)
+
+        if not index_file.exists() or not self.pack_file.exists():
+            raise _CUSTOM_ERRORS.UnsupportedImagePack(
+                path=self.pack_file, reason="missing pack or index file"
+            )
+
+        with open(index_file, encoding="utf-8") as index_fp:
+            index = json.load(index_fp)
+
+        if index.get("version") != VERSION:
+            raise _CUSTOM_ERRORS.UnsupportedImagePack(
+                path=self.pack_file,
+                reason="version {version}".format(version=index.get("version")),
+            )
+
+        self.images = {key: tuple(value) for key, value in index["images"].items()}
+        self.books = index["books"]
+        self.by_upc = {book["upc"]: book for book in self.books if book["upc"]}
+        self.by_url = {canonical_url(book["url"]): book for book in self.books}
+
+        self._file = open(self.pack_file, "rb")
+        # Empty files cannot be mapped.
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._map)
+        else:
+            self._map = None
+            self._view = memoryview(b"")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.images)
+
+    def __contains__(self, image_url: str):
+        return canonical_url(image_url) in self.images
+
+    def image(self, image_url: str):
+        """Returns an image by its URL.
+
+        Args:
+            image_url (str): Image URL.
+
+        Returns:
+            memoryview: Image bytes, None if not in pack.
+        """
+
+        location = self.images.get(canonical_url(image_url))
+        if location is None:
+            return None
+
+        offset, length = location
+
+        return self._view[offset : offset + length]
+
+    def book(self, upc: str = None, url: str = None):
+        """Returns index entry of a book, by UPC or page URL.
+
+        Args:
+            upc (str): Book UPC.
+            url (str): Book page URL.
+
+        Returns:
+            dict: Book entry, None if not indexed.
+        """
+
+        if upc is not None:
+            return self.by_upc.get(upc)
+
+        return self.by_url.get(canonical_url(url))
+
+    def get(self, upc: str = None, url: str = None):
+        """Returns cover image of a book, by UPC or page URL.
+
+        Args:
+            upc (str): Book UPC.
+            url (str): Book page URL.
+
+        Returns:
+            memoryview: Image bytes, None if book or image is not in pack.
+        """
+
+        book = self.book(upc=upc, url=url)
+        if book is None or book["image"] is None:
+            return None
+
+        return self.image(book["image"])
+
+    def size(self):
+        return len(self._view)
+
+    def unpack(self, output_path: str):
+        """Writes every indexed image to the per category layout, e.g.
+        CATEGORY/images/TITLE.jpg.
+
+        Args:
+            output_path (str): Data directory to unpack into.
+
+        Returns:
+            int: Number of image files written.
+        """
+
+        output_path = Path(output_path)
+        number_of_files = 0
+
+        for book in self.books:
+            if book["image"] not in self.images:
+                continue
+
+            image_file = output_path.joinpath(book["path"])
+            image_file.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(image_file, "wb") as out_file:
+                out_file.write(self.image(book["image"]))
+
+            number_of_files += 1
+
+        return number_of_files
+
+    def close(self):
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
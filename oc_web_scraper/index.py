@@ -0,0 +1,406 @@
+import re
+import threading
+
+from bisect import bisect_left, bisect_right
+from heapq import nlargest, nsmallest
+
+PRICE_PATTERN = re.compile(r"(\d+)(?:\.(\d{1,2}))?")
+
+
+def parse_price(raw_price: str):
+    """Converts a displayed price such as "£51.77" to integer minor units.
+
+    Args:
+        raw_price (str): Price as displayed on the website.
+
+    Returns:
+        int: Price in minor units (pence), None if no price is found.
+    """
+
+    if raw_price is None:
+        return None
+
+    match = PRICE_PATTERN.search(raw_price.replace(",", ""))
+
+    if match is None:
+        return None
+
+    return int(match.group(1)) * 100 + int((match.group(2) or "0").ljust(2, "0"))
+
+
+class SortedIndex:
+    """SortedIndex class keeps (key, position) pairs sorted, for range
+    and top-N queries. Pairs are appended as books are added and sorted
+    lazily at query time, which is cheap as Timsort merges sorted runs.
+
+    Attributes:
+        keys (list): Sorted (key, position) pairs.
+        dirty (bool): Pairs were appended since last sort.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.dirty = False
+
+    def add(self, key, position: int):
+        self.keys.append((key, position))
+        self.dirty = True
+
+    def sorted_keys(self):
+        if self.dirty:
+            self.keys.sort()
+            self.dirty = False
+
+        return self.keys
+
+    def range(self, low=None, high=None):
+        """Returns positions whose key is within bounds, both inclusive.
+
+        Args:
+            low: Lower bound, unbounded if None.
+            high: Upper bound, unbounded if None.
+
+        Returns:
+            list: Positions sorted by key.
+        """
+
+        keys = self.sorted_keys()
+
+        start = 0 if low is None else bisect_left(keys, (low, -1))
+        stop = len(keys) if high is None else bisect_right(keys, (high, float("inf")))
+
+        return [position for _, position in keys[start:stop]]
+
+    def count(self, low=None, high=None):
+        keys = self.sorted_keys()
+
+        start = 0 if low is None else bisect_left(keys, (low, -1))
+        stop = len(keys) if high is None else bisect_right(keys, (high, float("inf")))
+
+        return stop - start
+
+
+class LibraryIndex:
+    """LibraryIndex class keeps secondary indexes over scraped books,
+    updated as books are added, so that lookups and queries do not scan
+    the whole library.
+
+    Attributes:
+        books (list): Every indexed book, by insertion position.
+        by_upc (dict): Format is "upc": position.
+        by_url (dict): Format is "url": position.
+        by_category (dict): Format is "category name": [positions].
+        by_rating (dict): Format is rating: [positions].
+        in_stock (set): Positions of books with at least one available.
+        prices (SortedIndex): Positions sorted by price including tax.
+        availability (SortedIndex): Positions sorted by number available.
+    """
+
+    def __init__(self):
+        self.books = []
+        self.by_upc = {}
+        self.by_url = {}
+        self.by_category = {}
+        self.by_rating = {}
+        self.in_stock = set()
+        self.prices = SortedIndex()
+        self.availability = SortedIndex()
+
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.books)
+
+    def add_book(self, book):
+        """Adds a book to every index.
+
+        Args:
+            book (Book): Scraped book.
+        """
+
+        price = parse_price(book.price_including_tax)
+
+        with self.lock:
+            position = len(self.books)
+            self.books.append(book)
+
+            self.by_upc[book.upc] = position
+            self.by_url[book.url] = position
+            self.by_category.setdefault(book.category, []).append(position)
+            self.by_rating.setdefault(book.review_rating, []).append(position)
+
+            if book.number_available:
+                self.in_stock.add(position)
+                self.availability.add(book.number_available, position)
+            else:
+                self.availability.add(0, position)
+
+            if price is not None:
+                self.prices.add(price, position)
+
+    def get(self, upc: str = None, url: str = None):
+        """Looks a book up by UPC or URL.
+
+        Args:
+            upc (str): Book UPC.
+            url (str): Book page URL.
+
+        Returns:
+            Book: Matching book, None if not found.
+        """
+
+        position = self.by_upc.get(upc) if upc is not None else self.by_url.get(url)
+
+        return None if position is None else self.books[position]
+
+    def query(
+        self,
+        category: str = None,
+        rating: int = None,
+        min_price: int = None,
+        max_price: int = None,
+        min_available: int = None,
+        in_stock: bool = None,
+        order_by: str = None,
+        descending: bool = False,
+        limit: int = None,
+    ):
+        """Returns books matching every given filter. The most selective
+        index gives candidates, remaining filters are checked on them only.
+
+        Args:
+            category (str): Category name.
+            rating (int): Review rating, from 0 to 5.
+            min_price (int): Minimum price including tax, in minor units.
+            max_price (int): Maximum price including tax, in minor units.
+            min_available (int): Minimum number available.
+            in_stock (bool): Only books with (True) or without (False) stock.
+            order_by (str): "price" or "available", insertion order if None.
+            Books without price are left out of price ordering.
+            descending (bool): Reverse ordering.
+            limit (int): Maximum number of books returned (top-N).
+
+        Returns:
+            list: Matching books.
+        """
+
+        if limit is not None and limit <= 0:
+            return []
+
+        no_filter = all(
+            value is None
+            for value in (category, rating, min_price, max_price, min_available, in_stock)
+        )
+        if no_filter and order_by is not None and limit is not None:
+            return self.top(order_by=order_by, descending=descending, limit=limit)
+
+        with self.lock:
+            # Each candidate source: (estimated size, positions getter, filter key).
+            sources = []
+
+            if category is not None:
+                positions = self.by_category.get(category, [])
+                sources.append((len(positions), lambda p=positions: p, "category"))
+            if rating is not None:
+                positions = self.by_rating.get(rating, [])
+                sources.append((len(positions), lambda p=positions: p, "rating"))
+            if min_price is not None or max_price is not None:
+                sources.append(
+                    (
+                        self.prices.count(min_price, max_price),
+                        lambda: self.prices.range(min_price, max_price),
+                        "price",
+                    )
+                )
+            if min_available is not None:
+                sources.append(
+                    (
+                        self.availability.count(min_available, None),
+                        lambda: self.availability.range(min_available, None),
+                        "available",
+                    )
+                )
+            if in_stock is True:
+                sources.append((len(self.in_stock), lambda: self.in_stock, "in_stock"))
+
+            if sources:
+                size, get_positions, source = min(sources, key=lambda item: item[0])
+            else:
+                size, get_positions, source = len(self.books), None, None
+
+            # Walking the sorted index until limit matches are found reads
+            # about limit * len(books) / size entries, cheaper than
+            # filtering size candidates when they are many.
+            if order_by is not None and limit is not None:
+                if size * size > limit * len(self.books):
+                    return self.walk(
+                        order_by=order_by,
+                        descending=descending,
+                        limit=limit,
+                        filters=self.filters(
+                            category, rating, min_price, max_price, min_available, in_stock
+                        ),
+                    )
+
+            candidates = get_positions() if get_positions else range(len(self.books))
+            filters = self.filters(
+                category, rating, min_price, max_price, min_available, in_stock, source
+            )
+
+            positions = [
+                position
+                for position in candidates
+                if all(check(self.books[position]) for check in filters)
+            ]
+
+            if order_by is not None:
+                positions = self.order(positions, order_by, descending, limit)
+            else:
+                # Price and availability ranges are in value order, stock
+                # set in no order: back to insertion order before limit.
+                if source in ("price", "available", "in_stock"):
+                    positions.sort()
+                if limit is not None:
+                    positions = positions[:limit]
+
+            return [self.books[position] for position in positions]
+
+    def filters(
+        self,
+        category: str,
+        rating: int,
+        min_price: int,
+        max_price: int,
+        min_available: int,
+        in_stock: bool,
+        source: str = None,
+    ):
+        """Returns checks for every given filter, except the one whose
+        index gave the candidates.
+
+        Args:
+            source (str): Filter already applied by candidates, if any.
+            Other arguments are the query filters.
+
+        Returns:
+            list: Functions taking a book, returning True if it matches.
+        """
+
+        filters = []
+
+        if category is not None and source != "category":
+            filters.append(lambda book: book.category == category)
+        if rating is not None and source != "rating":
+            filters.append(lambda book: book.review_rating == rating)
+        if (min_price is not None or max_price is not None) and source != "price":
+            low = float("-inf") if min_price is None else min_price
+            high = float("inf") if max_price is None else max_price
+
+            # Books without price are not in the price index either.
+            def in_range(book):
+                price = parse_price(book.price_including_tax)
+                return price is not None and low <= price <= high
+
+            filters.append(in_range)
+        if min_available is not None and source != "available":
+            filters.append(lambda book: (book.number_available or 0) >= min_available)
+        if in_stock is not None and source != "in_stock":
+            filters.append(lambda book: bool(book.number_available) == in_stock)
+
+        return filters
+
+    def walk(self, order_by: str, descending: bool, limit: int, filters: list):
+        """Reads a sorted index in order, keeping the first books matching
+        every filter. Caller holds the lock.
+
+        Args:
+            order_by (str): "price" or "available".
+            descending (bool): Highest first.
+            limit (int): Number of books.
+            filters (list): Checks from filters().
+
+        Returns:
+            list: Books.
+        """
+
+        if limit <= 0:
+            return []
+
+        index = self.prices if order_by == "price" else self.availability
+        keys = index.sorted_keys()
+        books = []
+
+        for _, position in reversed(keys) if descending else keys:
+            book = self.books[position]
+
+            if all(check(book) for check in filters):
+                books.append(book)
+
+                if len(books) == limit:
+                    break
+
+        return books
+
+    def order(self, positions: list, order_by: str, descending: bool, limit: int):
+        """Orders positions by price or availability. Top-N uses a heap,
+        avoiding a full sort of candidates.
+
+        Args:
+            positions (list): Positions to order.
+            order_by (str): "price" or "available".
+            descending (bool): Reverse ordering.
+            limit (int): Maximum number of positions returned.
+
+        Returns:
+            list: Ordered positions.
+        """
+
+        # Same keys as the sorted indexes read by walk and top: books
+        # without price are not in the price index, ties go by position.
+        if order_by == "price":
+            prices = {
+                position: parse_price(self.books[position].price_including_tax)
+                for position in positions
+            }
+            positions = [
+                position for position in positions if prices[position] is not None
+            ]
+
+            def key(position):
+                return prices[position], position
+
+        else:
+
+            def key(position):
+                return self.books[position].number_available or 0, position
+
+        if limit is not None:
+            if descending:
+                return nlargest(limit, positions, key=key)
+            return nsmallest(limit, positions, key=key)
+
+        return sorted(positions, key=key, reverse=descending)
+
+    def top(self, order_by: str = "price", descending: bool = False, limit: int = 10):
+        """Returns the N cheapest/most expensive or least/most available
+        books straight from the sorted index.
+
+        Args:
+            order_by (str): "price" or "available".
+            descending (bool): Highest first.
+            limit (int): Number of books.
+
+        Returns:
+            list: Books.
+        """
+
+        if limit <= 0:
+            return []
+
+        index = self.prices if order_by == "price" else self.availability
+
+        with self.lock:
+            keys = index.sorted_keys()
+            selected = keys[-limit:][::-1] if descending else keys[:limit]
+
+            return [self.books[position] for _, position in selected]
@@ -1,5 +1,10 @@
 from oc_web_scraper.logger import Logger
+from oc_web_scraper.fetcher import Fetcher
+from oc_web_scraper.book import SCRAPED_FIELDS
 from oc_web_scraper.category import Category
+from oc_web_scraper.columns import BookColumns
+from oc_web_scraper.index import LibraryIndex
+from oc_web_scraper.seen import SeenUrls
 
 
 class Library:
@@ -8,18 +13,45 @@ class Library:
 
     Attributes:
         logger (Logger): Main app logger object. Passed in instantiation arguments.
-        categories (dict): Categories scrapped in the main website page."""
+        fetcher (Fetcher): Main app fetcher object. Passed in instantiation arguments.
+        seen (SeenUrls): Crawl-wide set of scheduled book URLs. Passed in
+        instantiation arguments.
+        on_book (callable): Given to categories, which then hand books to
+        it instead of keeping them. Passed in instantiation arguments.
+        fields (tuple): Book fields scrapped by categories. Passed in
+        instantiation arguments.
+        categories (dict): Categories scrapped in the main website page.
+        index (LibraryIndex): Secondary indexes over scrapped books, updated
+        as categories are added."""
 
-    def __init__(self, logger: Logger):
+    def __init__(
+        self,
+        logger: Logger,
+        fetcher: Fetcher,
+        seen: SeenUrls = None,
+        on_book=None,
+        fields: tuple = SCRAPED_FIELDS,
+    ):
         """Constructor for Library class.
 
         Args:
             logger (Logger): Main app logger object.
+            fetcher (Fetcher): Main app fetcher object.
+            seen (SeenUrls): Crawl-wide set of scheduled book URLs.
+            Created with default limits if omitted.
+            on_book (callable): Called with each scrapped Book instead of
+            keeping it, None to keep books.
+            fields (tuple): Book fields to scrap, see book.parse_fields.
         """
 
         self.logger = logger
+        self.fetcher = fetcher
+        self.seen = seen if seen is not None else SeenUrls()
+        self.on_book = on_book
+        self.fields = fields
 
         self.categories = {}
+        self.index = LibraryIndex()
 
     def create_category(self, name: str, url: str):
         """Instantiate a Category object with scrapped infos.
@@ -29,5 +61,75 @@ class Library:
             url (str): URL of the category page.
         """
 
-        category_object = Category(name=name, url=url, logger=self.logger)
-        self.categories[name] = category_object
\ No newline at end of file
+        category_object = self.new_category(name=name, url=url)
+        category_object.scrap()
+
+        self.add_category(category_object)
+
+    def new_category(self, name: str, url: str):
+        """Instantiate a Category object without scraping it, for
+        scheduled scraping.
+
+        Args:
+            name (str): Name of the category.
+            url (str): URL of the category page.
+
+        Returns:
+            Category: Category to plan and scrap.
+        """
+
+        return Category(
+            name=name,
+            url=url,
+            logger=self.logger,
+            fetcher=self.fetcher,
+            seen=self.seen,
+            lazy=True,
+            on_book=self.on_book,
+            fields=self.fields,
+        )
+
+    def add_category(self, category_object: Category):
+        """Adds a scrapped category to the library and its index.
+
+        Args:
+            category_object (Category): Scrapped category.
+        """
+
+        self.categories[category_object.name] = category_object
+
+        for book_object in category_object.books.values():
+            self.index.add_book(book_object)
+
+    def get_book(self, upc: str = None, url: str = None):
+        """Looks a book up by UPC or URL, without scanning categories.
+
+        Args:
+            upc (str): Book UPC.
+            url (str): Book page URL.
+
+        Returns:
+            Book: Matching book, None if not found.
+        """
+
+        return self.index.get(upc=upc, url=url)
+
+    def query(self, **filters):
+        """Queries scrapped books through library index.
+        See LibraryIndex.query for available filters.
+
+        Returns:
+            list: Matching books.
+        """
+
+        return self.index.query(**filters)
+
+    def columns(self):
+        """Returns a columnar view of scrapped books, for catalogue
+        analytics. See BookColumns.report.
+
+        Returns:
+            BookColumns: Typed numeric columns of every book.
+        """
+
+        return BookColumns.from_library(self)
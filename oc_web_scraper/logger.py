@@ -2,26 +2,87 @@ from datetime import datetime
 
 from pathlib import Path
 
+import json
 import logging
+import logging.handlers
+import queue
 
 from oc_web_scraper import errors as _CUSTOM_ERRORS
 
+LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
+
+
+class LazyMessage:
+    """Message template and its fields. Formatting is deferred until the
+    message is actually written, by the background listener thread."""
+
+    __slots__ = ("template", "fields")
+
+    def __init__(self, template: str, fields: dict):
+        self.template = template
+        self.fields = fields
+
+    def __str__(self):
+        if not self.fields:
+            return self.template
+
+        return self.template.format(**self.fields)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler enqueuing records as is. Default QueueHandler formats
+    records in the calling thread, which is what should be avoided here."""
+
+    def prepare(self, record: logging.LogRecord):
+        return record
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats records as JSON lines. Message fields (URL, stage,
+    duration...) are written as JSON keys."""
+
+    def format(self, record: logging.LogRecord):
+        document = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+
+        if isinstance(record.msg, LazyMessage):
+            document.update(record.msg.fields)
+
+        return json.dumps(document, default=str)
+
 
 class Logger:
     """Logger class manages logging process depending on config.yml file params.
     If enabled, will log to a file or to terminal with 'logging' library.
+    Records are handed to a queue and written by a background listener
+    thread, so that file or terminal writes never block scraping.
 
     Attributes:
         logger (logging.Logger): Proper 'logging' logger object if enabled.
         log_to_file (bool): If True, will not output anything in terminal
         and redirect stdout to selected file.
         log_path (str): Local path for log file.
-        log_level (str): Log level desired by user. Should match a level
-        of 'library' log level.
+        log_level (int): Log level desired by user, as a 'logging' library level.
+        log_format (logging.Formatter): Text or JSON lines formatter.
+        listener (logging.handlers.QueueListener): Background writer.
     """
 
     def __init__(
-        self, enable_logging: bool, log_to_file: bool, log_path: str, log_level: str
+        self,
+        enable_logging: bool,
+        log_to_file: bool,
+        log_path: str,
+        log_level: str,
+        log_format: str = "text",
     ):
         """Constructor for Logger class.
 
@@ -31,29 +92,42 @@ class Logger:
             log_path (str): Local path for log file.
             log_level (str): Log level desired by user. Should match a level
             of 'library' log level.
+            log_format (str): "text" or "json" for JSON lines.
         """
 
         self.enable_logging = enable_logging
+        self.logger = None
+        self.listener = None
+        self.log_to_file = log_to_file
+        self.log_path = log_path
 
         if not self.enable_logging:
             return
 
-        self.logger = None
-        self.log_to_file = log_to_file
-        self.log_path = log_path
         self.log_level = None
         self.set_log_level(log_level=log_level)
-        self.log_format = logging.Formatter(
-            "%(asctime)s - %(levelname)s - %(message)s", datefmt="%H:%M:%S"
-        )
+
+        if log_format == "json":
+            self.log_format = JsonLinesFormatter(datefmt="%Y-%m-%dT%H:%M:%S")
+        else:
+            self.log_format = logging.Formatter(
+                "%(asctime)s - %(levelname)s - %(message)s", datefmt="%H:%M:%S"
+            )
 
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(self.log_level)
+        self.logger.propagate = False
 
         if log_to_file:
-            self.start_logging_to_file()
+            output_handler = self.start_logging_to_file()
         else:
-            self.start_logging_to_terminal()
+            output_handler = self.start_logging_to_terminal()
+
+        log_queue = queue.SimpleQueue()
+        # Replace handlers left by a previous Logger instance.
+        self.logger.handlers = [DeferredQueueHandler(log_queue)]
+        self.listener = logging.handlers.QueueListener(log_queue, output_handler)
+        self.listener.start()
 
     def set_log_level(self, log_level: str):
         """Takes string given in config.yml file and set log level
@@ -68,21 +142,17 @@ class Logger:
 
         log_level = log_level.lower()
 
-        if log_level == "debug":
-            self.log_level = logging.DEBUG
-        elif log_level == "info":
-            self.log_level = logging.INFO
-        elif log_level == "warning":
-            self.log_level = logging.WARNING
-        elif log_level == "error":
-            self.log_level = logging.ERROR
-        elif log_level == "critical":
-            self.log_level = logging.CRITICAL
-        else:
+        if log_level not in LOG_LEVELS:
             raise _CUSTOM_ERRORS.CouldNotParseLogLevel(level=log_level)
 
+        self.log_level = LOG_LEVELS[log_level]
+
     def start_logging_to_file(self):
-        """If set so in config.yml, initiates logging to a file."""
+        """If set so in config.yml, initiates logging to a file.
+
+        Returns:
+            logging.Handler: Handler writing to log file.
+        """
 
         time = datetime.now().strftime("%Y-%m-%d-%H%M%S")
 
@@ -94,42 +164,60 @@ class Logger:
         file_handler.setLevel(self.log_level)
         file_handler.setFormatter(self.log_format)
 
-        self.logger.addHandler(file_handler)
+        return file_handler
 
     def start_logging_to_terminal(self):
-        """If set so in config.yml, initiates logging to terminal."""
+        """If set so in config.yml, initiates logging to terminal.
+
+        Returns:
+            logging.Handler: Handler writing to terminal.
+        """
 
         stream_handler = logging.StreamHandler()
         stream_handler.setLevel(self.log_level)
         stream_handler.setFormatter(self.log_format)
 
-        self.logger.addHandler(stream_handler)
+        return stream_handler
 
-    def write(self, log_level: str, message: str):
+    def is_enabled_for(self, log_level: str):
+        """Tells if a message of given level would be written. Lets call
+        sites skip computing costly fields.
+
+        Args:
+            log_level (str): Message log level.
+
+        Returns:
+            bool: Message would be written.
+        """
+
+        return self.enable_logging and self.logger.isEnabledFor(LOG_LEVELS[log_level])
+
+    def write(self, log_level: str, message: str, **fields):
         """Writes given message to either a file or terminal.
-        Handles returning if logging is disabled.
-        Logger object of 'logging' library handles not writing
-        anything if message level is lower than global set log level.
+        Handles returning if logging is disabled or if message level is
+        lower than global set log level, before any formatting happens.
 
         Args:
             log_level (str): Message log level.
-            message (str): Message text to print.
+            message (str): Message text to print. Used as a str.format
+            template if fields are given.
+            **fields: Template values, also written as JSON keys with
+            JSON lines format.
         """
 
         if not self.enable_logging:
             return
 
-        # Inform user when saving process starts if logging only outputs to file
-        if "Starting saving process" in "message" and self.log_to_file:
-            print("Saving...")
-
-        if log_level == "debug":
-            self.logger.debug(message)
-        elif log_level == "info":
-            self.logger.info(message)
-        elif log_level == "warning":
-            self.logger.warning(message)
-        elif log_level == "error":
-            self.logger.error(message)
-        elif log_level == "critical":
-            self.logger.critical(message)
+        level = LOG_LEVELS[log_level]
+
+        if not self.logger.isEnabledFor(level):
+            return
+
+        self.logger.log(level, LazyMessage(message, fields))
+
+    def stop(self):
+        """Flushes pending records and stops background listener."""
+
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ParseMemo:
+    """ParseMemo class maps the content hash of a page to the fields
+    extracted from it, so that a re-downloaded but byte-identical page
+    is not parsed again.
+
+    Keys cover everything extraction depends on: extractor version, page
+    URL, title found on the category page and page body. A bounded LRU
+    dict sits in front of a SQLite table kept across runs, the least
+    recently used entries being pruned from it when the memo is closed.
+
+    Attributes:
+        memo_file (Path): SQLite database file.
+        memory_entries (int): Maximum number of entries kept in memory.
+        disk_entries (int): Maximum number of entries kept on disk.
+        memory (OrderedDict): Format is "key": fields, least recently
+        used first.
+        memory_hits (int): Lookups answered from memory.
+        disk_hits (int): Lookups answered from disk.
+        misses (int): Lookups answered by neither tier.
+    """
+
+    # Uncommitted puts are committed in batches of this size.
+    COMMIT_EVERY = 500
+
+    def __init__(
+        self, path: str, memory_entries: int = 10000, disk_entries: int = 1000000
+    ):
+        """Constructor for ParseMemo class.
+
+        Args:
+            path (str): Directory holding memo database.
+            memory_entries (int): Maximum number of entries kept in memory.
+            disk_entries (int): Maximum number of entries kept on disk.
+        """
+
+        self.memo_file = Path(path).joinpath("web_scraper_parse_memo.sqlite")
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.lock = threading.Lock()
+        self.pending = 0
+        # Keys used since opening, to refresh their last use on close.
+        self.used = set()
+
+        # Shared by scraping workers, serialized by the lock.
+        self.connection = sqlite3.connect(str(self.memo_file), check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS memo "
+            "(key TEXT PRIMARY KEY, fields TEXT, used REAL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS memo_used ON memo (used)")
+
+    @staticmethod
+    def key(version: int, url: str, title: str, content: bytes):
+        """Computes memo key of a page.
+
+        Args:
+            version (int): Extractor version.
+            url (str): Page URL.
+            title (str): Title the page is parsed for.
+            content (bytes): Page body.
+
+        Returns:
+            str: Hex digest.
+        """
+
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(
+            "{version}\n{url}\n{title}\n".format(
+                version=version, url=url, title=title
+            ).encode("utf-8")
+        )
+        digest.update(content)
+
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """Looks a page up, in memory first, then on disk.
+
+        Args:
+            key (str): Memo key.
+
+        Returns:
+            dict: Extracted fields, None if the page was never parsed.
+        """
+
+        with self.lock:
+            fields = self.memory.get(key)
+
+            if fields is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                self.used.add(key)
+                return fields
+
+            row = self.connection.execute(
+                "SELECT fields FROM memo WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            fields = json.loads(row[0])
+            self.remember(key=key, fields=fields)
+            self.disk_hits += 1
+            self.used.add(key)
+
+            return fields
+
+    def put(self, key: str, fields: dict):
+        """Stores fields extracted from a page in both tiers.
+
+        Args:
+            key (str): Memo key.
+            fields (dict): Extracted fields, JSON serializable.
+        """
+
+        with self.lock:
+            self.remember(key=key, fields=fields)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO memo VALUES (?, ?, ?)",
+                (key, json.dumps(fields), time.time()),
+            )
+
+            self.pending += 1
+            if self.pending >= self.COMMIT_EVERY:
+                self.connection.commit()
+                self.pending = 0
+
+    def remember(self, key: str, fields: dict):
+        """Adds an entry to memory tier. Caller holds the lock."""
+
+        self.memory[key] = fields
+        self.memory.move_to_end(key)
+
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def reset_stats(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Returns lookup counts, for reports.
+
+        Returns:
+            dict: Memory hits, disk hits, misses and hit rate.
+        """
+
+        lookups = self.memory_hits + self.disk_hits + self.misses
+
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def flush(self):
+        """Commits pending entries, refreshes last use of used entries
+        and prunes least recently used ones beyond disk_entries."""
+
+        with self.lock:
+            now = time.time()
+            self.connection.executemany(
+                "UPDATE memo SET used = ? WHERE key = ?",
+                ((now, key) for key in self.used),
+            )
+            self.used = set()
+
+            self.connection.execute(
+                "DELETE FROM memo WHERE key IN (SELECT key FROM memo "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.disk_entries,),
+            )
+            self.connection.commit()
+            self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.connection.close()
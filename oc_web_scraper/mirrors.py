@@ -0,0 +1,267 @@
+import threading
+import time
+
+from urllib.parse import urlsplit, urlunsplit
+
+from oc_web_scraper import errors as _CUSTOM_ERRORS
+
+
+def base_url(url: str):
+    """Normalizes a website root URL: lowercased scheme and host,
+    trailing slash.
+
+    Args:
+        url (str): Website root URL, e.g. "http://cache-1:8000/books".
+
+    Raises:
+        _CUSTOM_ERRORS.CouldNotParseMirror: If URL is not an absolute
+        HTTP(S) URL.
+
+    Returns:
+        str: Base URL, e.g. "http://cache-1:8000/books/".
+    """
+
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ("http", "https") or not parts.netloc:
+        raise _CUSTOM_ERRORS.CouldNotParseMirror(mirror=url)
+
+    path = parts.path if parts.path.endswith("/") else parts.path + "/"
+
+    return "{scheme}://{netloc}{path}".format(
+        scheme=parts.scheme.lower(), netloc=parts.netloc.lower(), path=path
+    )
+
+
+class Mirror:
+    """Mirror class holds what is known of one copy of the website.
+
+    Attributes:
+        base (str): Base URL, ending with a slash.
+        latency (float): Moving average of response times in seconds,
+        None until a response is received.
+        in_flight (int): Requests being performed.
+        requests (int): Requests answered.
+        failures (int): Requests failed, all time.
+        consecutive_failures (int): Requests failed since last success.
+        down_until (float): Monotonic time before which the mirror is
+        not chosen, 0 while healthy.
+    """
+
+    def __init__(self, base: str):
+        self.base = base
+        self.latency = None
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+
+    def expected_wait(self):
+        # Unmeasured mirrors are tried first, to measure them.
+        return (self.latency or 0.0) * (self.in_flight + 1)
+
+
+class MirrorPool:
+    """MirrorPool class spreads requests for a website across equivalent
+    copies of it, by observed latency.
+
+    Each request goes to the healthy mirror with the shortest expected
+    wait, its latency times requests it already has in flight, so that
+    faster mirrors get proportionally more requests. A mirror failing
+    (connection error, 5xx or 429) is skipped for a cooldown doubling
+    with each consecutive failure, then gets requests again: the first
+    one acts as its health check.
+
+    Attributes:
+        mirrors (list): Mirror objects, website URL first.
+        cooldown (float): Seconds a mirror is skipped after a failure.
+        max_cooldown (float): Upper bound of cooldown.
+        smoothing (float): Weight of last response time in latency average.
+    """
+
+    def __init__(
+        self,
+        website_url: str,
+        mirrors: list,
+        cooldown: float = 5.0,
+        max_cooldown: float = 120.0,
+        smoothing: float = 0.2,
+    ):
+        """Constructor for MirrorPool class.
+
+        Args:
+            website_url (str): Website root URL, whose URLs are spread.
+            mirrors (list): Root URLs of equivalent copies of the website.
+            cooldown (float): Seconds a mirror is skipped after a failure.
+            max_cooldown (float): Upper bound of cooldown.
+            smoothing (float): Weight of last response time in latency average.
+
+        Raises:
+            _CUSTOM_ERRORS.CouldNotParseMirror: If a URL is not an
+            absolute HTTP(S) URL.
+        """
+
+        self.mirrors = []
+        for url in [website_url, *mirrors]:
+            base = base_url(url)
+            if base not in (mirror.base for mirror in self.mirrors):
+                self.mirrors.append(Mirror(base=base))
+
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.smoothing = smoothing
+
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.mirrors)
+
+    def relative(self, url: str):
+        """Returns URL relative to the mirror it belongs to.
+
+        Args:
+            url (str): Absolute URL, as found in pages of any mirror.
+
+        Returns:
+            str: Part of URL after mirror base, None if URL is not on
+            any mirror, e.g. an image hosted elsewhere.
+        """
+
+        parts = urlsplit(url)
+        normalized = urlunsplit(
+            (
+                parts.scheme.lower(),
+                parts.netloc.lower(),
+                parts.path or "/",
+                parts.query,
+                "",
+            )
+        )
+
+        for mirror in self.mirrors:
+            if normalized.startswith(mirror.base):
+                return normalized[len(mirror.base) :]
+
+        return None
+
+    def acquire(self, exclude: list = ()):
+        """Chooses the mirror for a request and counts it in flight.
+
+        Args:
+            exclude (list): Mirrors already tried for this request.
+
+        Returns:
+            Mirror: Healthy mirror with the shortest expected wait. If
+            every mirror left is down, the one coming back first, since
+            failing fast beats not trying. None if all were tried.
+        """
+
+        now = time.monotonic()
+
+        with self.lock:
+            candidates = [mirror for mirror in self.mirrors if mirror not in exclude]
+            if not candidates:
+                return None
+
+            healthy = [mirror for mirror in candidates if mirror.down_until <= now]
+            if healthy:
+                mirror = min(healthy, key=Mirror.expected_wait)
+            else:
+                mirror = min(candidates, key=lambda mirror: mirror.down_until)
+
+            mirror.in_flight += 1
+
+        return mirror
+
+    def begin(self, mirror: Mirror):
+        """Counts a request to a given mirror in flight, e.g. a health
+        check.
+
+        Args:
+            mirror (Mirror): Requested mirror.
+        """
+
+        with self.lock:
+            mirror.in_flight += 1
+
+    def release(self, mirror: Mirror):
+        """Stops counting a request in flight without recording its
+        outcome, e.g. interrupted by an error unrelated to the mirror.
+
+        Args:
+            mirror (Mirror): Requested mirror.
+        """
+
+        with self.lock:
+            mirror.in_flight -= 1
+
+    def succeeded(self, mirror: Mirror, seconds: float):
+        """Records a response.
+
+        Args:
+            mirror (Mirror): Mirror that answered.
+            seconds (float): Response time.
+        """
+
+        with self.lock:
+            mirror.in_flight -= 1
+            mirror.requests += 1
+            mirror.consecutive_failures = 0
+            mirror.down_until = 0.0
+
+            if mirror.latency is None:
+                mirror.latency = seconds
+            else:
+                mirror.latency += self.smoothing * (seconds - mirror.latency)
+
+    def failed(self, mirror: Mirror):
+        """Records a failed request and takes the mirror out of rotation
+        for its cooldown.
+
+        Args:
+            mirror (Mirror): Mirror that failed.
+
+        Returns:
+            float: Cooldown in seconds.
+        """
+
+        with self.lock:
+            mirror.in_flight -= 1
+            mirror.failures += 1
+            mirror.consecutive_failures += 1
+
+            cooldown = min(
+                self.max_cooldown,
+                self.cooldown * 2 ** (mirror.consecutive_failures - 1),
+            )
+            mirror.down_until = time.monotonic() + cooldown
+
+        return cooldown
+
+    def stats(self):
+        """Returns per mirror counts, for reports.
+
+        Returns:
+            list: Dicts with base URL, requests, failures, latency and
+            whether mirror is currently up.
+        """
+
+        now = time.monotonic()
+
+        with self.lock:
+            return [
+                {
+                    "base": mirror.base,
+                    "requests": mirror.requests,
+                    "failures": mirror.failures,
+                    "latency": mirror.latency,
+                    "up": mirror.down_until <= now,
+                }
+                for mirror in self.mirrors
+            ]
+
+    def reset_stats(self):
+        with self.lock:
+            for mirror in self.mirrors:
+                mirror.requests = 0
+                mirror.failures = 0
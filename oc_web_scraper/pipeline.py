@@ -0,0 +1,489 @@
+"""Staged crawl: each step of scraping runs in its own workers, reading
+items from a bounded queue and handing results to the next step.
+
+    discover  category pages, listing books       -> fetch (or extract)
+    fetch     book page requests                  -> parse
+    parse     parse memo lookup, HTML parsing     -> extract
+    extract   field extraction, book handed over  -> image
+    image     cover image download to Saver spool
+
+Network, CPU and disk work of different books then overlap, and the
+stage limiting throughput shows in its utilization and in the depth of
+its queue, so that its worker count can be raised on its own.
+"""
+
+import queue
+import threading
+import time
+
+from oc_web_scraper.book import LISTING_FIELDS
+from oc_web_scraper.fetcher import Fetcher
+from oc_web_scraper.logger import Logger
+
+STAGES = ("discover", "fetch", "parse", "extract", "image")
+
+
+class Stage:
+    """Stage class is one step of a pipeline: a bounded queue of items
+    and the workers processing them.
+
+    Attributes:
+        name (str): Stage name.
+        function (callable): Processes one item.
+        workers (int): Number of worker threads.
+        queue (queue.Queue): Pending items, None stopping a worker.
+        items (int): Number of items processed.
+        busy (float): Seconds spent by workers processing items, not
+        counting waits for room in next stages.
+        blocked (float): Seconds producers waited for queue space.
+        max_depth (int): Largest number of pending items seen.
+        depth_total (int): Sum of queue depths seen by producers, for
+        mean depth.
+        puts (int): Number of items queued.
+    """
+
+    def __init__(self, name: str, function, workers: int, queue_size: int):
+        """Constructor for Stage class.
+
+        Args:
+            name (str): Stage name.
+            function (callable): Processes one item.
+            workers (int): Number of worker threads.
+            queue_size (int): Maximum number of pending items.
+        """
+
+        self.name = name
+        self.function = function
+        self.workers = max(1, workers)
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.max_depth = 0
+        self.depth_total = 0
+        self.puts = 0
+
+        self.lock = threading.Lock()
+
+    def put(self, item):
+        """Queues an item, waiting while the queue is full.
+
+        Args:
+            item: Item to process.
+
+        Returns:
+            float: Seconds waited.
+        """
+
+        depth = self.queue.qsize()
+
+        start = time.perf_counter()
+        self.queue.put(item)
+        blocked = time.perf_counter() - start
+
+        with self.lock:
+            self.blocked += blocked
+            self.max_depth = max(self.max_depth, min(depth + 1, self.queue.maxsize))
+            self.depth_total += depth
+            self.puts += 1
+
+        return blocked
+
+    def stats(self, seconds: float):
+        """Returns stage counts, for reports.
+
+        Args:
+            seconds (float): Pipeline wall time.
+
+        Returns:
+            dict: Workers, items, busy seconds, utilization (busy share of
+            worker time), mean and max queue depth, producer blocked
+            seconds.
+        """
+
+        with self.lock:
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "items": self.items,
+                "busy": round(self.busy, 3),
+                "utilization": self.busy / (self.workers * seconds) if seconds else 0.0,
+                "mean_depth": self.depth_total / self.puts if self.puts else 0.0,
+                "max_depth": self.max_depth,
+                "blocked": round(self.blocked, 3),
+            }
+
+
+class Pipeline:
+    """Pipeline class runs stages connected by bounded queues, until every
+    queued item is processed.
+
+    Stages must form a chain without cycles, otherwise workers of a full
+    stage could wait on each other. A stage error stops processing: items
+    still queued are dropped, and the error is raised by join.
+
+    Attributes:
+        stages (dict): Format is "name": Stage, in pipeline order.
+        pending (int): Items queued or being processed, in every stage.
+        error (Exception): First error raised by a stage, if any.
+        started (float): Monotonic start time.
+        seconds (float): Wall time, once joined.
+        tracer (Tracer): Spans opened by workers are children of the span
+        open when the pipeline is started.
+    """
+
+    def __init__(self, tracer):
+        """Constructor for Pipeline class.
+
+        Args:
+            tracer (Tracer): Main app tracer, or NullTracer.
+        """
+
+        self.stages = {}
+        self.pending = 0
+        self.error = None
+        self.started = None
+        self.seconds = None
+        self.tracer = tracer
+
+        self.idle = threading.Condition()
+        self.threads = []
+        # Seconds the item being processed by a worker waited on next stages.
+        self.local = threading.local()
+
+    def add_stage(self, name: str, function, workers: int, queue_size: int):
+        """Adds a stage, after the previous ones.
+
+        Args:
+            name (str): Stage name.
+            function (callable): Processes one item, may put items in
+            next stages.
+            workers (int): Number of worker threads.
+            queue_size (int): Maximum number of pending items.
+        """
+
+        self.stages[name] = Stage(
+            name=name, function=function, workers=workers, queue_size=queue_size
+        )
+
+    def start(self):
+        """Starts workers of every stage."""
+
+        self.started = time.monotonic()
+
+        for stage in self.stages.values():
+            work = self.tracer.bind(self.work)
+
+            for number in range(stage.workers):
+                thread = threading.Thread(
+                    target=work,
+                    args=(stage,),
+                    name="{stage}-{num}".format(stage=stage.name, num=number),
+                    daemon=True,
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def put(self, name: str, item):
+        """Queues an item in a stage, waiting while its queue is full.
+        Dropped once a stage failed.
+
+        Args:
+            name (str): Stage name.
+            item: Item to process.
+        """
+
+        if self.error is not None:
+            return
+
+        with self.idle:
+            self.pending += 1
+
+        blocked = self.stages[name].put(item)
+        self.local.waited = getattr(self.local, "waited", 0.0) + blocked
+
+    def work(self, stage: Stage):
+        while True:
+            item = stage.queue.get()
+            if item is None:
+                break
+
+            try:
+                if self.error is None:
+                    self.local.waited = 0.0
+                    start = time.perf_counter()
+                    stage.function(item)
+                    busy = time.perf_counter() - start - self.local.waited
+
+                    with stage.lock:
+                        stage.items += 1
+                        stage.busy += busy
+            except Exception as error:
+                with self.idle:
+                    first = self.error is None
+                    if first:
+                        self.error = error
+                if first:
+                    self.failed(error)
+            finally:
+                # Otherwise kept alive while waiting for next item.
+                item = None
+                with self.idle:
+                    self.pending -= 1
+                    if self.pending == 0:
+                        self.idle.notify_all()
+
+    def failed(self, error: Exception):
+        """Called once, with the first stage error. Items still queued
+        are then dropped without being processed.
+
+        Args:
+            error (Exception): Stage error.
+        """
+
+    def join(self):
+        """Waits until every queued item is processed, then stops workers.
+
+        Raises:
+            Exception: First error raised by a stage.
+        """
+
+        with self.idle:
+            while self.pending:
+                self.idle.wait()
+
+        for stage in self.stages.values():
+            for _ in range(stage.workers):
+                stage.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+        self.seconds = time.monotonic() - self.started
+
+        if self.error is not None:
+            raise self.error
+
+    def stats(self):
+        """Returns counts of every stage, for reports.
+
+        Returns:
+            list: Stage.stats dicts, in pipeline order.
+        """
+
+        seconds = self.seconds
+        if seconds is None:
+            seconds = time.monotonic() - self.started
+
+        return [stage.stats(seconds=seconds) for stage in self.stages.values()]
+
+    def bottleneck(self):
+        """Returns the stage with the highest utilization.
+
+        Returns:
+            str: Stage name, None if nothing was processed.
+        """
+
+        busiest = max(self.stats(), key=lambda stats: stats["utilization"])
+
+        return busiest["stage"] if busiest["items"] else None
+
+
+class CrawlPipeline(Pipeline):
+    """CrawlPipeline class scraps categories and their books in stages,
+    see module docstring. Categories are put in the discover stage, and
+    hand their books to the pipeline as they list them.
+
+    Attributes:
+        logger (Logger): Main app logger object.
+        fetcher (Fetcher): Main app fetcher object.
+        saver (Saver): Saver spooling cover images, None to skip the
+        image stage.
+        hand_lock (threading.Lock): Serializes books handed to categories
+        and their queued counts.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        fetcher: Fetcher,
+        saver=None,
+        workers: dict = None,
+        queue_size: int = 256,
+    ):
+        """Constructor for CrawlPipeline class.
+
+        Args:
+            logger (Logger): Main app logger object.
+            fetcher (Fetcher): Main app fetcher object.
+            saver (Saver): Saver spooling cover images during the crawl,
+            None to leave them to the saving process.
+            workers (dict): Format is "stage name": number of workers,
+            1 for stages left out.
+            queue_size (int): Maximum number of pending items per stage.
+        """
+
+        super().__init__(tracer=fetcher.tracer)
+
+        self.logger = logger
+        self.fetcher = fetcher
+        self.saver = saver
+        self.hand_lock = threading.Lock()
+
+        workers = workers or {}
+        functions = {
+            "discover": self.discover,
+            "fetch": self.fetch,
+            "parse": self.parse,
+            "extract": self.extract,
+            "image": self.image,
+        }
+
+        for name in STAGES:
+            if name == "image" and saver is None:
+                continue
+            self.add_stage(
+                name=name,
+                function=functions[name],
+                workers=workers.get(name, 1),
+                queue_size=queue_size,
+            )
+
+    def failed(self, error: Exception):
+        # Pages held by dropped items are never released.
+        self.fetcher.memory.stop()
+
+    def put_book(self, category_object, book_object, listing=None):
+        """Queues a book listed by a category.
+
+        Args:
+            category_object (Category): Category listing the book.
+            book_object (Book): Lazy book, scrapped by next stages.
+            listing (element.Tag): Book element of the category page.
+        """
+
+        with self.hand_lock:
+            category_object.queued += 1
+
+        if listing is not None and set(book_object.fields) <= set(LISTING_FIELDS):
+            # Category page is decomposed once listed, read it right away.
+            book_object.scrap_listing(listing=listing)
+            self.put("extract", (category_object, book_object, None, None, None))
+            return
+
+        self.put("fetch", (category_object, book_object))
+
+    def listed(self, category_object):
+        """Called once every page of a category is listed.
+
+        Args:
+            category_object (Category): Listed category.
+        """
+
+        with self.hand_lock:
+            category_object.listed = True
+            finished = category_object.queued == 0
+
+        if finished:
+            category_object.finish()
+
+    def done(self, category_object):
+        """Called once a book of a category is handed over or skipped.
+        Caller holds hand_lock.
+
+        Args:
+            category_object (Category): Category of the book.
+
+        Returns:
+            bool: Book was the last one of a listed category, which the
+            caller finishes once it released hand_lock.
+        """
+
+        category_object.queued -= 1
+
+        return category_object.listed and category_object.queued == 0
+
+    def discover(self, category_object):
+        category_object.scrap()
+
+    def fetch(self, item):
+        category_object, book_object = item
+
+        # Books queued before the budget ran out are not fetched either.
+        if self.fetcher.budget.exhausted():
+            self.fetcher.budget.skip(
+                "book",
+                category=category_object.name,
+                title=book_object.title,
+                url=book_object.url,
+            )
+
+            with self.hand_lock:
+                category_object.complete = False
+                category_object.books.pop(book_object.url, None)
+                finished = self.done(category_object)
+
+            if finished:
+                category_object.finish()
+            return
+
+        raw_response, held = book_object.fetch_page()
+
+        self.put("parse", (category_object, book_object, raw_response, held))
+
+    def parse(self, item):
+        category_object, book_object, raw_response, held = item
+
+        soup = None
+        try:
+            with self.fetcher.tracer.span("parse", url=book_object.url) as span:
+                memo_key, hit = book_object.recall(raw_response=raw_response)
+                if memo_key is not None:
+                    span.set(memo="hit" if hit else "miss")
+
+                if not hit:
+                    soup = book_object.create_soup(raw_response=raw_response)
+        except Exception:
+            book_object.release_page(held=held, soup=soup)
+            raise
+
+        # Only the tree goes on, raw body is dropped with this item.
+        self.put("extract", (category_object, book_object, soup, memo_key, held))
+
+    def extract(self, item):
+        category_object, book_object, soup, memo_key, held = item
+
+        try:
+            with self.fetcher.tracer.span("extract", url=book_object.url):
+                if soup is not None:
+                    book_object.extract(soup=soup, memo_key=memo_key)
+        finally:
+            # Books read from their listing hold no page.
+            if held is not None:
+                book_object.release_page(held=held, soup=soup)
+
+        self.logger.write(
+            log_level="info",
+            message="Created book titled {title}.",
+            title=book_object.title,
+            url=book_object.url,
+            stage="book",
+        )
+
+        with self.hand_lock:
+            category_object.hand_book(book_object)
+            finished = self.done(category_object)
+
+        if finished:
+            category_object.finish()
+
+        if "image" in self.stages and book_object.image_url is not None:
+            self.put("image", book_object)
+
+    def image(self, book_object):
+        # Skipped images are recorded by the saving process, which does
+        # not download them either.
+        if self.fetcher.budget.exhausted():
+            return
+
+        self.saver.spool_image(title=book_object.title, image_url=book_object.image_url)
@@ -0,0 +1,272 @@
+import cProfile
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import inspect
+import importlib
+
+from pathlib import Path
+
+
+class Profiler:
+    """Profiler class wraps a whole run with cProfile and tracemalloc.
+    Time and memory are then broken down by stage, network and parsing
+    being reported apart from each other.
+
+    Threads started during the run (scraping, saving, sinks, pipeline
+    stages) get their own cProfile profiler, merged with the one of the
+    calling thread in reports, and every thread stack is sampled.
+
+    Attributes:
+        STAGES (tuple): Stage label, module and qualified name of the
+        function delimiting the stage.
+        output_dir (Path): Directory receiving profiling reports.
+        top (int): Number of allocation sites listed in report.
+        sample_interval (float): Seconds between two stack samples.
+        profile (cProfile.Profile): Underlying deterministic profiler,
+        of the calling thread.
+        thread_profiles (list): Profilers of threads started during run.
+        stacks (dict): Collapsed stacks sampled during run, rooted at
+        thread name without its number.
+        Format is "thread;root;...;leaf": number of samples.
+    """
+
+    STAGES = (
+        ("homepage", "oc_web_scraper.handler", "Handler.scrap_homepage"),
+        ("category", "oc_web_scraper.category", "Category.scrap_category"),
+        ("book", "oc_web_scraper.book", "Book.scrap_book"),
+        ("save", "oc_web_scraper.saver", "Saver.save_library"),
+        ("network", "requests.sessions", "Session.request"),
+        ("parsing", "bs4", "BeautifulSoup.__init__"),
+    )
+
+    def __init__(self, output_dir: str, top: int = 25, sample_interval: float = 0.005):
+        """Constructor for Profiler class.
+
+        Args:
+            output_dir (str): Directory receiving profiling reports.
+            top (int): Number of allocation sites listed in report.
+            sample_interval (float): Seconds between two stack samples.
+        """
+
+        self.output_dir = Path(output_dir)
+        self.top = top
+        self.sample_interval = sample_interval
+
+        self.profile = cProfile.Profile()
+        self.thread_profiles = []
+        self.stacks = {}
+        self.snapshot = None
+        self.peak_memory = 0
+        self.wall_time = 0
+
+        self._start_time = None
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        self.write_reports()
+
+    def start(self):
+        """Starts memory tracing, stack sampling and profiling of the
+        calling thread and of threads it starts."""
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        tracemalloc.start(64)
+
+        self._stop_sampling.clear()
+        self._sampler = threading.Thread(target=self.sample_stacks, daemon=True)
+        self._sampler.start()
+
+        self._start_time = time.perf_counter()
+        threading.setprofile(self.profile_thread)
+        self.profile.enable()
+
+    def profile_thread(self, frame, event, arg):
+        """Profile function installed in threads before they run, which
+        replaces itself with a cProfile profiler of the thread."""
+
+        profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from a single profiler.
+            sys.setprofile(None)
+            return
+
+        with self._lock:
+            self.thread_profiles.append(profile)
+
+    def stop(self):
+        """Stops profiling and keeps a final memory snapshot."""
+
+        self.profile.disable()
+        threading.setprofile(None)
+        self.wall_time = time.perf_counter() - self._start_time
+
+        self._stop_sampling.set()
+        self._sampler.join()
+
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        self.snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    def sample_stacks(self):
+        """Periodically samples the stack of every thread but the sampler
+        and folds them into collapsed stacks, as used by flamegraph
+        tools. Threads of a pool share their root, e.g. "fetch"."""
+
+        sampler_id = threading.get_ident()
+
+        while not self._stop_sampling.wait(self.sample_interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == sampler_id:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    stack.append(
+                        "{module}:{function}".format(
+                            module=frame.f_globals.get("__name__", "?"),
+                            function=frame.f_code.co_name,
+                        )
+                    )
+                    frame = frame.f_back
+
+                stack.append(names.get(thread_id, "?").rstrip("0123456789-_") or "?")
+
+                folded = ";".join(reversed(stack))
+                self.stacks[folded] = self.stacks.get(folded, 0) + 1
+
+    def resolve_stages(self):
+        """Resolves stage functions to their code objects. Stages whose
+        module cannot be imported are left out.
+
+        Returns:
+            list: Tuples of stage label and code object.
+        """
+
+        stages = []
+
+        for label, module_name, qualified_name in self.STAGES:
+            try:
+                target = importlib.import_module(module_name)
+            except ImportError:
+                continue
+
+            for name in qualified_name.split("."):
+                target = getattr(target, name)
+
+            stages.append((label, target.__code__))
+
+        return stages
+
+    def stage_times(self, stats: pstats.Stats):
+        """Computes cumulative time spent in each stage.
+
+        Args:
+            stats (pstats.Stats): Stats of the profiled run.
+
+        Returns:
+            dict: Format is "stage": (number of calls, cumulative seconds).
+        """
+
+        times = {}
+
+        for label, code in self.resolve_stages():
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            _, calls, _, cumulative, _ = stats.stats.get(key, (0, 0, 0, 0, {}))
+            times[label] = (calls, cumulative)
+
+        return times
+
+    def stage_memory(self):
+        """Attributes memory still allocated at the end of the run to
+        stages, using allocation tracebacks.
+
+        Returns:
+            dict: Format is "stage": allocated bytes.
+        """
+
+        ranges = []
+        for label, code in self.resolve_stages():
+            lines, first_line = inspect.getsourcelines(code)
+            ranges.append(
+                (label, code.co_filename, first_line, first_line + len(lines))
+            )
+
+        memory = {label: 0 for label, *_ in ranges}
+
+        for stat in self.snapshot.statistics("traceback"):
+            for label, filename, first_line, last_line in ranges:
+                for frame in stat.traceback:
+                    if (
+                        frame.filename == filename
+                        and first_line <= frame.lineno < last_line
+                    ):
+                        memory[label] += stat.size
+                        break
+
+        return memory
+
+    def write_reports(self):
+        """Writes pstats file, collapsed stacks and a text report
+        with stage breakdown and top allocation sites."""
+
+        pstats_path = self.output_dir.joinpath("profile.pstats")
+        stats = pstats.Stats(self.profile)
+        with self._lock:
+            for profile in self.thread_profiles:
+                stats.add(profile)
+        stats.dump_stats(str(pstats_path))
+
+        with open(self.output_dir.joinpath("stacks.collapsed"), "w") as stacks_file:
+            for stack, count in sorted(self.stacks.items()):
+                stacks_file.write("{stack} {count}\n".format(stack=stack, count=count))
+
+        times = self.stage_times(stats=stats)
+        memory = self.stage_memory()
+
+        report = "Wall time: {wall:.3f}s\n".format(wall=self.wall_time)
+        # Cumulative times add up across threads, beyond wall time.
+        report += "Profiled threads: {num}\n".format(
+            num=len(self.thread_profiles) + 1
+        )
+        report += "Peak traced memory: {peak:.1f} KiB\n\n".format(
+            peak=self.peak_memory / 1024
+        )
+        report += "{:<10} {:>8} {:>12} {:>14}\n".format(
+            "Stage", "Calls", "Cumul. (s)", "Retained (KiB)"
+        )
+        for label in times:
+            calls, cumulative = times[label]
+            report += "{:<10} {:>8} {:>12.3f} {:>14.1f}\n".format(
+                label, calls, cumulative, memory[label] / 1024
+            )
+
+        report += "\nTop {top} allocation sites:\n".format(top=self.top)
+        for stat in self.snapshot.statistics("lineno")[: self.top]:
+            frame = stat.traceback[0]
+            report += "{size:>10.1f} KiB {count:>8} blocks  {file}:{line}\n".format(
+                size=stat.size / 1024,
+                count=stat.count,
+                file=frame.filename,
+                line=frame.lineno,
+            )
+
+        with open(self.output_dir.joinpath("report.txt"), "w") as report_file:
+            report_file.write(report)
+
+        print(report)
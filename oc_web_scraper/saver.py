@@ -1,42 +1,157 @@
 import csv
-from string import ascii_letters
-from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import threading
 
-import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 
 from tqdm import tqdm
 
 from oc_web_scraper import errors as _CUSTOM_ERRORS
+from oc_web_scraper.book import SCRAPED_FIELDS
+from oc_web_scraper.data_tree import (
+    CSV_FIELDNAMES,
+    MANIFEST_FILENAME,
+    DataTree,
+    book_row,
+    slugify,
+    unique_slug,
+)
 from oc_web_scraper.logger import Logger
+from oc_web_scraper.fetcher import Fetcher
+from oc_web_scraper.image_pack import PACK_FILENAME, PackReader, PackWriter
 from oc_web_scraper.library import Library
+from oc_web_scraper.seen import canonical_url
+from oc_web_scraper.sinks import build_sinks, run_sinks, stream_library
+
+
+def link_or_copy(source: str, destination: str):
+    """Hard links a file, copying it where links are not supported.
+
+    Args:
+        source (str): Existing file.
+        destination (str): New file path.
+    """
+
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
 
 
 class Saver:
     """Saver class manages local saving process.
     It exploits Library object created during scrapping to
     create a csv file for each category and save the book
-    cover image for each book.
+    cover image for each book, either as a file or in a single
+    image pack.
+
+    Every output path is planned first. Cover images are then written
+    to a staging directory by a pool of workers, while output sinks
+    (csv files, JSON lines, SQLite, snapshot) consume one stream of
+    books, each in its own worker. Category directories of the published
+    tree this run did not scrape are linked into the staging directory,
+    which is then published at once, see publish. A manifest records
+    whether the run was complete, and the work skipped once run budget
+    was exhausted.
 
     Attributes:
         logger (Logger): Main app logger object. Passed in instantiation arguments.
-        save_path (str): Parsed from config.yml file. Set
-        by Handler.
+        fetcher (Fetcher): Main app fetcher object. Passed in instantiation arguments.
+        save_path (Path): Published 'data' directory, under the save path
+        parsed from config.yml file. A symbolic link to the current
+        'data.vN' version directory where supported.
+        staging_path (Path): Directory written during saving process.
+        backup_path (Path): Previously published directory, kept after swap
+        where symbolic links are not supported, or once when the tree
+        predates version directories.
+        workers (int): Number of writing workers.
+        sinks (list): Output sink names, see sinks.build_sinks.
+        sink_buffer (int): Maximum number of books buffered per sink.
+        snapshot_compress (bool): Compress snapshot sink records with zlib.
+        image_store (str): "files" (one file per book) or "pack" (see
+        image_pack module).
+        fields (tuple): Scraped book fields, recorded in manifest. Books
+        have no image when "image_url" is not among them.
+        pack (PackWriter): Image pack being written, during a save in
+        pack mode.
+        published_pack (PackReader): Image pack of the published tree,
+        during a save in pack mode.
+        sink_stats (list): Throughput of each sink during last save.
+        duplicate_images (int): Number of image downloads avoided during last
+        save, as several books share the same cover image URL.
+        published (dict): Csv rows and image URLs of the published tree,
+        with paths relative to it, when saved by this process. Used to
+        link unchanged files instead of writing or downloading them.
+        reused_files (int): Number of files linked from published tree
+        during last save.
+        spool_path (Path): Directory receiving images downloaded while
+        scraping, by crawl pipeline image stage.
+        spooled (dict): Format is "canonical image url": spooled file, None
+        unless a crawl pipeline is spooling images.
     """
 
-    def __init__(self, save_path: str, logger: Logger):
+    def __init__(
+        self,
+        save_path: str,
+        logger: Logger,
+        fetcher: Fetcher,
+        workers: int = 8,
+        sinks: list = ("csv",),
+        sink_buffer: int = 1024,
+        snapshot_compress: bool = True,
+        image_store: str = "files",
+        fields: tuple = SCRAPED_FIELDS,
+    ):
         """Constructor for Saver class.
 
         Args:
             save_path (str): Local save path.
             logger (Logger): Main app logger object.
+            fetcher (Fetcher): Main app fetcher object.
+            workers (int): Number of writing workers.
+            sinks (list): Output sink names, see sinks.build_sinks.
+            sink_buffer (int): Maximum number of books buffered per sink.
+            snapshot_compress (bool): Compress snapshot sink records with zlib.
+            image_store (str): "files" or "pack".
+            fields (tuple): Scraped book fields.
+
+        Raises:
+            _CUSTOM_ERRORS.CouldNotParseImageStore: If image store is not
+            recognized.
         """
 
         self.logger = logger
+        self.fetcher = fetcher
+        self.workers = workers
+        self.sinks = list(sinks)
+        self.sink_buffer = sink_buffer
+        self.snapshot_compress = snapshot_compress
+
+        self.image_store = image_store.lower()
+        if self.image_store not in ("files", "pack"):
+            raise _CUSTOM_ERRORS.CouldNotParseImageStore(store=image_store)
+        self.pack = None
+        self.published_pack = None
+        self.fields = tuple(fields)
+
+        self.sink_stats = []
+        self.duplicate_images = 0
+        self.published = None
+        self.reused_files = 0
+        self.spooled = None
+        self.spool_lock = threading.Lock()
 
         self.save_path = save_path
         self.save_path_exists()
 
-        self.create_data_dir()
+        self.save_path = Path(save_path).joinpath("data")
+        self.staging_path = Path(save_path).joinpath("data.staging")
+        self.backup_path = Path(save_path).joinpath("data.backup")
+        self.spool_path = Path(save_path).joinpath("images.spool")
 
     def save_path_exists(self):
         """Verifies if path input in config.yml exists
@@ -60,102 +175,184 @@ class Saver:
 
         return True
 
-    def create_data_dir(self):
-        """Creates a data directory to save all the files in."""
-
-        data_path = Path(self.save_path).joinpath("data")
-
-        Path(data_path).mkdir(exist_ok=True)
-
-        self.save_path = data_path
-
     def save_library(self, library: Library):
-        """Drives the saving process by iterating through Library categories.
+        """Drives the saving process: plans every output path, creates the
+        directory tree, saves images through a worker pool while sinks
+        consume the library, then publishes the staging directory.
 
         Args:
             library (Library): Library object created by Handler.
         """
 
-        self.logger.write(
-            log_level="info",
-            message="Starting saving process at path: '{path}'.".format(
-                path=self.save_path
-            ),
-        )
+        with self.fetcher.tracer.span("save", path=self.save_path):
+            self.logger.write(
+                log_level="info",
+                message="Starting saving process at path: '{path}'.",
+                path=self.save_path,
+                stage="save",
+            )
 
-        # Inform the user if logging outputs to file
-        if self.logger.log_to_file:
-            print(" - Saving...")
-        # Disable progress bar if logging outputs to terminal
-        for category in tqdm(library.categories, disable=not (self.logger.log_to_file)):
-            category_object = library.categories[category]
-            category_name = category_object.name
-            category_path = self.get_category_path(category_name=category_name)
-
-            self.create_category_dir(category_path)
-
-            self.save_category(
-                category_books=category_object.books,
-                category_name=category_name,
-                category_path=category_path,
+            plan = self.plan_library(library=library)
+
+            self.create_directories(plan=plan)
+
+            tasks = []
+            # Each image URL is downloaded once, then written to every file using it.
+            images = {}
+            number_of_images = 0
+            for category_plan in plan:
+                for title, image_url, image_file in category_plan["images"]:
+                    # Image URL was not among selected fields.
+                    if image_url is None:
+                        continue
+                    number_of_images += 1
+                    key = canonical_url(image_url)
+                    if key not in images:
+                        images[key] = (title, image_url, [])
+                    images[key][2].append(image_file)
+
+            for key, (title, image_url, image_files) in images.items():
+                tasks.append(self.image_task(key, title, image_url, image_files))
+
+            self.duplicate_images = number_of_images - len(images)
+            self.reused_files = 0
+
+            if self.image_store == "pack":
+                self.open_pack(library=library, plan=plan)
+
+            sinks = build_sinks(
+                names=self.sinks,
+                saver=self,
+                plan=plan,
+                snapshot_compress=self.snapshot_compress,
             )
 
-        self.logger.write(log_level="info", message="All data saved locally.")
+            # Inform the user if logging outputs to file
+            if self.logger.log_to_file:
+                print(" - Saving...")
 
-    def save_category(
-        self, category_books: dict, category_name: str, category_path: Path
-    ):
-        """Particular saving process by category. Iterates through Books to
-        store their value for the [category_name].csv file and scrap/save
-        their cover image.
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # Image spans are children of the save span.
+                futures = [
+                    executor.submit(self.fetcher.tracer.bind(task), *arguments)
+                    for task, arguments in tasks
+                ]
+
+                # Sinks run alongside image downloads.
+                self.sink_stats = run_sinks(
+                    sinks=sinks, events=stream_library(library), buffer=self.sink_buffer
+                )
+
+                # Disable progress bar if logging outputs to terminal
+                for future in tqdm(
+                    as_completed(futures),
+                    total=len(futures),
+                    disable=not (self.logger.log_to_file),
+                ):
+                    # Propagate worker errors, previous data stays published.
+                    self.reused_files += future.result() or 0
+
+            carried = self.carry_categories(plan=plan)
+
+            if self.pack is not None:
+                self.close_pack()
+
+            self.reused_files += sum(sink.reused for sink in sinks)
+
+            self.save_manifest(plan=plan, carried=carried)
+
+            self.publish()
+
+            for sink in sinks:
+                sink.publish()
+
+            for stats in self.sink_stats:
+                self.logger.write(
+                    log_level="info",
+                    message="Sink '{sink}': {books} book(s) in {seconds}s, "
+                    "stream blocked {blocked}s.",
+                    stage="save",
+                    **stats,
+                )
+
+            self.remember_published(plan=plan, images=images)
+
+            if self.spooled is not None:
+                self.close_spool()
+
+            self.logger.write(log_level="info", message="All data saved locally.")
+
+    def plan_library(self, library: Library):
+        """Computes every output path up front. Category and image slugs
+        colliding with an already planned one get a numbered suffix.
 
         Args:
-            category (dict): Books attribute of Category.
-            category_name (str): Name of the category.
-            category_path (Path): Local save path for this category.
+            library (Library): Library object created by Handler.
+
+        Returns:
+            list: One dict per category with its name, directory, csv file,
+            (title, image URL, image file) tuples, and csv rows, filled
+            by csv sink.
         """
 
-        self.logger.write(
-            log_level="info",
-            message="Saving '{cat}' with {num} book(s).".format(
-                cat=category_name, num=len(category_books)
-            ),
-        )
+        plan = []
+        # Categories keep their published directory, and directories of
+        # categories this run leaves out are not given to others.
+        published = self.published_categories()
+        category_slugs = {category_dir.name for category_dir in published.values()}
+
+        for category_object in library.categories.values():
+            if category_object.name in published:
+                category_slug = published[category_object.name].name
+            else:
+                category_slug = unique_slug(category_object.name, category_slugs)
+            category_dir = self.staging_path.joinpath(category_slug)
+            image_slugs = set()
+
+            category_plan = {
+                "name": category_object.name,
+                "dir": category_dir,
+                "csv_file": category_dir.joinpath(
+                    "{slug}.csv".format(slug=category_slug)
+                ),
+                "rows": [],
+                "images": [],
+                "complete": getattr(category_object, "complete", True),
+            }
+
+            for book_object in category_object.books.values():
+                image_slug = unique_slug(book_object.title, image_slugs)
+                category_plan["images"].append(
+                    (
+                        book_object.title,
+                        book_object.image_url,
+                        category_dir.joinpath("images", image_slug + ".jpg"),
+                    )
+                )
 
-        csv_rows = []
-
-        for book in category_books:
-            book_object = category_books[book]
-
-            csv_rows.append(
-                {
-                    "URL": book_object.url,
-                    "UPC": book_object.upc,
-                    "Title": book_object.title,
-                    "Price Including Tax": book_object.price_including_tax,
-                    "Price Excluding Tax": book_object.price_excluding_tax,
-                    "Number Available": book_object.number_available,
-                    "Product Description": book_object.product_description,
-                    "Category": book_object.category,
-                    "Review Rating": book_object.review_rating,
-                    "Image URL": book_object.image_url,
-                }
+            self.logger.write(
+                log_level="info",
+                message="Saving '{cat}' with {num} book(s).",
+                cat=category_object.name,
+                num=len(category_plan["images"]),
+                stage="save",
             )
 
-            self.save_image(
-                book_title=book_object.title,
-                image_url=book_object.image_url,
-                category_path=category_path,
-            )
+            plan.append(category_plan)
 
-        self.save_csv(
-            category_name=category_name, csv_rows=csv_rows, category_path=category_path
-        )
+        return plan
 
-        self.logger.write(
-            log_level="info",
-            message="Category '{cat}' saved.".format(cat=category_name),
-        )
+    def book_row(self, book_object):
+        """Returns csv row of a book.
+
+        Args:
+            book_object (Book): Scraped book.
+
+        Returns:
+            dict: Book values keyed by csv field name.
+        """
+
+        return book_row(book_object)
 
     def slugify(self, raw_string: str):
         """Transforms raw name to slug to avoid any file/dir naming problems.
@@ -167,120 +364,584 @@ class Saver:
             str: Slugified name
         """
 
-        slug = ""
+        return slugify(raw_string)
+
+    def create_directories(self, plan: list):
+        """Creates a fresh staging directory and the whole planned
+        directory tree in one pass.
+
+        Args:
+            plan (list): Output plan from plan_library.
+        """
+
+        # Leftover of an interrupted run.
+        if self.staging_path.exists():
+            shutil.rmtree(self.staging_path)
 
-        for char in raw_string:
-            if char in ascii_letters:
-                slug += char.lower()
-            elif char == " ":
-                slug += "_"
+        self.staging_path.mkdir()
 
-        return slug.strip("_")
+        for category_plan in plan:
+            category_plan["dir"].mkdir()
+            # Packed images are only unpacked on demand.
+            if self.image_store == "files":
+                category_plan["dir"].joinpath("images").mkdir()
 
-    def backup_csv_file(self, csv_file: Path):
-        """Create a .backup for csv file if it already exists.
+    def write_file(self, path: Path, content: bytes):
+        """Writes a file to a temporary name, then renames it, so that
+        no partially written file is ever visible.
 
         Args:
-            csv_file (Path): csv file absolute file
+            path (Path): Final file path.
+            content (bytes): File content.
         """
 
-        backup_file = Path(csv_file.parent / (csv_file.name + ".backup"))
+        temporary_path = path.with_name(path.name + ".tmp")
 
-        if backup_file.exists():
-            backup_file.unlink()
+        with open(temporary_path, "wb") as out_file:
+            out_file.write(content)
 
-        csv_file.rename(backup_file)
+        os.replace(temporary_path, path)
 
-    def get_category_path(self, category_name: str):
-        """Returns adequate path for category dir by
-        turning its raw name to a slug.
+    def save_image(self, book_title: str, image_url: str, image_files: list):
+        """Scrap book cover image and saves it locally.
 
         Args:
-            category_name (str): Raw category name.
+            book_title (str): Book title, for error messages.
+            image_url (str): Book cover image URL.
+            image_files (list): Local image file paths of books using it.
 
-        Returns:
-            str: Path to save category scrapped content.
+        Raises:
+            _CUSTOM_ERRORS.FailedToSaveImage: If GET request returns an error.
         """
 
-        category_slug = self.slugify(category_name)
+        if self.fetcher.budget.exhausted():
+            self.fetcher.budget.skip("image", title=book_title, url=image_url)
+            return
 
-        category_path = Path(self.save_path).joinpath(category_slug)
+        with self.fetcher.tracer.span("image", url=image_url, files=len(image_files)):
+            img_response = self.fetcher.get(image_url)
 
-        return category_path
+            if img_response.status_code != 200:
+                self.logger.write(
+                    log_level="error",
+                    message="Failed to get image for book {title} at URL {url}.",
+                    title=book_title,
+                    url=image_url,
+                    stage="save",
+                )
+                raise _CUSTOM_ERRORS.FailedToSaveImage(title=book_title, url=image_url)
 
-    def create_category_dir(self, path: Path):
-        """Creates category directory and a child 'images' directory
-        to save scrapped content.
+            if self.pack is not None:
+                self.pack.add_image(image_url=image_url, content=img_response.content)
+                return
+
+            for image_file in image_files:
+                self.write_file(path=image_file, content=img_response.content)
+
+    def save_csv(self, csv_rows: list, csv_file: Path):
+        """Manages saving a category stored values to a csv file.
 
         Args:
-            path (Path): Absolute path for category directory.
+            csv_rows (list): List of dicts representing per books values.
+            csv_file (Path): Local csv file path.
         """
 
-        image_path = path.joinpath("images")
+        temporary_path = csv_file.with_name(csv_file.name + ".tmp")
 
-        Path(path).mkdir(exist_ok=True)
-        Path(image_path).mkdir(exist_ok=True)
+        with open(temporary_path, "w", newline="") as out_file:
+            writer = csv.DictWriter(out_file, fieldnames=CSV_FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(csv_rows)
 
-    def save_image(self, book_title: str, image_url: str, category_path: Path):
-        """Scrap book cover image and saves it locally.
+        os.replace(temporary_path, csv_file)
+
+    def save_manifest(self, plan: list, carried: list = ()):
+        """Writes run manifest to staging directory: completion status,
+        budget usage and skipped work.
+
+        Args:
+            plan (list): Output plan from plan_library.
+            carried (list): Category directories kept from the published
+            tree, see carry_categories.
+        """
+
+        budget = self.fetcher.budget
+        manifest = {
+            "status": "partial" if budget.skipped else "complete",
+            "reason": budget.reason if budget.skipped else None,
+            "usage": budget.usage(),
+            "categories": len(plan),
+            "books": sum(len(category_plan["images"]) for category_plan in plan),
+            "image_store": self.image_store,
+            "fields": list(self.fields),
+            "sinks": self.sink_stats,
+            "skipped": budget.skipped,
+            "carried": list(carried),
+        }
+
+        if budget.skipped:
+            self.logger.write(
+                log_level="warning",
+                message="Partial run ({reason}): {num} unit(s) of work skipped.",
+                reason=budget.reason,
+                num=len(budget.skipped),
+                stage="save",
+            )
+
+        self.write_file(
+            path=self.staging_path.joinpath(MANIFEST_FILENAME),
+            content=json.dumps(manifest, indent=2).encode("utf-8"),
+        )
+
+    def csv_task(self, category_plan: dict):
+        """Returns task writing a category csv file, linking the published
+        one when its rows did not change.
 
         Args:
-            book_title (str): Book title for local file name.
+            category_plan (dict): Category entry of output plan.
+
+        Returns:
+            tuple: Task function and its arguments.
+        """
+
+        relative_path = category_plan["csv_file"].relative_to(self.staging_path)
+
+        if self.published is not None:
+            published = self.published["csv"].get(category_plan["name"])
+
+            if published == (relative_path, category_plan["rows"]):
+                return (
+                    self.reuse_file,
+                    (
+                        self.save_path.joinpath(relative_path),
+                        [category_plan["csv_file"]],
+                        self.save_csv,
+                        (category_plan["rows"], category_plan["csv_file"]),
+                    ),
+                )
+
+        return (self.save_csv, (category_plan["rows"], category_plan["csv_file"]))
+
+    def image_task(self, key: str, title: str, image_url: str, image_files: list):
+        """Returns task saving an image, linking the published file when
+        it was downloaded from the same URL.
+
+        Args:
+            key (str): Canonical image URL.
+            title (str): Book title, for error messages.
             image_url (str): Book cover image URL.
-            category_path (Path): Category absolute local path for saving.
+            image_files (list): Local image file paths of books using it.
 
-        Raises:
-            _CUSTOM_ERRORS.FailedToSaveImage: If GET request returns an error.
+        Returns:
+            tuple: Task function and its arguments.
         """
 
-        img_response = requests.get(image_url, stream=True, allow_redirects=True)
+        if self.spooled is not None and self.spooled.get(key) is not None:
+            if self.image_store == "pack":
+                return (self.pack_spooled, (key, title, image_url, image_files))
+
+            return (
+                self.reuse_file,
+                (
+                    self.spooled[key],
+                    image_files,
+                    self.save_image,
+                    (title, image_url, image_files),
+                ),
+            )
 
-        if img_response.status_code != 200:
-            self.logger.write(
-                log_level="error",
-                message="Failed to get image for book {title} at URL {url}.".format(
-                    title=book_title, url=image_url
+        if self.published is not None and key in self.published["images"]:
+            if self.image_store == "pack":
+                return (self.reuse_packed, (key, title, image_url, image_files))
+
+            return (
+                self.reuse_file,
+                (
+                    self.save_path.joinpath(self.published["images"][key]),
+                    image_files,
+                    self.save_image,
+                    (title, image_url, image_files),
                 ),
             )
-            raise _CUSTOM_ERRORS.FailedToSaveImage(title=book_title, url=image_url)
 
-        image_dir = category_path.joinpath("images")
-        book_slug = self.slugify(book_title)
-        image_file = image_dir.joinpath(book_slug + ".jpg")
+        return (self.save_image, (title, image_url, image_files))
 
-        with open(image_file, "wb") as out_file:
-            out_file.write(img_response.content)
+    def reuse_file(self, source: Path, paths: list, fallback, fallback_arguments: tuple):
+        """Hard links an unchanged published file to new paths, running
+        fallback task if it cannot be linked, e.g. if it was removed.
 
-    def save_csv(self, category_name: str, csv_rows: dict, category_path: Path):
-        """Manages saving a category stored values to a csv file.
+        Args:
+            source (Path): Published file.
+            paths (list): New file paths.
+            fallback (callable): Task writing the file from scratch.
+            fallback_arguments (tuple): Fallback task arguments.
+
+        Returns:
+            int: Number of linked files.
+        """
+
+        try:
+            for path in paths:
+                os.link(source, path)
+        except OSError:
+            fallback(*fallback_arguments)
+            return 0
+
+        return len(paths)
+
+    def open_pack(self, library: Library, plan: list):
+        """Starts an image pack in staging directory, indexing the image
+        of every planned book, and opens the published pack to copy
+        unchanged images from.
 
         Args:
-            category_name (str): Raw category name.
-            csv_rows (list): List of dicts representing per books values.
-            category_path (Path): Category absolute local path for saving.
+            library (Library): Library object created by Handler.
+            plan (list): Output plan from plan_library.
+        """
+
+        self.pack = PackWriter(path=self.staging_path)
+
+        for category_object, category_plan in zip(library.categories.values(), plan):
+            for book_object, (_, image_url, image_file) in zip(
+                category_object.books.values(), category_plan["images"]
+            ):
+                self.pack.add_book(
+                    upc=book_object.upc,
+                    url=book_object.url,
+                    image_url=image_url,
+                    path=image_file.relative_to(self.staging_path).as_posix(),
+                )
+
+        self.published_pack = None
+        if (
+            self.published is not None
+            and self.save_path.joinpath(PACK_FILENAME).exists()
+        ):
+            try:
+                self.published_pack = PackReader(path=self.save_path)
+            except _CUSTOM_ERRORS.UnsupportedImagePack:
+                pass
+
+    def close_pack(self):
+        """Writes image pack index and closes published pack."""
+
+        self.pack.close()
+
+        if self.published_pack is not None:
+            self.published_pack.close()
+            self.published_pack = None
+
+    def reuse_packed(self, key: str, title: str, image_url: str, image_files: list):
+        """Copies an image from the published pack, downloading it if the
+        pack does not hold it.
+
+        Args:
+            key (str): Canonical image URL.
+            title (str): Book title, for error messages.
+            image_url (str): Book cover image URL.
+            image_files (list): Local image file paths of books using it.
+
+        Returns:
+            int: Number of reused images.
+        """
+
+        image = None
+        if self.published_pack is not None:
+            image = self.published_pack.image(key)
+
+        if image is None:
+            self.save_image(title, image_url, image_files)
+            return 0
+
+        self.pack.add_image(image_url=image_url, content=image)
+        image.release()
+
+        return 1
+
+    def open_spool(self):
+        """Starts spooling images downloaded while scraping, to a fresh
+        spool directory."""
+
+        # Leftover of an interrupted run.
+        if self.spool_path.exists():
+            shutil.rmtree(self.spool_path)
+
+        self.spool_path.mkdir()
+        self.spooled = {}
+
+    def spool_image(self, title: str, image_url: str):
+        """Downloads an image to spool directory, unless it is already
+        spooled or will be linked from the published tree. Failures are
+        left to the saving process, which downloads the image again.
+
+        Args:
+            title (str): Book title.
+            image_url (str): Book cover image URL.
+        """
+
+        key = canonical_url(image_url)
+
+        with self.spool_lock:
+            if key in self.spooled:
+                return
+            # Marks image as being spooled, file is only used once written.
+            self.spooled[key] = None
+
+        if self.published is not None and key in self.published["images"]:
+            return
+        if self.fetcher.budget.exhausted():
+            return
+
+        with self.fetcher.tracer.span("image", url=image_url, spooled=True):
+            img_response = self.fetcher.get(image_url)
+
+            if img_response.status_code != 200:
+                return
+
+            path = self.spool_path.joinpath(
+                hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg"
+            )
+            self.write_file(path=path, content=img_response.content)
+
+        with self.spool_lock:
+            self.spooled[key] = path
+
+    def close_spool(self):
+        """Removes spool directory. Spooled images were linked to the
+        staging directory, or copied to the image pack."""
+
+        self.spooled = None
+
+        if self.spool_path.exists():
+            shutil.rmtree(self.spool_path)
+
+    def pack_spooled(self, key: str, title: str, image_url: str, image_files: list):
+        """Copies a spooled image to the image pack.
+
+        Args:
+            key (str): Canonical image URL.
+            title (str): Book title, for error messages.
+            image_url (str): Book cover image URL.
+            image_files (list): Local image file paths of books using it.
         """
 
-        csv_fieldnames = [
-            "URL",
-            "UPC",
-            "Title",
-            "Price Including Tax",
-            "Price Excluding Tax",
-            "Number Available",
-            "Product Description",
-            "Category",
-            "Review Rating",
-            "Image URL",
+        with open(self.spooled[key], "rb") as in_file:
+            self.pack.add_image(image_url=image_url, content=in_file.read())
+
+    def remember_published(self, plan: list, images: dict):
+        """Keeps csv rows and image URLs of the published tree, for next
+        save by this process.
+
+        Args:
+            plan (list): Output plan from plan_library.
+            images (dict): Format is "canonical url": (title, url, [files]).
+        """
+
+        csv_files = {
+            category_plan["name"]: (
+                category_plan["csv_file"].relative_to(self.staging_path),
+                category_plan["rows"],
+            )
+            for category_plan in plan
+        }
+
+        if self.pack is not None:
+            # Packed images are copied from the published pack by URL.
+            self.published = {
+                "csv": csv_files,
+                "images": dict.fromkeys(self.pack.images),
+            }
+            self.pack = None
+            return
+
+        self.published = {
+            "csv": csv_files,
+            "images": {
+                key: image_files[0].relative_to(self.staging_path)
+                for key, (_, _, image_files) in images.items()
+                if self.save_path.joinpath(
+                    image_files[0].relative_to(self.staging_path)
+                ).exists()
+            },
+        }
+
+    def published_categories(self):
+        """Lists categories of the published tree.
+
+        Returns:
+            dict: Format is "category name": category directory.
+        """
+
+        published_tree = DataTree(save_path=self.save_path.parent)
+        if not published_tree.exists():
+            return {}
+
+        categories = {}
+        for category_dir in published_tree.category_dirs():
+            name = published_tree.category_name(category_dir)
+            if name is not None:
+                categories[name] = category_dir
+
+        return categories
+
+    def carry_categories(self, plan: list):
+        """Hard links into staging directory the category directories of
+        the published tree that this run did not scrape: categories left
+        out by selection, or skipped once run budget was exhausted. In
+        pack mode, their images are copied to the new pack.
+
+        Args:
+            plan (list): Output plan from plan_library.
+
+        Returns:
+            list: Names of carried category directories.
+        """
+
+        published_tree = DataTree(save_path=self.save_path.parent)
+        scraped = {
+            category_plan["name"]
+            for category_plan in plan
+            if category_plan["images"] or category_plan["complete"]
+        }
+        carried = [
+            category_dir
+            for name, category_dir in self.published_categories().items()
+            if name not in scraped
         ]
+        if not carried:
+            return []
+
+        published_pack = None
+        if self.pack is not None:
+            published_pack = self.published_pack
+            if published_pack is None and self.save_path.joinpath(
+                PACK_FILENAME
+            ).exists():
+                try:
+                    published_pack = PackReader(path=self.save_path)
+                except _CUSTOM_ERRORS.UnsupportedImagePack:
+                    pass
+
+        try:
+            for category_dir in carried:
+                staged_dir = self.staging_path.joinpath(category_dir.name)
+                # Planned, but left empty by run budget.
+                if staged_dir.exists():
+                    shutil.rmtree(staged_dir)
+                shutil.copytree(category_dir, staged_dir, copy_function=link_or_copy)
+
+                if self.pack is not None:
+                    self.carry_packed(published_tree, category_dir, published_pack)
+        finally:
+            if published_pack is not None and published_pack is not self.published_pack:
+                published_pack.close()
 
-        category_slug = self.slugify(category_name)
-        csv_file_path = category_path.joinpath("{slug}.csv".format(slug=category_slug))
+        self.logger.write(
+            log_level="info",
+            message="Kept {num} category(ies) not scraped by this run: {names}.",
+            num=len(carried),
+            names=", ".join(category_dir.name for category_dir in carried),
+            stage="save",
+        )
 
-        if csv_file_path.exists():
-            self.backup_csv_file(csv_file=csv_file_path)
+        return [category_dir.name for category_dir in carried]
 
-        with open(csv_file_path, "w") as csv_file:
-            writer = csv.DictWriter(csv_file, fieldnames=csv_fieldnames)
-            writer.writeheader()
-            for data in csv_rows:
-                writer.writerow(data)
+    def carry_packed(
+        self, published_tree: DataTree, category_dir: Path, published_pack
+    ):
+        """Indexes books of a carried category in the new image pack,
+        copying their images from the published pack.
+
+        Args:
+            published_tree (DataTree): Published tree.
+            category_dir (Path): Carried category directory.
+            published_pack (PackReader): Published pack, None if missing.
+        """
+
+        _, rows = published_tree.read_category(category_dir)
+        image_files = published_tree.image_files(category_dir, rows)
+
+        for row, image_file in zip(rows, image_files):
+            image_url = row.get("Image URL") or None
+
+            self.pack.add_book(
+                upc=row.get("UPC"),
+                url=row.get("URL"),
+                image_url=image_url,
+                path=image_file.relative_to(published_tree.data_path).as_posix(),
+            )
+
+            if image_url is not None and published_pack is not None:
+                image = published_pack.image(image_url)
+                if image is not None:
+                    self.pack.add_image(image_url=image_url, content=bytes(image))
+
+    def next_version(self):
+        """Returns the path of the next version directory.
+
+        Returns:
+            Path: 'data.vN' directory, N following the highest existing one.
+        """
+
+        numbers = [
+            int(path.name[len("data.v") :])
+            for path in self.save_path.parent.glob("data.v*")
+            if path.name[len("data.v") :].isdigit()
+        ]
+
+        return self.save_path.with_name(
+            "data.v{num}".format(num=max(numbers, default=0) + 1)
+        )
+
+    def publish(self):
+        """Publishes staging directory atomically: it becomes the next
+        version directory, and the 'data' symbolic link is replaced in
+        one rename by a link to it, so that 'data' always exists and is
+        whole. The previous version is kept as a backup, older ones are
+        removed. Where symbolic links are not supported, directories are
+        swapped by two renames instead."""
+
+        version = self.next_version()
+        self.staging_path.rename(version)
+
+        link = self.save_path.with_name("data.link")
+        if os.path.lexists(link):
+            link.unlink()
+
+        try:
+            os.symlink(version.name, link, target_is_directory=True)
+        except (OSError, NotImplementedError):
+            self.swap(version)
+            return
+
+        previous = None
+        if self.save_path.is_symlink():
+            previous = os.readlink(self.save_path)
+        elif self.save_path.exists():
+            # Tree published before version directories, moved aside once.
+            if self.backup_path.exists():
+                shutil.rmtree(self.backup_path)
+            self.save_path.rename(self.backup_path)
+
+        os.replace(link, self.save_path)
+
+        for path in self.save_path.parent.glob("data.v*"):
+            if path.name not in (version.name, previous) and path.is_dir():
+                shutil.rmtree(path)
+        if previous is not None and self.backup_path.exists():
+            shutil.rmtree(self.backup_path)
+
+    def swap(self, version: Path):
+        """Swaps a version directory with published data directory, by two
+        renames. The previously published directory is kept as a backup.
+
+        Args:
+            version (Path): Directory to publish.
+        """
+
+        if self.save_path.exists():
+            if self.backup_path.exists():
+                shutil.rmtree(self.backup_path)
+            self.save_path.rename(self.backup_path)
+
+        version.rename(self.save_path)
@@ -0,0 +1,161 @@
+import hashlib
+import math
+import threading
+
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+
+def canonical_url(url: str):
+    """Normalizes a URL so that equivalent spellings compare equal:
+    lowercased scheme and host, no default port, no fragment.
+
+    Args:
+        url (str): Absolute URL.
+
+    Returns:
+        str: Canonical URL.
+    """
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+
+    default_port = DEFAULT_PORTS.get(scheme)
+    if default_port is not None and netloc.endswith(default_port):
+        netloc = netloc[: -len(default_port)]
+
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+class BloomFilter:
+    """BloomFilter class is a fixed size probabilistic set. Membership
+    tests may return false positives, at the configured rate once
+    capacity items are added, but never false negatives.
+
+    Attributes:
+        size (int): Number of bits.
+        hashes (int): Number of bits set per item.
+        bits (bytearray): Bit array.
+        count (int): Number of items added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        """Constructor for BloomFilter class.
+
+        Args:
+            capacity (int): Expected number of items.
+            error_rate (float): False positive rate at capacity.
+        """
+
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, item: str):
+        # Double hashing: k positions derived from two 64 bits hashes.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + number * second) % self.size for number in range(self.hashes)]
+
+    def __contains__(self, item: str):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+    def add(self, item: str):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+        self.count += 1
+
+
+class SeenUrls:
+    """SeenUrls class is the crawl-wide set of already scheduled URLs,
+    keyed by canonical URL. It holds an exact set until exact_limit URLs
+    are seen, then moves to a memory-bounded Bloom filter, accepting
+    that a few new URLs may be taken for duplicates and skipped.
+
+    Attributes:
+        exact_limit (int): Number of URLs kept in the exact set.
+        bloom_capacity (int): Expected number of URLs once in Bloom filter.
+        error_rate (float): Bloom filter false positive rate.
+        urls (set): Exact set, None once switched to Bloom filter.
+        bloom (BloomFilter): Bloom filter, None until switched.
+        duplicates (int): Number of duplicate URLs rejected.
+    """
+
+    def __init__(
+        self,
+        exact_limit: int = 1000000,
+        bloom_capacity: int = 10000000,
+        error_rate: float = 0.001,
+    ):
+        """Constructor for SeenUrls class.
+
+        Args:
+            exact_limit (int): Number of URLs kept in the exact set.
+            bloom_capacity (int): Expected number of URLs once in Bloom filter.
+            error_rate (float): Bloom filter false positive rate.
+        """
+
+        self.exact_limit = exact_limit
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+
+        self.urls = set()
+        self.bloom = None
+        self.duplicates = 0
+
+        self.lock = threading.Lock()
+
+    def add(self, url: str):
+        """Marks a URL as seen.
+
+        Args:
+            url (str): Absolute URL.
+
+        Returns:
+            bool: True if URL was not seen before.
+        """
+
+        key = canonical_url(url)
+
+        with self.lock:
+            seen = self.bloom if self.bloom is not None else self.urls
+
+            if key in seen:
+                self.duplicates += 1
+                return False
+
+            seen.add(key)
+
+            if self.bloom is None and len(self.urls) > self.exact_limit:
+                self.switch_to_bloom()
+
+        return True
+
+    def reject(self):
+        """Counts a duplicate URL rejected without marking it, e.g. a book
+        owned by another category."""
+
+        with self.lock:
+            self.duplicates += 1
+
+    def switch_to_bloom(self):
+        """Moves exact set content to a Bloom filter. Caller holds the lock."""
+
+        self.bloom = BloomFilter(
+            capacity=max(self.bloom_capacity, len(self.urls) * 2),
+            error_rate=self.error_rate,
+        )
+
+        for key in self.urls:
+            self.bloom.add(key)
+
+        self.urls = None
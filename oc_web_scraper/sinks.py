@@ -0,0 +1,458 @@
+"""Output sinks fed by one stream of scraped books.
+
+Saver turns a Library into a single ordered stream of events: a
+("category", Category) event followed by one ("book", Book) event per
+book of that category. Every configured sink consumes that stream in its
+own worker thread, through a bounded queue, so that adding an output
+format adds no pass over the Library, and a slow sink blocks the stream
+instead of buffering it all in memory.
+"""
+
+import abc
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from oc_web_scraper import errors as _CUSTOM_ERRORS
+from oc_web_scraper.data_tree import book_row
+from oc_web_scraper.snapshot import SnapshotWriter
+
+# Events are handed to sink workers in batches, which keeps queue
+# overhead low for large libraries.
+BATCH_SIZE = 64
+
+
+def stream_library(library):
+    """Yields category and book events of a library, in saving order.
+
+    Args:
+        library (Library): Scraped library.
+
+    Yields:
+        tuple: ("category", Category) or ("book", Book).
+    """
+
+    for category_object in library.categories.values():
+        yield "category", category_object
+
+        for book_object in category_object.books.values():
+            yield "book", book_object
+
+
+class Sink(abc.ABC):
+    """Sink class is the base of output sinks. Sinks are opened, fed and
+    closed from their worker thread, then published by Saver once the
+    staging directory is swapped in.
+
+    Attributes:
+        name (str): Sink name, as set in config.yml.
+        reused (int): Number of files linked instead of written.
+    """
+
+    name = None
+
+    def __init__(self):
+        self.reused = 0
+
+    def open(self):
+        pass
+
+    def write_category(self, category_object):
+        pass
+
+    @abc.abstractmethod
+    def write_book(self, book_object):
+        """Writes one book, called in stream order after its category.
+
+        Args:
+            book_object (Book): Scraped book.
+        """
+
+    def close(self):
+        pass
+
+    def publish(self):
+        pass
+
+
+class CsvSink(Sink):
+    """CsvSink class writes one csv file per category to the paths
+    planned by Saver, linking the published file if rows did not change.
+
+    Attributes:
+        saver (Saver): Saver writing the tree.
+        plans (iterator): Category entries of output plan, in stream order.
+        current (dict): Category entry being filled.
+        tracer (Tracer): Tracer of saver fetcher.
+        span_parent (Span): Span open when the sink was built, parent of
+        csv write spans, as sinks run in their own thread.
+    """
+
+    name = "csv"
+
+    def __init__(self, saver, plan: list):
+        """Constructor for CsvSink class.
+
+        Args:
+            saver (Saver): Saver writing the tree.
+            plan (list): Output plan from Saver.plan_library.
+        """
+
+        super().__init__()
+
+        self.saver = saver
+        self.plans = iter(plan)
+        self.current = None
+
+        self.tracer = saver.fetcher.tracer
+        self.span_parent = self.tracer.current()
+
+    def write_category(self, category_object):
+        self.flush()
+        self.current = next(self.plans)
+
+    def write_book(self, book_object):
+        self.current["rows"].append(book_row(book_object))
+
+    def flush(self):
+        if self.current is None:
+            return
+
+        with self.tracer.span(
+            "csv",
+            parent=self.span_parent,
+            path=self.current["csv_file"],
+            rows=len(self.current["rows"]),
+        ) as span:
+            task, arguments = self.saver.csv_task(category_plan=self.current)
+            reused = task(*arguments) or 0
+            span.set(reused=bool(reused))
+
+        self.reused += reused
+        self.current = None
+
+    def close(self):
+        self.flush()
+
+
+class JsonlSink(Sink):
+    """JsonlSink class writes every book as a JSON line, with csv field
+    names.
+
+    Attributes:
+        path (Path): Output file.
+    """
+
+    name = "jsonl"
+
+    def __init__(self, path):
+        super().__init__()
+
+        self.path = path
+        self._file = None
+
+    def open(self):
+        self._file = open(self.path, "w")
+
+    def write_book(self, book_object):
+        self._file.write(json.dumps(book_row(book_object)) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class SqliteSink(Sink):
+    """SqliteSink class writes categories and books to a SQLite database,
+    inserting books in batches.
+
+    Attributes:
+        path (Path): Database file.
+        batch_size (int): Number of books per insert.
+    """
+
+    name = "sqlite"
+
+    BOOK_COLUMNS = (
+        "url",
+        "upc",
+        "title",
+        "price_including_tax",
+        "price_excluding_tax",
+        "number_available",
+        "product_description",
+        "category",
+        "review_rating",
+        "image_url",
+    )
+
+    def __init__(self, path, batch_size: int = 1000):
+        super().__init__()
+
+        self.path = path
+        self.batch_size = batch_size
+        self._connection = None
+        self._pending = []
+
+    def open(self):
+        # Written to the staging directory, only published once complete.
+        self._connection = sqlite3.connect(str(self.path))
+        self._connection.execute("PRAGMA journal_mode = OFF")
+        self._connection.execute("PRAGMA synchronous = OFF")
+        self._connection.execute(
+            "CREATE TABLE categories (name TEXT PRIMARY KEY, url TEXT, "
+            "number_of_books INTEGER, complete INTEGER)"
+        )
+        self._connection.execute(
+            "CREATE TABLE books (url TEXT PRIMARY KEY, upc TEXT, title TEXT, "
+            "price_including_tax TEXT, price_excluding_tax TEXT, "
+            "number_available INTEGER, product_description TEXT, category TEXT, "
+            "review_rating INTEGER, image_url TEXT)"
+        )
+
+    def write_category(self, category_object):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO categories VALUES (?, ?, ?, ?)",
+            (
+                category_object.name,
+                category_object.url,
+                category_object.number_of_books,
+                int(getattr(category_object, "complete", True)),
+            ),
+        )
+
+    def write_book(self, book_object):
+        self._pending.append(
+            tuple(getattr(book_object, column) for column in self.BOOK_COLUMNS)
+        )
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO books VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._pending,
+        )
+        self._pending = []
+
+    def close(self):
+        if self._connection is None:
+            return
+
+        self.flush()
+        self._connection.execute("CREATE INDEX books_upc ON books (upc)")
+        self._connection.execute("CREATE INDEX books_category ON books (category)")
+        self._connection.commit()
+        self._connection.close()
+
+
+class SnapshotSink(Sink):
+    """SnapshotSink class writes a library snapshot next to the data
+    directory. It is written to a temporary file and only replaces the
+    previous snapshot when the tree is published.
+
+    Attributes:
+        path (Path): Snapshot file.
+        compress (bool): Compress records with zlib.
+    """
+
+    name = "snapshot"
+
+    def __init__(self, path, compress: bool = True):
+        super().__init__()
+
+        self.path = path
+        self.compress = compress
+        self._temporary_path = str(path) + ".tmp"
+        self._writer = None
+
+    def open(self):
+        self._writer = SnapshotWriter(path=self._temporary_path, compress=self.compress)
+
+    def write_category(self, category_object):
+        self._writer.write_category(category_object)
+
+    def write_book(self, book_object):
+        self._writer.write_book(book_object)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def publish(self):
+        os.replace(self._temporary_path, self.path)
+
+
+def build_sinks(names, saver, plan: list, snapshot_compress: bool = True):
+    """Instantiates sinks writing to Saver staging directory.
+
+    Args:
+        names (list): Sink names, as set in config.yml.
+        saver (Saver): Saver writing the tree.
+        plan (list): Output plan from Saver.plan_library.
+        snapshot_compress (bool): Compress snapshot records with zlib.
+
+    Raises:
+        _CUSTOM_ERRORS.CouldNotParseSink: If a sink name is not recognized.
+
+    Returns:
+        list: Sink objects.
+    """
+
+    sinks = []
+
+    for name in names:
+        if name == "csv":
+            sinks.append(CsvSink(saver=saver, plan=plan))
+        elif name == "jsonl":
+            sinks.append(JsonlSink(path=saver.staging_path.joinpath("books.jsonl")))
+        elif name == "sqlite":
+            sinks.append(SqliteSink(path=saver.staging_path.joinpath("books.sqlite")))
+        elif name == "snapshot":
+            sinks.append(
+                SnapshotSink(
+                    path=saver.save_path.parent.joinpath("web_scraper_library.snap"),
+                    compress=snapshot_compress,
+                )
+            )
+        else:
+            raise _CUSTOM_ERRORS.CouldNotParseSink(sink=name)
+
+    return sinks
+
+
+class SinkWorker(threading.Thread):
+    """SinkWorker class feeds a sink from a bounded queue of event
+    batches, in its own thread, and measures its throughput.
+
+    Attributes:
+        sink (Sink): Fed sink.
+        queue (queue.Queue): Pending event batches, None ending the stream.
+        error (Exception): Error raised by the sink, if any. Remaining
+        events are then drained and dropped, so that the stream never
+        blocks on a failed sink.
+        books (int): Number of books written.
+        busy (float): Seconds spent in sink methods.
+        blocked (float): Seconds the stream waited for queue space.
+    """
+
+    def __init__(self, sink: Sink, buffer: int):
+        """Constructor for SinkWorker class.
+
+        Args:
+            sink (Sink): Fed sink.
+            buffer (int): Maximum number of buffered events.
+        """
+
+        super().__init__(name="sink-" + sink.name, daemon=True)
+
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max(1, buffer // BATCH_SIZE))
+        self.error = None
+        self.books = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+
+    def put(self, batch):
+        start = time.perf_counter()
+        self.queue.put(batch)
+        self.blocked += time.perf_counter() - start
+
+    def run(self):
+        try:
+            self.sink.open()
+        except Exception as error:
+            self.error = error
+
+        while True:
+            batch = self.queue.get()
+
+            if batch is None:
+                break
+            if self.error is not None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                for event, value in batch:
+                    if event == "book":
+                        self.sink.write_book(value)
+                        self.books += 1
+                    else:
+                        self.sink.write_category(value)
+            except Exception as error:
+                self.error = error
+            self.busy += time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            self.sink.close()
+        except Exception as error:
+            self.error = self.error or error
+        self.busy += time.perf_counter() - start
+
+    def stats(self):
+        """Returns sink throughput, for logs and manifest.
+
+        Returns:
+            dict: Books written, busy and blocked seconds, books per second.
+        """
+
+        return {
+            "sink": self.sink.name,
+            "books": self.books,
+            "seconds": round(self.busy, 3),
+            "books_per_second": round(self.books / self.busy) if self.busy else None,
+            "blocked": round(self.blocked, 3),
+        }
+
+
+def run_sinks(sinks: list, events, buffer: int = 1024):
+    """Feeds one event stream to every sink, each in its own worker.
+
+    Args:
+        sinks (list): Sink objects.
+        events (iterable): Events, as yielded by stream_library.
+        buffer (int): Maximum number of events buffered per sink.
+
+    Raises:
+        Exception: First error raised by a sink, once every worker ended.
+
+    Returns:
+        list: Throughput of each sink, from SinkWorker.stats.
+    """
+
+    workers = [SinkWorker(sink=sink, buffer=buffer) for sink in sinks]
+
+    for worker in workers:
+        worker.start()
+
+    try:
+        batch = []
+
+        for event in events:
+            batch.append(event)
+
+            if len(batch) == BATCH_SIZE:
+                for worker in workers:
+                    worker.put(batch)
+                batch = []
+
+        if batch:
+            for worker in workers:
+                worker.put(batch)
+    finally:
+        for worker in workers:
+            worker.put(None)
+        for worker in workers:
+            worker.join()
+
+    for worker in workers:
+        if worker.error is not None:
+            raise worker.error
+
+    return [worker.stats() for worker in workers]
@@ -0,0 +1,346 @@
+"""Binary snapshot of a scraped Library.
+
+A snapshot file is a fixed header followed by a stream of records,
+optionally zlib compressed:
+
+    header: magic b"OCWS", format version (uint16), flags (uint16),
+            creation time (float64), little endian.
+    record: record type (1 byte), payload length (uint32), payload.
+
+Category payload: two uint32 string lengths (name, url), number of
+books (int32), complete (uint8), then the strings. Book payload: eight
+uint32 string lengths (title, url, category, upc, price including tax,
+price excluding tax, product description, image url), number available
+and review rating (int32), then the strings. Strings are UTF-8, a
+NONE_LENGTH length stands for None and -1 for a missing int.
+
+Categories are written before their books, so a snapshot can be written
+and read one record at a time.
+"""
+
+import os
+import struct
+import time
+import zlib
+
+from oc_web_scraper import errors as _CUSTOM_ERRORS
+
+MAGIC = b"OCWS"
+VERSION = 1
+FLAG_ZLIB = 1
+
+HEADER = struct.Struct("<4sHHd")
+RECORD = struct.Struct("<cI")
+CATEGORY = struct.Struct("<IIiB")
+BOOK = struct.Struct("<IIIIIIIIii")
+
+CATEGORY_RECORD = b"C"
+BOOK_RECORD = b"B"
+
+NONE_LENGTH = 0xFFFFFFFF
+CHUNK_SIZE = 1 << 16
+
+BOOK_STRING_FIELDS = (
+    "title",
+    "url",
+    "category",
+    "upc",
+    "price_including_tax",
+    "price_excluding_tax",
+    "product_description",
+    "image_url",
+)
+
+
+def encode_strings(values):
+    encoded = [None if value is None else value.encode("utf-8") for value in values]
+    lengths = [NONE_LENGTH if value is None else len(value) for value in encoded]
+
+    return lengths, b"".join(value for value in encoded if value is not None)
+
+
+def decode_strings(lengths, payload: bytes, offset: int):
+    values = []
+
+    for length in lengths:
+        if length == NONE_LENGTH:
+            values.append(None)
+        else:
+            values.append(payload[offset : offset + length].decode("utf-8"))
+            offset += length
+
+    return values
+
+
+def to_int32(value):
+    return -1 if value is None else int(value)
+
+
+def from_int32(value: int):
+    return None if value == -1 else value
+
+
+class SnapshotWriter:
+    """SnapshotWriter class streams categories and books to a snapshot file.
+
+    Attributes:
+        path (str): Snapshot file path.
+        compress (bool): Compress records with zlib.
+    """
+
+    def __init__(self, path: str, compress: bool = True, level: int = 6):
+        """Constructor for SnapshotWriter class. Writes file header.
+
+        Args:
+            path (str): Snapshot file path.
+            compress (bool): Compress records with zlib.
+            level (int): zlib compression level.
+        """
+
+        self.path = path
+        self.compress = compress
+
+        self._file = open(path, "wb")
+        self._compressor = zlib.compressobj(level) if compress else None
+
+        self._file.write(
+            HEADER.pack(MAGIC, VERSION, FLAG_ZLIB if compress else 0, time.time())
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_record(self, record_type: bytes, payload: bytes):
+        data = RECORD.pack(record_type, len(payload)) + payload
+
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+
+        self._file.write(data)
+
+    def write_category(self, category_object):
+        """Writes a category record, to be followed by its books.
+
+        Args:
+            category_object (Category): Scraped category.
+        """
+
+        lengths, strings = encode_strings((category_object.name, category_object.url))
+
+        self.write_record(
+            CATEGORY_RECORD,
+            CATEGORY.pack(
+                *lengths,
+                to_int32(category_object.number_of_books),
+                1 if getattr(category_object, "complete", True) else 0,
+            )
+            + strings,
+        )
+
+    def write_book(self, book_object):
+        """Writes a book record.
+
+        Args:
+            book_object (Book): Scraped book.
+        """
+
+        lengths, strings = encode_strings(
+            getattr(book_object, field) for field in BOOK_STRING_FIELDS
+        )
+
+        self.write_record(
+            BOOK_RECORD,
+            BOOK.pack(
+                *lengths,
+                to_int32(book_object.number_available),
+                to_int32(book_object.review_rating),
+            )
+            + strings,
+        )
+
+    def write_library(self, library):
+        """Writes every category of a library, each followed by its books.
+
+        Args:
+            library (Library): Scraped library.
+        """
+
+        for category_object in library.categories.values():
+            self.write_category(category_object)
+
+            for book_object in category_object.books.values():
+                self.write_book(book_object)
+
+    def close(self):
+        if self._file.closed:
+            return
+
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+
+        self._file.close()
+
+
+def read_chunks(path: str):
+    """Yields decompressed content of a snapshot file after its header.
+
+    Args:
+        path (str): Snapshot file path.
+
+    Raises:
+        _CUSTOM_ERRORS.UnsupportedSnapshot: If file is not a snapshot, or
+        was written by an unknown format version.
+
+    Yields:
+        bytes: Record stream chunks.
+    """
+
+    with open(path, "rb") as snapshot_file:
+        header = snapshot_file.read(HEADER.size)
+
+        if len(header) < HEADER.size:
+            raise _CUSTOM_ERRORS.UnsupportedSnapshot(path=path, reason="truncated header")
+
+        magic, version, flags, _ = HEADER.unpack(header)
+
+        if magic != MAGIC:
+            raise _CUSTOM_ERRORS.UnsupportedSnapshot(path=path, reason="not a snapshot")
+        if version != VERSION:
+            raise _CUSTOM_ERRORS.UnsupportedSnapshot(
+                path=path, reason="format version {version}".format(version=version)
+            )
+
+        decompressor = zlib.decompressobj() if flags & FLAG_ZLIB else None
+
+        for chunk in iter(lambda: snapshot_file.read(CHUNK_SIZE), b""):
+            yield decompressor.decompress(chunk) if decompressor else chunk
+
+        if decompressor is not None:
+            yield decompressor.flush()
+
+
+def iter_records(path: str):
+    """Reads a snapshot one record at a time, without building objects.
+
+    Args:
+        path (str): Snapshot file path.
+
+    Raises:
+        _CUSTOM_ERRORS.UnsupportedSnapshot: If file is not a supported
+        snapshot, or is truncated.
+
+    Yields:
+        tuple: ("category", dict) or ("book", dict), dict keys being
+        Category and Book attribute names.
+    """
+
+    buffer = b""
+    offset = 0
+
+    for chunk in read_chunks(path):
+        buffer = buffer[offset:] + chunk
+        offset = 0
+
+        while len(buffer) - offset >= RECORD.size:
+            record_type, length = RECORD.unpack_from(buffer, offset)
+            start = offset + RECORD.size
+
+            if len(buffer) - start < length:
+                break
+
+            if record_type == BOOK_RECORD:
+                values = BOOK.unpack_from(buffer, start)
+                book = dict(
+                    zip(
+                        BOOK_STRING_FIELDS,
+                        decode_strings(values[:8], buffer, start + BOOK.size),
+                    )
+                )
+                book["number_available"] = from_int32(values[8])
+                book["review_rating"] = from_int32(values[9])
+                yield "book", book
+            elif record_type == CATEGORY_RECORD:
+                values = CATEGORY.unpack_from(buffer, start)
+                name, url = decode_strings(values[:2], buffer, start + CATEGORY.size)
+                yield "category", {
+                    "name": name,
+                    "url": url,
+                    "number_of_books": from_int32(values[2]),
+                    "complete": bool(values[3]),
+                }
+
+            offset = start + length
+
+    if len(buffer) > offset:
+        raise _CUSTOM_ERRORS.UnsupportedSnapshot(path=path, reason="truncated record")
+
+
+def save_library(library, path: str, compress: bool = True):
+    """Writes a library snapshot to a temporary file, then renames it, so
+    that a previous snapshot is only replaced by a complete one.
+
+    Args:
+        library (Library): Scraped library.
+        path (str): Snapshot file path.
+        compress (bool): Compress records with zlib.
+    """
+
+    temporary_path = str(path) + ".tmp"
+
+    with SnapshotWriter(path=temporary_path, compress=compress) as writer:
+        writer.write_library(library)
+
+    os.replace(temporary_path, path)
+
+
+def load_library(path: str, logger, fetcher):
+    """Rebuilds a Library, its categories and books from a snapshot,
+    without any network access.
+
+    Args:
+        path (str): Snapshot file path.
+        logger (Logger): Main app logger object.
+        fetcher (Fetcher): Main app fetcher object, given to rebuilt objects.
+
+    Returns:
+        Library: Library as it was when the snapshot was written.
+    """
+
+    from oc_web_scraper.book import Book
+    from oc_web_scraper.library import Library
+
+    library = Library(logger=logger, fetcher=fetcher)
+    category_object = None
+
+    def add(category_object):
+        if category_object is not None:
+            library.add_category(category_object)
+
+    for record_type, values in iter_records(path):
+        if record_type == "category":
+            add(category_object)
+
+            category_object = library.new_category(name=values["name"], url=values["url"])
+            category_object.number_of_books = values["number_of_books"]
+            category_object.complete = values["complete"]
+            continue
+
+        book_object = Book(
+            title=values["title"],
+            url=values["url"],
+            category=values["category"],
+            logger=logger,
+            fetcher=fetcher,
+            lazy=True,
+        )
+        for field, value in values.items():
+            setattr(book_object, field, value)
+
+        category_object.books[book_object.url] = book_object
+
+    add(category_object)
+
+    return library
@@ -0,0 +1,379 @@
+import contextlib
+import itertools
+import json
+import threading
+import time
+import uuid
+
+from pathlib import Path
+
+TRACE_FILENAME = "web_scraper_trace.jsonl"
+
+
+class Span:
+    """Span class times one unit of work. Used as a context manager,
+    it becomes the parent of spans opened by the same thread until it
+    ends, then it is exported by its tracer. Work ending in another
+    thread uses begin and end instead, see Tracer.activate.
+
+    Attributes:
+        tracer (Tracer): Tracer exporting the span.
+        name (str): Kind of work, e.g. "book" or "fetch".
+        trace_id (str): Identifier shared by every span of a run.
+        span_id (int): Identifier of the span within its trace.
+        parent_id (int): Identifier of parent span, None for a root span.
+        attributes (dict): Values describing the work, e.g. URL or status.
+        start (float): Wall clock start time, as a timestamp.
+    """
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start",
+        "_started",
+    )
+
+    def __init__(self, tracer, name: str, parent, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = tracer.next_id()
+        self.attributes = attributes
+
+        if parent is None:
+            self.trace_id = uuid.uuid4().hex[:16]
+            self.parent_id = None
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+
+    def set(self, **attributes):
+        """Adds attributes to the span."""
+
+        self.attributes.update(attributes)
+
+    def begin(self):
+        """Starts timing the span, without making it a parent.
+
+        Returns:
+            Span: The span itself.
+        """
+
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def end(self):
+        """Stops timing the span and exports it, from any thread."""
+
+        self.tracer.export(self, duration=time.perf_counter() - self._started)
+
+    def __enter__(self):
+        self.tracer.push(self)
+        return self.begin()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.tracer.pop()
+
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+
+        self.end()
+
+        return False
+
+
+class NullSpan:
+    """NullSpan class stands for every span when tracing is disabled."""
+
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def begin(self):
+        return self
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class NullTracer:
+    """NullTracer class is used when tracing is disabled: spans cost a
+    method call returning a shared no-op span."""
+
+    enabled = False
+
+    def span(self, name: str, parent=None, **attributes):
+        return NULL_SPAN
+
+    def current(self):
+        return None
+
+    def activate(self, span):
+        return NULL_SPAN
+
+    def bind(self, function):
+        return function
+
+    def close(self):
+        pass
+
+
+class Tracer:
+    """Tracer class records spans of runs to a JSON lines file, one line
+    per ended span, appended across runs.
+
+    Spans opened by a thread are children of the span it has open,
+    spans of worker threads get their parent through bind or an
+    explicit parent. Nothing is kept in memory once a span is written.
+
+    Attributes:
+        trace_file (Path): JSON lines file receiving spans.
+        spans (int): Number of spans written.
+    """
+
+    enabled = True
+
+    def __init__(self, path: str):
+        """Constructor for Tracer class.
+
+        Args:
+            path (str): Directory holding trace file.
+        """
+
+        self.trace_file = Path(path).joinpath(TRACE_FILENAME)
+        self.spans = 0
+
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = open(self.trace_file, "a", encoding="utf-8")
+
+    def next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def span(self, name: str, parent=None, **attributes):
+        """Creates a span, to use as a context manager.
+
+        Args:
+            name (str): Kind of work.
+            parent (Span): Parent span, span open in calling thread if
+            omitted.
+            **attributes: Values describing the work.
+
+        Returns:
+            Span: New span.
+        """
+
+        if parent is None:
+            parent = self.current()
+
+        return Span(self, name=name, parent=parent, attributes=attributes)
+
+    def current(self):
+        """Returns span open in calling thread, None if there is none."""
+
+        stack = getattr(self._local, "stack", None)
+
+        return stack[-1] if stack else None
+
+    def push(self, span: Span):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        stack.append(span)
+
+    def pop(self):
+        self._local.stack.pop()
+
+    @contextlib.contextmanager
+    def activate(self, span: Span):
+        """Makes a begun span the parent of spans opened by calling
+        thread, without ending it on exit.
+
+        Args:
+            span (Span): Begun span.
+        """
+
+        self.push(span)
+        try:
+            yield span
+        finally:
+            self.pop()
+
+    def bind(self, function):
+        """Wraps a function so that spans it opens, from any thread, are
+        children of the span open in calling thread.
+
+        Args:
+            function (callable): Function run by a worker.
+
+        Returns:
+            callable: Wrapped function.
+        """
+
+        parent = self.current()
+        if parent is None:
+            return function
+
+        def bound(*args, **kwargs):
+            self.push(parent)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.pop()
+
+        return bound
+
+    def export(self, span: Span, duration: float):
+        """Writes an ended span to trace file.
+
+        Args:
+            span (Span): Ended span.
+            duration (float): Span duration in seconds.
+        """
+
+        line = json.dumps(
+            {
+                "trace": span.trace_id,
+                "span": span.span_id,
+                "parent": span.parent_id,
+                "name": span.name,
+                "start": span.start,
+                "duration": duration,
+                "thread": threading.current_thread().name,
+                "attributes": span.attributes,
+            },
+            default=str,
+        )
+
+        with self._lock:
+            self._file.write(line + "\n")
+            self.spans += 1
+
+            # Root span ends the run.
+            if span.parent_id is None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_spans(path: str, trace_id: str = None):
+    """Reads spans of one run from a trace file.
+
+    Args:
+        path (str): Trace file.
+        trace_id (str): Run to read, last recorded one if omitted.
+
+    Returns:
+        list: Span dicts, as written by Tracer.
+    """
+
+    traces = {}
+
+    with open(path, encoding="utf-8") as trace_file:
+        for line in trace_file:
+            # Last line may be partial if the run was killed.
+            try:
+                span = json.loads(line)
+            except ValueError:
+                continue
+
+            traces.setdefault(span["trace"], []).append(span)
+
+    if trace_id is None:
+        if not traces:
+            return []
+        # Root span is written last, but runs killed early have none.
+        trace_id = max(
+            traces, key=lambda key: max(span["start"] for span in traces[key])
+        )
+
+    return traces.get(trace_id, [])
+
+
+def summarize(spans: list, top: int = 10):
+    """Summarizes spans of a run: time spent by path, e.g.
+    "run/category/book/fetch", and slowest spans with the time spent in
+    their children.
+
+    Args:
+        spans (list): Span dicts of a run.
+        top (int): Number of slowest spans listed.
+
+    Returns:
+        dict: "paths" (list of dicts sorted by total time) and "slowest"
+        (list of dicts sorted by duration).
+    """
+
+    by_id = {span["span"]: span for span in spans}
+    children = {}
+    for span in spans:
+        children.setdefault(span["parent"], []).append(span)
+
+    def path_of(span):
+        names = [span["name"]]
+        parent = by_id.get(span["parent"])
+        while parent is not None:
+            names.append(parent["name"])
+            parent = by_id.get(parent["parent"])
+
+        return "/".join(reversed(names))
+
+    paths = {}
+    for span in spans:
+        path = path_of(span)
+        entry = paths.setdefault(
+            path, {"path": path, "count": 0, "total": 0.0, "max": 0.0, "errors": 0}
+        )
+        entry["count"] += 1
+        entry["total"] += span["duration"]
+        entry["max"] = max(entry["max"], span["duration"])
+        entry["errors"] += "error" in span["attributes"]
+
+    for entry in paths.values():
+        entry["mean"] = entry["total"] / entry["count"]
+
+    slowest = []
+    # Root span always is the slowest one, and says nothing more.
+    for span in sorted(
+        (span for span in spans if span["parent"] is not None),
+        key=lambda span: span["duration"],
+        reverse=True,
+    )[:top]:
+        breakdown = {}
+        for child in children.get(span["span"], []):
+            breakdown[child["name"]] = (
+                breakdown.get(child["name"], 0.0) + child["duration"]
+            )
+
+        slowest.append(
+            {
+                "path": path_of(span),
+                "duration": span["duration"],
+                "attributes": span["attributes"],
+                "children": breakdown,
+            }
+        )
+
+    return {
+        "paths": sorted(paths.values(), key=lambda entry: entry["total"], reverse=True),
+        "slowest": slowest,
+    }
@@ -18,7 +18,7 @@ setup(
     url="https://github.com/PabloLec/oc_web_scraper",
     long_description=long_description,
     long_description_content_type="text/markdown",
-    packages=find_packages(exclude=["tests", "docs"]),
+    packages=find_packages(exclude=["tests", "docs", "benchmarks", "benchmarks.*"]),
     entry_points={
         "console_scripts": [
             "oc_web_scraper = oc_web_scraper:main",
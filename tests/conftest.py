@@ -0,0 +1,38 @@
+import pytest
+
+from oc_web_scraper.config import load_config
+
+from benchmarks.synthetic_site import FaultInjector, SyntheticServer, SyntheticSite
+
+
+@pytest.fixture(scope="session")
+def website():
+    """Synthetic website served in-process for the whole session."""
+
+    server = SyntheticServer(
+        site=SyntheticSite(number_of_books=200, number_of_categories=5),
+        faults=FaultInjector(latency=0.001),
+    )
+    server.start()
+
+    yield server
+
+    server.stop()
+
+
+@pytest.fixture
+def config(tmp_path):
+    """App config saving to a temporary directory, without logging nor
+    state files outside of it."""
+
+    config = load_config()
+    config.update(
+        save_path=str(tmp_path),
+        enable_logging=False,
+        log_to_file=False,
+        parse_memo=False,
+        history=False,
+        trace=False,
+    )
+
+    return config
@@ -0,0 +1,42 @@
+import pytest
+
+from oc_web_scraper.data_tree import DataTree
+from oc_web_scraper.handler import Handler
+
+from benchmarks.synthetic_site import FaultInjector, SyntheticServer, SyntheticSite
+
+
+@pytest.fixture(scope="module")
+def shared_website():
+    """Synthetic website whose last category first lists the first books
+    of the first one."""
+
+    server = SyntheticServer(
+        site=SyntheticSite(
+            number_of_books=100, number_of_categories=4, skew=0, shared=5
+        ),
+        faults=FaultInjector(latency=0.001),
+    )
+    server.start()
+
+    yield server
+
+    server.stop()
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+def test_shared_books_belong_to_first_category_on_home_page(
+    shared_website, config, pipeline
+):
+    # Largest category, listing shared books, is scrapped first.
+    config.update(pipeline=pipeline, scrape_workers=1, scrape_priority="largest")
+
+    handler = Handler(shared_website.base_url, config=config)
+
+    rows = list(DataTree(save_path=config["save_path"]).iter_rows())
+    categories = {row["URL"]: row["Category"] for row in rows}
+    shared = [url for url in categories if "/book-0_0/" in url or "/book-4_4/" in url]
+
+    assert len(rows) == len(categories) == 100
+    assert [categories[url] for url in shared] == ["Category 0", "Category 0"]
+    assert handler.library.seen.duplicates == 5
@@ -0,0 +1,59 @@
+import subprocess
+import sys
+
+import pytest
+
+from oc_web_scraper.handler import Handler
+
+COMMANDS = [
+    ["export"],
+    ["export", "--format", "jsonl"],
+    ["verify"],
+    ["stats"],
+    ["stats", "--by-category"],
+    ["history", "--since", "2000-01-01"],
+    ["history", "--as-of", "2100-01-01"],
+    ["trace"],
+]
+
+
+@pytest.fixture(scope="module")
+def saved(website, tmp_path_factory):
+    """Save path of a scraped run with history and trace."""
+
+    from oc_web_scraper.config import load_config
+
+    save_path = tmp_path_factory.mktemp("saved")
+    config = load_config()
+    config.update(
+        save_path=str(save_path),
+        enable_logging=False,
+        log_to_file=False,
+        parse_memo=False,
+        history=True,
+        history_path=str(save_path),
+        trace=True,
+        trace_path=str(save_path),
+    )
+    Handler(website.base_url, config=config)
+
+    return save_path
+
+
+@pytest.mark.parametrize("command", COMMANDS, ids=" ".join)
+def test_closed_pipe_exits_quietly(saved, command):
+    overrides = []
+    for key in ("save_path", "history_path", "trace_path"):
+        overrides += ["--set", "{key}={path}".format(key=key, path=saved)]
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "oc_web_scraper", *command, *overrides],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    # Reader goes away before any output, as head does once satisfied.
+    process.stdout.close()
+    _, stderr = process.communicate(timeout=60)
+
+    assert b"Traceback" not in stderr
+    assert b"BrokenPipeError" not in stderr
@@ -0,0 +1,26 @@
+from oc_web_scraper.columns import MISSING, BookColumns
+
+
+def test_tax_ratio_only_pairs_books_with_both_prices():
+    columns = BookColumns()
+    columns.append("a", 1200, 1000, 1, 5)
+    columns.append("a", 5000, MISSING, 1, 5)
+    columns.append("a", MISSING, 3000, 1, 5)
+    columns.append("a", 2400, 2000, 1, 5)
+
+    stats = columns.report()["categories"]["a"]
+
+    assert stats["tax_pairs"] == 2
+    assert stats["tax_ratio"] == 1.2
+    assert stats["total_price"] == 8600
+
+
+def test_tax_ratio_is_none_without_pairs():
+    columns = BookColumns()
+    columns.append("a", 1200, MISSING, 1, 5)
+    columns.append("a", MISSING, 1000, 1, 5)
+
+    stats = columns.report()["categories"]["a"]
+
+    assert stats["tax_pairs"] == 0
+    assert stats["tax_ratio"] is None
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from oc_web_scraper.history import History
+
+
+def book(upc, price):
+    return SimpleNamespace(
+        upc=upc,
+        price_including_tax="£{:.2f}".format(price),
+        price_excluding_tax="£{:.2f}".format(price),
+        number_available=3,
+        review_rating=4,
+        product_description="Description.",
+    )
+
+
+def test_date_splits_as_of_and_since(tmp_path):
+    history = History(path=str(tmp_path))
+    history.record_run([book("a", 10)], timestamp="2026-10-18T12:00:00")
+    history.record_run([book("a", 12)], timestamp="2026-10-19T08:00:00")
+    history.record_run([book("a", 15)], timestamp="2026-10-20T00:00:00")
+
+    # Changes of 2026-10-19 are in its state, not after it.
+    assert history.as_of("2026-10-19")["a"]["price_including_tax"] == 1200
+    assert [change[0] for change in history.since("2026-10-19")] == [
+        "2026-10-20T00:00:00"
+    ]
+    assert [change[0] for change in history.since("2026-10-19T07:59:59")] == [
+        "2026-10-19T08:00:00",
+        "2026-10-20T00:00:00",
+    ]
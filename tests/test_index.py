@@ -0,0 +1,66 @@
+import random
+
+from types import SimpleNamespace
+
+import pytest
+
+from oc_web_scraper.index import LibraryIndex
+
+
+@pytest.fixture
+def index():
+    generator = random.Random(0)
+    index = LibraryIndex()
+
+    for number in range(300):
+        price = generator.choice([None, "£{:.2f}".format(generator.randint(1, 40))])
+        index.add_book(
+            SimpleNamespace(
+                upc=str(number),
+                url="book-{num}".format(num=number),
+                category=generator.choice(["a", "b", "c"]),
+                review_rating=generator.randint(0, 5),
+                price_including_tax=price,
+                number_available=generator.choice([None, 0, 3, 7, 12]),
+            )
+        )
+
+    return index
+
+
+@pytest.mark.parametrize("order_by", ["price", "available"])
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("limit", [1, 5, 40])
+def test_walk_and_order_agree(index, order_by, descending, limit):
+    filters = index.filters("a", None, None, None, None, None)
+
+    with index.lock:
+        walked = index.walk(
+            order_by=order_by, descending=descending, limit=limit, filters=filters
+        )
+        ordered = index.order(
+            index.by_category["a"], order_by, descending=descending, limit=limit
+        )
+
+    assert walked == [index.books[position] for position in ordered]
+
+
+def test_price_ordering_leaves_unpriced_books_out(index):
+    # Few candidates are ordered, many are walked in price index.
+    for category in ("a", None):
+        books = index.query(category=category, order_by="price", limit=500)
+
+        assert books
+        assert all(book.price_including_tax is not None for book in books)
+
+
+def test_limit_keeps_insertion_order(index):
+    books = index.query(min_price=1000, in_stock=True, limit=10)
+    positions = [index.by_upc[book.upc] for book in books]
+
+    assert positions == sorted(positions)
+
+
+def test_limit_zero_returns_nothing(index):
+    assert index.top(limit=0, descending=True) == []
+    assert index.query(order_by="price", limit=0) == []
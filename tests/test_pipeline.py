@@ -0,0 +1,25 @@
+from oc_web_scraper.handler import Handler
+from oc_web_scraper.pipeline import STAGES
+
+
+def test_queued_fetches_respect_request_budget(website, config):
+    config.update(pipeline=True, budget_requests=100)
+
+    handler = Handler(website.base_url, config=config)
+
+    # Requests already started when budget runs out still complete.
+    workers = sum(
+        config["pipeline_{stage}_workers".format(stage=stage)] for stage in STAGES
+    )
+    assert handler.budget.reason == "max_requests"
+    assert handler.budget.requests <= 100 + workers
+
+
+def test_categories_finish_once_books_are_scrapped(website, config):
+    config.update(pipeline=True)
+
+    handler = Handler(website.base_url, config=config)
+
+    for category_object in handler.library.categories.values():
+        assert category_object.queued == 0
+        assert len(category_object.books) == category_object.number_of_books
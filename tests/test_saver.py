@@ -0,0 +1,26 @@
+from oc_web_scraper.data_tree import DataTree
+from oc_web_scraper.handler import Handler
+
+
+def test_filtered_run_keeps_other_categories(website, config, tmp_path):
+    Handler(website.base_url, config=config)
+    data_tree = DataTree(save_path=str(tmp_path))
+    rows = sorted(row["URL"] for row in data_tree.iter_rows())
+
+    config.update(categories=["Category 1"])
+    Handler(website.base_url, config=config)
+
+    assert tmp_path.joinpath("data").is_symlink()
+    assert sorted(row["URL"] for row in data_tree.iter_rows()) == rows
+    assert len(data_tree.manifest()["carried"]) == len(data_tree.category_dirs()) - 1
+
+
+def test_publish_keeps_previous_version_only(website, config, tmp_path):
+    config.update(categories=["Category 1"])
+    for _ in range(3):
+        Handler(website.base_url, config=config)
+
+    assert sorted(path.name for path in tmp_path.glob("data.v*")) == [
+        "data.v2",
+        "data.v3",
+    ]